@@ -1,30 +1,67 @@
 # analyzer.py
 import os
-import pickle
-import hashlib
-from sentence_transformers import SentenceTransformer
+import time
+import asyncio
+import json
+import threading
 
 from ollama_client import OllamaClient
 from project_manager import ProjectManager
 from intent_detector import IntentDetector
+from vector_store import VectorStore
+from chunker import chunk_text
+from project_watcher import ProjectWatcher
+from model_registry import get_model, model_stats
+from prompt_builder import PromptBuilder, TokenCounter, describe_report
+from code_index import CodeIndex, INDEXED_EXTENSIONS
+from dependency_index import describe_stack, is_manifest
+from repo_summarizer import RepoSummarizer
+
+# File types that get chunked and embedded
+EMBED_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".py")
 
 
 class ProjectAnalyzer:
-    def __init__(self):
+    def __init__(self, embed_batch_size=64, chunk_lines=40, chunk_overlap=8):
         self.client = OllamaClient()
         self.project = ProjectManager()
         self.detector = IntentDetector()
         self.currentQuery = ""
-        self.embeddings_cache = {}
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.cache_file = "embeddings.pkl"
+        self.embedding_model_name = "all-MiniLM-L6-v2"
+        self.store = VectorStore("embeddings")
+        self.code_index = CodeIndex()   # routes / models / DB libraries, extracted without the LLM
+        self.embed_batch_size = embed_batch_size
+        self.chunk_lines = chunk_lines
+        self.chunk_overlap = chunk_overlap
+        self._embed_jobs = []
+        self._indexed_files = 0
+        self._index_lock = threading.RLock()   # index updates vs. queries
+        self.watcher = None
+        self.token_counter = TokenCounter()
+        self.last_prompt_report = None
+        self.summarizer = RepoSummarizer(self.client, counter=self.token_counter)
+        self.repo_summary = None
+
+    @property
+    def embedding_model(self):
+        """Shared embedding model, loaded on first use."""
+        return get_model(self.embedding_model_name)
+
+    def model_stats(self):
+        """Load time and memory of every model loaded in this process."""
+        return model_stats()
 
     # ---------------------------
     # 🧠 Main Project Open Method
     # ---------------------------
     def open_project(self, path):
         """Open a project and automatically build or update embeddings."""
-        self.project.open_project(path)
+        print("🔍 Building semantic index (this may take a moment)...")
+        self._embed_jobs = []
+        self._indexed_files = 0
+
+        # One scan feeds the project samples, the code index and the embedding jobs
+        self.project.open_project(path, on_file=self._on_scanned)
         print(f"📂 Project opened: {path}")
 
         # Build or update the semantic index
@@ -33,101 +70,238 @@ class ProjectAnalyzer:
     # --------------------------------
     # ⚡ Build and Cache Embeddings
     # --------------------------------
-    def _build_project_embeddings(self, project_path):
-        """Build semantic embeddings for project files, with caching."""
-        print("🔍 Building semantic index (this may take a moment)...")
-
-        # Load existing embeddings cache (if available)
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, "rb") as f:
-                self.embeddings_cache = pickle.load(f)
-        else:
-            self.embeddings_cache = {}
+    def _on_scanned(self, scanned):
+        self.code_index.update_scanned(scanned)
+        self._queue_embedding(scanned)
 
-        updated = False
-        indexed_files = 0
-
-        for root, _, files in os.walk(project_path):
-            # Skip non-source directories
-            if any(skip in root for skip in ["node_modules", "dist", ".next", ".git", "__pycache__"]):
-                continue
-
-            for f in files:
-                if f.endswith((".js", ".jsx", ".ts", ".tsx", ".py")):
-                    path = os.path.join(root, f)
-                    file_hash = self._hash_file(path)
-
-                    if path not in self.embeddings_cache or self.embeddings_cache[path]["hash"] != file_hash:
-                        with open(path, "r", encoding="utf-8", errors="ignore") as file:
-                            text = file.read()
-
-                        emb = self.embedding_model.encode(text)
-                        self.embeddings_cache[path] = {"hash": file_hash, "embedding": emb}
-                        updated = True
-                        indexed_files += 1
-                        print(f"🧩 Indexed: {path}")
+    def _queue_embedding(self, scanned):
+        """Scanner callback: queue changed source files, embedding them in batches."""
+        if not scanned.path.endswith(EMBED_EXTENSIONS):
+            return
+        if self._needs_embedding(scanned.path, scanned.hash):
+            scanned.read_text()  # no-op unless the manifest let the scan skip the read
+            self._embed_jobs.append(scanned)
+            self._indexed_files += 1
+            if len(self._embed_jobs) >= self.embed_batch_size:
+                self._embed_files(self._embed_jobs)
+                self._embed_jobs = []
 
-        # Save updated cache
+    def _build_project_embeddings(self, project_path):
+        """Finish the semantic index after the project scan: flush queued jobs, drop deleted files."""
+        self._embed_files(self._embed_jobs)
+        self._embed_jobs = []
+        updated = self._indexed_files > 0
+
+        # Drop files that were deleted since the last run
+        seen = self.project.file_index
+        self.code_index.prune(project_path, seen)
+        self.code_index.save()
+        project_root = os.path.join(os.path.abspath(project_path), "")
+        for path in list(self.store.entries):
+            if os.path.abspath(path).startswith(project_root) and path not in seen:
+                self.store.remove(path)
+                updated = True
+
+        # Save updated index (new rows were already appended to the matrix file)
         if updated:
-            with open(self.cache_file, "wb") as f:
-                pickle.dump(self.embeddings_cache, f)
-            print(f"✅ Semantic index updated ({indexed_files} new/changed files).")
+            self.store.save()
+            print(f"✅ Semantic index updated ({self._indexed_files} new/changed files).")
         else:
             print("⚡ Embeddings are already up to date.")
 
         # Attach to project object
-        self.project.embedding_index = self.embeddings_cache
-        
+        self.project.embedding_index = self.store
+
     def update_embeddings(self, changed_files=None):
         """
         Update embeddings for newly created or modified files.
         If `changed_files` is None, it re-scans the entire project (incrementally).
         """
-        if not hasattr(self, "embeddings_cache"):
+        if self.project.project_path is None:
             print("⚠️ Embedding cache not initialized. Run open_project() first.")
             return
 
+        with self._index_lock:
+            self._update_embeddings(changed_files)
+
+    def _update_embeddings(self, changed_files):
         start_time = time.time()
-        updated = 0
+        removed = 0
+        jobs = []
 
         if changed_files is None:
             # fallback: re-scan all project files (incremental)
             changed_files = []
-            for path in self.embeddings_cache.keys():
+            for path in list(self.store.entries):
                 if not os.path.exists(path):
-                    continue  # skip deleted files
+                    self.store.remove(path)  # forget deleted files
+                    removed += 1
+                    continue
                 changed_files.append(path)
 
+        manifests_changed = False
         for path in changed_files:
+            manifest = is_manifest(os.path.basename(path))
+            manifests_changed = manifests_changed or manifest
             if not os.path.exists(path):
+                # deleted (or moved away) since it was indexed
+                self.project.manifest.remove(path)
+                self.project.dependency_index.remove(path)
+                self.code_index.remove(path)
+                if path in self.store:
+                    self.store.remove(path)
+                    removed += 1
+                continue
+            if not (manifest or path.endswith(EMBED_EXTENSIONS + INDEXED_EXTENSIONS)):
+                continue
+
+            # single read: hash and text come from the same bytes
+            scanned = self.project.scanner.read_and_record(path)
+            if scanned is None:
+                print(f"⚠️ Skipped {path}: unreadable")
+                continue
+
+            self.code_index.update_scanned(scanned)
+            self.project.dependency_index.update_scanned(scanned)
+            if not path.endswith(EMBED_EXTENSIONS):
                 continue
 
-            file_hash = self._hash_file(path)
-            cached = self.embeddings_cache.get(path)
-
-            if not cached or cached["hash"] != file_hash:
-                try:
-                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                        text = f.read()
-                    emb = self.embedding_model.encode(text)
-                    self.embeddings_cache[path] = {"hash": file_hash, "embedding": emb}
-                    updated += 1
-                    print(f"🔁 Re-embedded: {path}")
-                except Exception as e:
-                    print(f"⚠️ Skipped {path}: {e}")
-
-        # Save updates if anything changed
-        if updated > 0:
-            with open(self.cache_file, "wb") as f:
-                pickle.dump(self.embeddings_cache, f)
+            if self._needs_embedding(path, scanned.hash):
+                jobs.append(scanned)
+
+        updated = self._embed_files(jobs)
+        self.project.manifest.save()
+        self.code_index.save()
+        if manifests_changed:
+            self.project.refresh_dependencies()
+
+        # Only the sidecar index is rewritten; vectors were appended in place
+        if updated > 0 or removed > 0:
+            self.store.save()
             print(f"✅ Updated embeddings for {updated} files (took {time.time() - start_time:.2f}s)")
         else:
             print("⚡ No embedding updates required — everything is current.")
 
-    def _hash_file(self, path):
-        """Compute a fast hash for file change detection."""
-        with open(path, "rb") as f:
-            return hashlib.md5(f.read()).hexdigest()
+    # --------------------------------
+    # 👀 Watch Mode
+    # --------------------------------
+    def watch(self, debounce=0.5, poll_interval=None):
+        """
+        Keep the index live: file changes under the open project are debounced
+        and re-embedded on a background worker (inotify on Linux, else polling
+        every `poll_interval` seconds).
+        """
+        if self.project.project_path is None:
+            print("⚠️ Open a project before enabling watch mode.")
+            return None
+        self.stop_watching()
+        self.watcher = ProjectWatcher(
+            self.project.project_path,
+            self._apply_watch_changes,
+            scanner=self.project.scanner,
+            debounce=debounce,
+            poll_interval=poll_interval,
+        )
+        self.watcher.start()
+        return self.watcher
+
+    def stop_watching(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def index_freshness(self):
+        """Freshness of the semantic index (always fresh when not watching)."""
+        if self.watcher is None:
+            return {"backend": None, "fresh": True, "store_version": self.store.version}
+        return {**self.watcher.freshness(), "store_version": self.store.version}
+
+    def _apply_watch_changes(self, paths):
+        if paths is None:
+            # events were lost: incremental rescan (cheap thanks to the manifest)
+            with self._index_lock:
+                self.open_project(self.project.project_path)
+        else:
+            self.update_embeddings(paths)
+
+    def _needs_embedding(self, path, file_hash):
+        entry = self.store.entries.get(path)
+        # Entries from the old whole-file index carry no line spans
+        return entry is None or entry["hash"] != file_hash or "spans" not in entry
+
+    def _embed_files(self, jobs):
+        """
+        Chunk files at function/class boundaries and encode every chunk from
+        all `jobs` (ScannedFile objects) in batches of `embed_batch_size`.
+        """
+        if not jobs:
+            return 0
+
+        texts, owners = [], []
+        for i, job in enumerate(jobs):
+            for chunk in chunk_text(job.path, job.text, self.chunk_lines, self.chunk_overlap):
+                texts.append(f"File: {job.path} (lines {chunk['start']}-{chunk['end']})\n{chunk['text']}")
+                owners.append((i, chunk["start"], chunk["end"]))
+
+        vectors = self.embedding_model.encode(
+            texts, batch_size=self.embed_batch_size, normalize_embeddings=True
+        ) if texts else []
+
+        grouped = {}
+        for (i, start, end), vector in zip(owners, vectors):
+            grouped.setdefault(i, ([], []))
+            grouped[i][0].append(vector)
+            grouped[i][1].append((start, end))
+
+        for i, job in enumerate(jobs):
+            if i in grouped:
+                rows, spans = grouped[i]
+                self.store.put(job.path, job.hash, job.mtime, rows, spans=spans)
+                print(f"🧩 Indexed: {job.path} ({len(spans)} chunks)")
+            else:
+                self.store.remove(job.path)  # empty file: nothing to retrieve
+
+        return len(jobs)
+
+    # --------------------------------
+    # 🔎 Semantic Retrieval
+    # --------------------------------
+    def search(self, query, top_k=10):
+        """Return the top-k (path, start_line, end_line, score) chunks of the open project for a query."""
+        query_vector = self.embedding_model.encode(query, normalize_embeddings=True)
+        if self.watcher and not self.watcher.wait_until_fresh(timeout=10):
+            print("⚠️ Index still updating — results may be slightly stale.")
+        with self._index_lock:
+            # the store is shared by every project opened from this directory
+            return self.store.search(query_vector, top_k=top_k, root=self.project.project_path)
+
+    def retrieve_snippets(self, query, top_k=20):
+        """Highest-scoring, non-overlapping chunks for `query`, best first."""
+        snippets = []
+        included = {}
+
+        for path, start, end, score in self.search(query, top_k=top_k):
+            # Skip chunks overlapping one we've already included
+            if any(start <= e and end >= s for s, e in included.get(path, [])):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+
+            snippets.append(f"File: {path} (lines {start}-{end})\n" + "\n".join(lines[start - 1:end]))
+            included.setdefault(path, []).append((start, end))
+
+        return snippets
+
+    def retrieve_context(self, query, top_k=20, token_budget=3000):
+        """Assemble the highest-scoring chunks for `query` into a context of at most `token_budget` tokens."""
+        builder = PromptBuilder(token_budget, self.token_counter)
+        for rank, snippet in enumerate(self.retrieve_snippets(query, top_k=top_k)):
+            builder.add(f"chunk {rank + 1}", snippet, priority=-rank)
+        context, _ = builder.build()
+        return context
 
     # --------------------------------
     # 🧠 Ask / Intent Handling
@@ -146,23 +320,148 @@ class ProjectAnalyzer:
         else:
             return "⚠️ Intent not recognized."
 
+    def generate_project(self, query, root=None, run_commands=False):
+        """Create a new project: skeleton plan first, then file contents streamed to disk."""
+        return self.project.generate_project(query, root=root, run_commands=run_commands)
+
     # --------------------------------
     # 🧩 Project Analysis (Framework/API/DB)
     # --------------------------------
-    def analyze_technologies(self, analysis_type="framework"):
+    def analyze_technologies(self, analysis_type="framework", summarize=None, whole_repo=False):
         """
         Analyze project files and dependencies using specialized prompts
         depending on the requested analysis type.
         analysis_type: one of ['framework', 'api', 'database']
+        When the answer is known statically (the stack fingerprint for
+        'framework', the code index tables for 'api' and 'database') it is
+        returned as is unless `summarize` is True (no model call).
+        `summarize=None` only skips the model for a recognised stack.
+        With `whole_repo` the prompt also gets the map-reduce summary of every
+        source file (see summarize_repo()) instead of relying on samples alone.
         """
+        listing = self.structural_listing(analysis_type)
+        if listing and not whole_repo and not self._summarize(analysis_type, summarize):
+            return listing
 
-        # Prepare code context
-        code_snippets = "\n\n".join(
-            f"File: {path}\n{code[:800]}" for path, code in self.project.file_samples
+        overview = self.summarize_repo() if whole_repo else None
+        # --- Send the prompt to Ollama model ---
+        return self.client.generate(self._build_analysis_prompt(analysis_type, overview), json_response=False)
+
+    def summarize_repo(self):
+        """
+        Hierarchical summary of every indexed source file, rolled up per
+        directory and then for the repository. Nodes are cached by content, so
+        after the first run only changed files and their parent directories
+        cost model calls.
+        """
+        root = self.project.project_path
+        if root is None:
+            raise ValueError("No project open. Run open_project() first.")
+        project_root = os.path.join(os.path.abspath(root), "")
+        files = {
+            path: entry[3] for path, entry in list(self.project.manifest.files.items())
+            if path.endswith(INDEXED_EXTENSIONS) and os.path.abspath(path).startswith(project_root)
+        }
+        self.repo_summary = self.summarizer.summarize(root, files)
+        print(f"🌳 Repository summarized: {self.repo_summary['calls']} model calls, "
+              f"{self.repo_summary['cached']} cached nodes ({self.repo_summary['seconds']}s)")
+        return self.repo_summary
+
+    def analyze_apis(self, summarize=False):
+        return self.analyze_technologies("api", summarize=summarize)
+
+    def analyze_database(self, summarize=False):
+        return self.analyze_technologies("database", summarize=summarize)
+
+    @staticmethod
+    def _summarize(analysis_type, summarize):
+        return analysis_type != "framework" if summarize is None else summarize
+
+    def structural_listing(self, analysis_type):
+        """Pre-extracted stack / route / database table for the open project, or "" if there is none."""
+        root = self.project.project_path
+        if analysis_type == "framework":
+            stack = self.project.stack
+            return describe_stack(stack) if stack and stack["known"] else ""
+        if analysis_type == "api":
+            return self.code_index.api_table(root)
+        if analysis_type == "database":
+            return self.code_index.database_table(root)
+        return ""
+
+    async def aanalyze_technologies(self, analysis_type="framework", summarize=None, whole_repo=False):
+        """Async variant of analyze_technologies()."""
+        overview = await asyncio.to_thread(self.summarize_repo) if whole_repo else None
+        return await self._aanalyze(analysis_type, summarize, overview)
+
+    async def _aanalyze(self, analysis_type, summarize, overview):
+        listing = self.structural_listing(analysis_type)
+        if listing and overview is None and not self._summarize(analysis_type, summarize):
+            return listing
+        return await self.client.agenerate(self._build_analysis_prompt(analysis_type, overview), json_response=False)
+
+    async def aanalyze_all(self, analysis_types=("framework", "api", "database"), summarize=None, whole_repo=False):
+        """Run several analyses concurrently and return {analysis_type: result}."""
+        # One repository summary shared by every analysis
+        overview = await asyncio.to_thread(self.summarize_repo) if whole_repo else None
+        results = await asyncio.gather(
+            *(self._aanalyze(t, summarize, overview) for t in analysis_types),
+            return_exceptions=True,
         )
+        merged = {}
+        for analysis_type, result in zip(analysis_types, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ {analysis_type} analysis failed: {result}")
+                result = f"⚠️ {analysis_type} analysis failed: {result}"
+            merged[analysis_type] = result
+        return merged
+
+    def analyze_report(self, analysis_types=("framework", "api", "database"), whole_repo=False):
+        """
+        Full project report: fires the framework, api and database prompts
+        concurrently, so it takes about as long as the slowest one. Sections
+        known statically (stack fingerprint, code index tables) skip the model
+        unless `whole_repo` asks for answers grounded in the repository summary.
+        """
+        start_time = time.time()
+        merged = asyncio.run(self.aanalyze_all(analysis_types, summarize=False, whole_repo=whole_repo))
+        print(f"📊 Report ready ({len(merged)} analyses in {time.time() - start_time:.2f}s)")
+
+        sections = []
+        for analysis_type, result in merged.items():
+            body = result if isinstance(result, str) else json.dumps(result, indent=2)
+            sections.append(f"## {analysis_type.capitalize()} analysis\n{body}")
+        return "\n\n".join(sections)
+
+    def _retrieval_query(self, analysis_type):
+        """What to search the index for, biased by the user's own question if any."""
+        RETRIEVAL_QUERIES = {
+            "framework": "application entry point, framework setup, imports, configuration and build tooling",
+            "api": "http route handlers, api endpoints, request methods and routers",
+            "database": "database connection, orm models, schema definitions and queries",
+        }
+        query = RETRIEVAL_QUERIES.get(analysis_type, RETRIEVAL_QUERIES["framework"])
+        if self.currentQuery:
+            query = f"{self.currentQuery}. {query}"
+        return query
+
+    def _build_analysis_prompt(self, analysis_type="framework", overview=None):
+        """Build the specialized prompt for one analysis type (`overview`: a summarize_repo() result)."""
+
+        # Routes / models already extracted statically: the model only summarizes the table
+        listing = self.structural_listing(analysis_type)
+
+        # Prepare code context: most relevant chunks from the semantic index,
+        # falling back to the first indexed files when there's no index yet
+        code_snippets = []
+        if not listing:
+            if len(self.store):
+                code_snippets = self.retrieve_snippets(self._retrieval_query(analysis_type))
+            if not code_snippets:
+                code_snippets = [f"File: {path}\n{code[:800]}" for path, code in self.project.file_samples]
 
         deps = ", ".join(self.project.dependencies)
-        dep_text = f"\nDetected dependencies: {deps}\n" if deps else ""
+        dep_text = f"Detected dependencies: {deps}" if deps else ""
 
         # --- Specialized prompt templates ---
         PROMPTS = {
@@ -211,15 +510,24 @@ class ProjectAnalyzer:
         # --- Select appropriate prompt template ---
         prompt_template = PROMPTS.get(analysis_type, PROMPTS["framework"])
 
-        # --- Build final prompt for model ---
-        final_prompt = f"""
-{prompt_template}
-
-{dep_text}
-
-Code samples:
-{code_snippets}
-"""
-
-        # --- Send the prompt to Ollama model ---
-        return self.client.generate(final_prompt)
+        # --- Build final prompt for model, packed by priority under the context budget ---
+        builder = PromptBuilder(self.client.prompt_budget, self.token_counter)
+        builder.add("instructions", prompt_template, priority=100)
+        builder.add("dependencies", dep_text, priority=90, truncatable=True)
+        if overview:
+            top_level = [f"- {d}/: {text}" for d, text in overview["directories"].items() if "/" not in d]
+            builder.add("repository overview", "Repository overview (summarized from every source file):\n"
+                        + overview["summary"] + ("\n\nTop-level directories:\n" + "\n".join(top_level)
+                                                 if top_level else ""), priority=88, truncatable=True)
+        if listing:
+            builder.add("extracted", "Statically extracted from the whole codebase (complete and exact; "
+                        "summarize it, do not invent entries):\n" + listing, priority=85, truncatable=True)
+        if code_snippets:
+            builder.add("code header", "Code samples:", priority=80)
+        for rank, snippet in enumerate(code_snippets):
+            # the best-ranked snippet may be cut to fit; the rest are all-or-nothing
+            builder.add(snippet.split("\n", 1)[0], snippet, priority=50 - rank, truncatable=rank == 0)
+
+        final_prompt, self.last_prompt_report = builder.build()
+        print(describe_report(self.last_prompt_report))
+        return final_prompt
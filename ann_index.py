@@ -0,0 +1,176 @@
+# ann_index.py
+import os
+import time
+
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest neighbour index (cosine / inner product).
+
+    Vectors are clustered around `nlist` k-means centroids; a query only scores
+    the rows in its `nprobe` closest clusters. The index keeps row ids only —
+    vectors are read through `fetch(rows)` (e.g. the memory-mapped store), so it
+    adds almost no memory on top of the embeddings themselves.
+    """
+
+    def __init__(self, fetch, nlist=None, nprobe=16, train_iters=10, seed=0):
+        self.fetch = fetch
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.rng = np.random.default_rng(seed)
+
+        self.centroids = None
+        self.lists = []          # cluster -> list of row ids
+        self.assignment = {}     # row id -> cluster
+        self._arrays = {}        # cluster -> cached np.array of its ids
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def __len__(self):
+        return len(self.assignment)
+
+    # --------------------------------
+    # 🏗️ Build
+    # --------------------------------
+    def train(self, rows, sample_size=None):
+        """Run spherical k-means on a sample of `rows` and assign every row to a cluster."""
+        rows = np.asarray(rows, dtype=np.int64)
+        nlist = self.nlist or max(1, int(2 * np.sqrt(len(rows))))
+        nlist = min(nlist, len(rows))
+        sample_size = sample_size or min(len(rows), 32 * nlist)
+
+        sample = np.sort(self.rng.choice(rows, size=sample_size, replace=False))
+        data = np.asarray(self.fetch(sample), dtype=np.float32)
+        centroids = data[self.rng.choice(len(data), size=nlist, replace=False)].copy()
+
+        for _ in range(self.train_iters):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # re-seed empty clusters with random sample points
+            sums[empty] = data[self.rng.choice(len(data), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self.lists = [[] for _ in range(nlist)]
+        self.assignment = {}
+        self._arrays = {}
+        self.add(rows)
+
+    def add(self, rows, vectors=None, batch=65536):
+        """Insert rows (vectors are fetched if not given)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        for i in range(0, len(rows), batch):
+            part = rows[i:i + batch]
+            vecs = self.fetch(part) if vectors is None else vectors[i:i + batch]
+            labels = np.argmax(np.asarray(vecs, dtype=np.float32) @ self.centroids.T, axis=1)
+            for row, label in zip(part.tolist(), labels.tolist()):
+                self.lists[label].append(row)
+                self.assignment[row] = label
+                self._arrays.pop(label, None)
+
+    def remove(self, rows):
+        for row in rows:
+            label = self.assignment.pop(int(row), None)
+            if label is not None:
+                self.lists[label].remove(int(row))
+                self._arrays.pop(label, None)
+
+    # --------------------------------
+    # 🔎 Search
+    # --------------------------------
+    def search(self, query_vector, top_k=10, nprobe=None):
+        """Return (rows, scores) of the approximate top-k, best first."""
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, len(self.lists))
+
+        probe = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+        candidates = [self._ids(label) for label in probe.tolist()]
+        candidates = np.sort(np.concatenate(candidates)) if candidates else np.empty(0, np.int64)
+        if not len(candidates):
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+
+        scores = np.asarray(self.fetch(candidates), dtype=np.float32) @ query_vector
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+    def _ids(self, label):
+        ids = self._arrays.get(label)
+        if ids is None:
+            ids = np.array(self.lists[label], dtype=np.int64)
+            self._arrays[label] = ids
+        return ids
+
+    # --------------------------------
+    # 📂 Persistence
+    # --------------------------------
+    def save(self, path, version):
+        rows = np.fromiter(self.assignment.keys(), dtype=np.int64, count=len(self.assignment))
+        labels = np.fromiter(self.assignment.values(), dtype=np.int32, count=len(self.assignment))
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, centroids=self.centroids, rows=rows, labels=labels, version=np.int64(version))
+        os.replace(tmp, path)
+
+    def load(self, path, version):
+        """Load a saved index; returns False if missing or built for another store version."""
+        if not os.path.exists(path):
+            return False
+        data = np.load(path)
+        if int(data["version"]) != version:
+            return False
+
+        self.centroids = data["centroids"]
+        self.lists = [[] for _ in range(len(self.centroids))]
+        self.assignment = {}
+        self._arrays = {}
+        for row, label in zip(data["rows"].tolist(), data["labels"].tolist()):
+            self.lists[label].append(row)
+            self.assignment[row] = label
+        return True
+
+
+def benchmark(data, queries, top_k=10, nprobes=(1, 4, 8, 16, 32), nlist=None):
+    """Compare IVF recall@k and latency against exact search over `data` (normalized rows)."""
+    index = IVFIndex(lambda rows: data[rows], nlist=nlist)
+    start = time.perf_counter()
+    index.train(np.arange(len(data)))
+    build_time = time.perf_counter() - start
+
+    exact_times, truth = [], []
+    for q in queries:
+        start = time.perf_counter()
+        scores = data @ q
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        exact_times.append(time.perf_counter() - start)
+        truth.append(set(top.tolist()))
+
+    results = {
+        "vectors": len(data),
+        "nlist": len(index.lists),
+        "build_s": build_time,
+        "exact_ms": 1000 * float(np.median(exact_times)),
+        "ivf": [],
+    }
+    for nprobe in nprobes:
+        times, recall = [], []
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            rows, _ = index.search(q, top_k=top_k, nprobe=nprobe)
+            times.append(time.perf_counter() - start)
+            recall.append(len(expected & set(rows.tolist())) / top_k)
+        results["ivf"].append({
+            "nprobe": nprobe,
+            "recall": float(np.mean(recall)),
+            "ms": 1000 * float(np.median(times)),
+        })
+    return results
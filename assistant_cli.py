@@ -0,0 +1,178 @@
+# assistant_cli.py
+import argparse
+import getpass
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+
+
+def default_address():
+    # Same default as assistant_daemon.default_address(), without importing the daemon (and its models)
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(tempfile.gettempdir(), f"ai-coding-agent-{os.getuid()}.sock")
+    return ("127.0.0.1", 8765)
+
+
+def token_path(port):
+    # Same as assistant_daemon.token_path()
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"ai-coding-agent-{user}-{port}.token")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonError(RuntimeError):
+    """The daemon is unreachable or rejected the request."""
+
+
+class DaemonClient:
+    """
+    Thin client for assistant_daemon: standard library only, so a query costs
+    a socket round trip rather than importing models and re-indexing a project.
+    One keep-alive connection is reused across calls. Over loopback TCP the
+    daemon's per-run token is read from its token file (or passed as `token`).
+    """
+
+    def __init__(self, address=None, timeout=600, token=None):
+        self.address = address or default_address()
+        self.timeout = timeout
+        self.token = token
+        self._connection = None
+
+    def _auth_headers(self):
+        if isinstance(self.address, str):
+            return {}
+        if self.token is None:
+            try:
+                with open(token_path(self.address[1]), "r") as f:
+                    self.token = f.read().strip()
+            except OSError:
+                raise DaemonError(f"No token for a daemon on port {self.address[1]} "
+                                  f"(expected {token_path(self.address[1])})") from None
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            return UnixHTTPConnection(self.address, timeout=self.timeout)
+        return http.client.HTTPConnection(*self.address, timeout=self.timeout)
+
+    def request(self, method, path, body=None):
+        """Return the `result` of a daemon call; raises DaemonError on failure."""
+        data = json.dumps(body or {}).encode("utf-8") if method == "POST" else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        headers.update(self._auth_headers())
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                self._connection.request(method, path, body=data, headers=headers)
+                response = self._connection.getresponse()
+                payload = json.loads(response.read() or b"{}")
+                break
+            except (ConnectionRefusedError, FileNotFoundError) as e:
+                raise DaemonError(f"No assistant daemon at {self.address} ({e}). "
+                                  "Start one with: python assistant_cli.py serve") from None
+            except (http.client.HTTPException, ConnectionError) as e:
+                # the daemon closed an idle keep-alive connection: reconnect once
+                self.close()
+                if attempt:
+                    raise DaemonError(f"Lost connection to the assistant daemon ({e})") from None
+        if not payload.get("ok"):
+            raise DaemonError(payload.get("error") or f"HTTP {response.status}")
+        return payload["result"]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def status(self):
+        return self.request("GET", "/status")
+
+    def open(self, path, watch=False):
+        return self.request("POST", "/open", {"path": os.path.abspath(path), "watch": watch})
+
+    def ask(self, query):
+        return self.request("POST", "/ask", {"query": query})
+
+    def analyze(self, analysis_type="framework", summarize=None, whole_repo=False):
+        return self.request("POST", "/analyze", {"type": analysis_type, "summarize": summarize,
+                                                 "whole_repo": whole_repo})
+
+    def plan(self, query):
+        return self.request("POST", "/plan", {"query": query})
+
+    def shutdown(self):
+        return self.request("POST", "/shutdown")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to the resident assistant daemon.")
+    parser.add_argument("--socket", help="Daemon Unix socket path")
+    parser.add_argument("--port", type=int, help="Daemon TCP port on 127.0.0.1 (instead of a Unix socket)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("serve", help="Run the daemon in the foreground (same options as assistant_daemon.py)")
+    commands.add_parser("status", help="Show daemon, queue, index and host status")
+    commands.add_parser("shutdown", help="Stop the daemon")
+    open_cmd = commands.add_parser("open", help="Open (index) a project")
+    open_cmd.add_argument("path")
+    open_cmd.add_argument("--watch", action="store_true")
+    ask_cmd = commands.add_parser("ask", help="Ask a question about the open project")
+    ask_cmd.add_argument("query", nargs="+")
+    analyze_cmd = commands.add_parser("analyze", help="Framework / API / database analysis or a full report")
+    analyze_cmd.add_argument("type", nargs="?", default="framework", choices=["framework", "api", "database", "report"])
+    analyze_cmd.add_argument("--summarize", action="store_true", default=None)
+    analyze_cmd.add_argument("--whole-repo", action="store_true")
+    plan_cmd = commands.add_parser("plan", help="Plan a new project from a request")
+    plan_cmd.add_argument("query", nargs="+")
+
+    args, rest = parser.parse_known_args(argv)
+    address = ("127.0.0.1", args.port) if args.port else args.socket
+
+    if args.command == "serve":
+        import assistant_daemon
+        daemon_args = rest + (["--port", str(args.port)] if args.port else []) + (
+            ["--socket", args.socket] if args.socket else [])
+        return assistant_daemon.main(daemon_args)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    client = DaemonClient(address)
+    try:
+        if args.command == "status":
+            result = client.status()
+        elif args.command == "shutdown":
+            result = client.shutdown()
+        elif args.command == "open":
+            result = client.open(args.path, watch=args.watch)
+        elif args.command == "ask":
+            result = client.ask(" ".join(args.query))
+        elif args.command == "analyze":
+            result = client.analyze(args.type, summarize=args.summarize, whole_repo=args.whole_repo)
+        else:
+            result = client.plan(" ".join(args.query))
+    except DaemonError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+
+    print(result if isinstance(result, str) else json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
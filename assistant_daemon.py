@@ -0,0 +1,367 @@
+# assistant_daemon.py
+import argparse
+import getpass
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from smart_assistant import SmartAssistant
+
+
+def default_address():
+    """Per-user Unix socket where supported, else a loopback TCP port."""
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(tempfile.gettempdir(), f"ai-coding-agent-{os.getuid()}.sock")
+    return ("127.0.0.1", 8765)
+
+
+def token_path(port):
+    """Where a loopback-TCP daemon leaves its per-run access token for clients of the same user."""
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"ai-coding-agent-{user}-{port}.token")
+
+
+def write_token(path, token):
+    """Write `token` to a fresh file only this user can read."""
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+
+
+class ServerBusy(RuntimeError):
+    """The request queue is full."""
+
+
+class ReadWriteLock:
+    """Many concurrent readers (queries) or one writer (re-indexing a project)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._writing = True   # new readers wait from here on
+            while self._readers:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class RequestQueue:
+    """
+    Fixed pool of workers in front of the assistant. Up to `max_pending`
+    requests may wait or run at once; beyond that submit() raises ServerBusy
+    instead of letting latency grow without bound.
+    """
+
+    def __init__(self, workers=4, max_pending=64):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assistant")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.served = 0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise ServerBusy(f"Request queue is full ({self.max_pending} pending)")
+        with self._lock:
+            self.pending += 1
+        enqueued = time.perf_counter()
+
+        def run():
+            waited = time.perf_counter() - enqueued
+            try:
+                return fn(*args, **kwargs), waited
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                    self.served += 1
+                self.slots.release()
+
+        return self.executor.submit(run)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self.pending, "served": self.served, "max_pending": self.max_pending}
+
+
+class AssistantDaemon:
+    """
+    Resident assistant process: one SmartAssistant (intent models, embedding
+    model, vector store, code/dependency indexes, Ollama connection pool) kept
+    warm for the life of the process, so a query pays only for its own work.
+
+    Serves a small JSON-over-HTTP API on a Unix socket (or loopback TCP):
+      GET  /status                       project, queue and model stats
+      POST /open     {"path", "watch"}   open (index) a project
+      POST /ask      {"query"}           intent-routed answer
+      POST /analyze  {"type", "summarize", "whole_repo"}
+      POST /plan     {"query"}           project plan for a request
+      POST /shutdown
+    Requests go through a RequestQueue; opening a project excludes queries
+    against the index while it is rebuilt.
+
+    Any local process (or web page) can reach a loopback port, so in TCP mode
+    every request must carry the per-run token from token_path(port) as
+    `Authorization: Bearer <token>`. Browser requests (an Origin header) and
+    POST bodies not sent as application/json are refused in both modes.
+    """
+
+    def __init__(self, assistant=None, workers=4, max_pending=64, output_root=None):
+        self.assistant = assistant or SmartAssistant(output_root=output_root)
+        self.analyzer = self.assistant.analyzer
+        self.queue = RequestQueue(workers, max_pending)
+        self.started = time.time()
+        self.server = None
+        self.token = None
+        self._index_lock = ReadWriteLock()   # queries read the project index, /open rebuilds it
+
+    def warm_up(self):
+        """Load the models up front so the first query doesn't pay for them."""
+        start = time.time()
+        try:
+            self.assistant.detector.model
+            self.analyzer.embedding_model
+        except ImportError as e:
+            print(f"⚠️ Models not preloaded ({e}); they will load on first use.")
+            return
+        print(f"🔥 Models loaded in {time.time() - start:.2f}s")
+
+    # --------------------------------
+    # 🧭 Routes
+    # --------------------------------
+    def open(self, path, watch=False):
+        with self._index_lock.writing():
+            self.analyzer.stop_watching()
+            self.analyzer.open_project(path)
+            if watch:
+                self.analyzer.watch()
+        return {"project": path, "dependencies": len(self.analyzer.project.dependencies)}
+
+    def ask(self, query):
+        self._require_project()
+        with self._index_lock.reading():
+            return self.assistant.handle_query(query)
+
+    def analyze(self, analysis_type="framework", summarize=None, whole_repo=False):
+        self._require_project()
+        with self._index_lock.reading():
+            if analysis_type == "report":
+                return self.analyzer.analyze_report(whole_repo=whole_repo)
+            return self.analyzer.analyze_technologies(analysis_type, summarize=summarize, whole_repo=whole_repo)
+
+    def plan(self, query):
+        return self.analyzer.project.get_project_plan(query, stream=False)
+
+    def status(self):
+        return {
+            "project": self.analyzer.project.project_path,
+            "output_root": self.assistant.output_root,
+            "uptime": round(time.time() - self.started, 1),
+            "queue": self.queue.stats(),
+            "index": self.analyzer.index_freshness(),
+            "hosts": self.analyzer.client.stats(),
+            "models": self.analyzer.model_stats(),
+        }
+
+    def _require_project(self):
+        if self.analyzer.project.project_path is None:
+            raise ValueError("No project open. POST /open first.")
+
+    ROUTES = {
+        "/open": lambda self, body: self.open(body["path"], watch=body.get("watch", False)),
+        "/ask": lambda self, body: self.ask(body["query"]),
+        "/analyze": lambda self, body: self.analyze(
+            body.get("type", "framework"), summarize=body.get("summarize"), whole_repo=body.get("whole_repo", False)
+        ),
+        "/plan": lambda self, body: self.plan(body["query"]),
+    }
+
+    def handle(self, method, path, body):
+        """(HTTP status, JSON payload) for one request."""
+        if method == "GET" and path == "/status":
+            return 200, {"ok": True, "result": self.status()}
+        if method == "POST" and path == "/shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return 200, {"ok": True, "result": "shutting down"}
+        route = self.ROUTES.get(path) if method == "POST" else None
+        if route is None:
+            return 404, {"ok": False, "error": f"Unknown endpoint {method} {path}"}
+
+        start = time.perf_counter()
+        try:
+            result, waited = self.queue.submit(route, self, body).result()
+        except ServerBusy as e:
+            return 503, {"ok": False, "error": str(e)}
+        except (KeyError, ValueError) as e:
+            return 400, {"ok": False, "error": f"Bad request: {e}"}
+        except Exception as e:
+            return 500, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return 200, {"ok": True, "result": result, "queued": round(waited, 3),
+                     "seconds": round(time.perf_counter() - start, 3)}
+
+    # --------------------------------
+    # 🔌 Transport
+    # --------------------------------
+    def serve(self, address=None):
+        """Serve until /shutdown (or Ctrl-C). `address`: a socket path or a (host, port) tuple."""
+        address = address or default_address()
+        token_file = None
+        if isinstance(address, tuple):
+            self.token = secrets.token_urlsafe(32)
+        self.server = make_server(address, self)
+        if self.token:
+            token_file = token_path(self.server.server_address[1])
+            write_token(token_file, self.token)
+        where = address if isinstance(address, str) else f"http://{address[0]}:{self.server.server_address[1]}"
+        print(f"🚀 Assistant daemon listening on {where}")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            for path in (address if isinstance(address, str) else None, token_file):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            self.analyzer.stop_watching()
+            self.analyzer.client.close()
+            self.analyzer.project.client.close()
+            print("👋 Assistant daemon stopped")
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address, daemon):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive: a client can reuse one connection
+
+        def _respond(self, status, payload):
+            data = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if self.close_connection:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _refused(self):
+            """(status, payload) when the request must not reach the daemon, else None."""
+            if self.headers.get("Origin") is not None:
+                return 403, {"ok": False, "error": "Cross-origin requests are not accepted"}
+            if daemon.token and not hmac.compare_digest(
+                    self.headers.get("Authorization", "").encode(), f"Bearer {daemon.token}".encode()):
+                return 401, {"ok": False, "error": "Missing or invalid daemon token"}
+            return None
+
+        def do_GET(self):
+            refused = self._refused()
+            self._respond(*(refused or daemon.handle("GET", self.path, {})))
+
+        def do_POST(self):
+            refused = self._refused()
+            content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+            if refused is None and content_type != "application/json":
+                refused = 415, {"ok": False, "error": "Content-Type must be application/json"}
+            if refused:
+                self.close_connection = True   # the unread body would corrupt the next request
+                self._respond(*refused)
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._respond(400, {"ok": False, "error": "Request body must be JSON"})
+                return
+            self._respond(*daemon.handle("POST", self.path, body))
+
+        def address_string(self):
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def log_message(self, format, *args):
+            pass
+
+    if isinstance(address, tuple):
+        return ThreadingHTTPServer(address, Handler)
+
+    if os.path.exists(address):
+        # A leftover socket from a crashed daemon is removed; a live one is an error
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(address)
+            raise RuntimeError(f"An assistant daemon is already listening on {address}")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(address)
+        finally:
+            probe.close()
+    # Bind, restrict the socket file to this user, and only then start listening.
+    # (Not os.umask: it is process-wide and would race with other threads creating files.)
+    server = ThreadingUnixHTTPServer(address, Handler, bind_and_activate=False)
+    try:
+        server.server_bind()
+        os.chmod(address, 0o600)
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the assistant as a resident daemon.")
+    parser.add_argument("--socket", help="Unix socket path (default: per-user socket in the temp directory)")
+    parser.add_argument("--port", type=int, help="Listen on 127.0.0.1:PORT instead of a Unix socket")
+    parser.add_argument("--project", help="Project to open at startup")
+    parser.add_argument("--watch", action="store_true", help="Keep the project index fresh with a file watcher")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--output-root", help="Directory generated projects are written to "
+                                              "(default: ~/ai-coding-agent-projects)")
+    args = parser.parse_args(argv)
+
+    daemon = AssistantDaemon(workers=args.workers, max_pending=args.max_pending, output_root=args.output_root)
+    daemon.warm_up()
+    if args.project:
+        daemon.open(args.project, watch=args.watch)
+    daemon.serve(("127.0.0.1", args.port) if args.port else args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# chunker.py
+import ast
+import re
+
+# Lines that start a new top-level unit in JS/TS sources
+JS_BOUNDARY = re.compile(
+    r"^\s*(export\s+)?(default\s+)?(async\s+)?(function\b|class\b)"
+    r"|^\s*(export\s+)?(const|let|var)\s+\w+\s*=\s*(async\s*)?(\(|function\b|\w+\s*=>)"
+    r"|^\s*(export\s+)?(interface|type|enum)\s+\w+"
+)
+PY_BOUNDARY = re.compile(r"^\s*(async\s+def|def|class)\s+\w+")
+
+
+def _python_boundaries(text):
+    """Start lines (0-based) of top-level statements, functions/classes and methods."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return [i for i, line in enumerate(text.splitlines()) if PY_BOUNDARY.match(line)]
+
+    starts = set()
+    for node in tree.body:
+        lineno = node.lineno
+        if getattr(node, "decorator_list", None):
+            lineno = min(d.lineno for d in node.decorator_list)
+        starts.add(lineno - 1)
+        if isinstance(node, ast.ClassDef):
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    child_line = child.lineno
+                    if child.decorator_list:
+                        child_line = min(d.lineno for d in child.decorator_list)
+                    starts.add(child_line - 1)
+    return sorted(starts)
+
+
+def _js_boundaries(text):
+    return [i for i, line in enumerate(text.splitlines()) if JS_BOUNDARY.match(line)]
+
+
+def boundaries_for(path, text):
+    if path.endswith(".py"):
+        return _python_boundaries(text)
+    if path.endswith((".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")):
+        return _js_boundaries(text)
+    return []
+
+
+def chunk_text(path, text, max_lines=40, overlap=8):
+    """
+    Split a file into chunks of at most `max_lines` lines, cut at function/class
+    boundaries where possible. Units longer than `max_lines` are split into
+    windows overlapping by `overlap` lines.
+    Returns [{"start": int, "end": int, "text": str}] with 1-based inclusive line numbers.
+    """
+    lines = text.splitlines()
+    if not lines:
+        return []
+
+    cuts = sorted(set([0] + [b for b in boundaries_for(path, text) if 0 < b < len(lines)]))
+    segments = [(start, end) for start, end in zip(cuts, cuts[1:] + [len(lines)])]
+
+    # Pack small consecutive units together, split oversized ones
+    spans = []
+    current = None
+    for start, end in segments:
+        if end - start > max_lines:
+            if current:
+                spans.append(current)
+                current = None
+            step = max(1, max_lines - overlap)
+            for window in range(start, end, step):
+                spans.append((window, min(window + max_lines, end)))
+                if window + max_lines >= end:
+                    break
+        elif current and end - current[0] <= max_lines:
+            current = (current[0], end)
+        else:
+            if current:
+                spans.append(current)
+            current = (start, end)
+    if current:
+        spans.append(current)
+
+    chunks = []
+    for start, end in spans:
+        body = "\n".join(lines[start:end])
+        if body.strip():
+            chunks.append({"start": start + 1, "end": end, "text": body})
+    return chunks
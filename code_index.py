@@ -0,0 +1,534 @@
+# code_index.py
+import ast
+import json
+import os
+import re
+
+PYTHON_EXTENSIONS = (".py",)
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+PRISMA_EXTENSIONS = (".prisma",)
+INDEXED_EXTENSIONS = PYTHON_EXTENSIONS + JS_EXTENSIONS + PRISMA_EXTENSIONS
+
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "options"}
+
+# Imported module → (kind, database); kind is "orm" or "driver", database None when it depends on config
+DB_LIBRARIES = {
+    # Python
+    "sqlalchemy": ("orm", None), "flask_sqlalchemy": ("orm", None), "sqlmodel": ("orm", None),
+    "django.db": ("orm", None), "peewee": ("orm", None), "tortoise": ("orm", None),
+    "pony": ("orm", None), "mongoengine": ("orm", "MongoDB"), "beanie": ("orm", "MongoDB"),
+    "psycopg2": ("driver", "PostgreSQL"), "psycopg": ("driver", "PostgreSQL"), "asyncpg": ("driver", "PostgreSQL"),
+    "pymysql": ("driver", "MySQL"), "mysql.connector": ("driver", "MySQL"), "MySQLdb": ("driver", "MySQL"),
+    "aiomysql": ("driver", "MySQL"), "sqlite3": ("driver", "SQLite"), "aiosqlite": ("driver", "SQLite"),
+    "pymongo": ("driver", "MongoDB"), "motor": ("driver", "MongoDB"), "redis": ("driver", "Redis"),
+    "elasticsearch": ("driver", "Elasticsearch"), "cassandra": ("driver", "Cassandra"), "neo4j": ("driver", "Neo4j"),
+    # JavaScript / TypeScript
+    "mongoose": ("orm", "MongoDB"), "sequelize": ("orm", None), "typeorm": ("orm", None),
+    "@prisma/client": ("orm", None), "knex": ("orm", None), "drizzle-orm": ("orm", None),
+    "@mikro-orm/core": ("orm", None), "objection": ("orm", None),
+    "pg": ("driver", "PostgreSQL"), "postgres": ("driver", "PostgreSQL"), "mysql": ("driver", "MySQL"),
+    "mysql2": ("driver", "MySQL"), "better-sqlite3": ("driver", "SQLite"),
+    "mongodb": ("driver", "MongoDB"), "ioredis": ("driver", "Redis"), "@elastic/elasticsearch": ("driver", "Elasticsearch"),
+}
+
+WEB_FRAMEWORKS = {
+    "flask": "Flask", "fastapi": "FastAPI", "django": "Django", "starlette": "Starlette",
+    "express": "Express", "fastify": "Fastify", "koa": "Koa", "@koa/router": "Koa", "koa-router": "Koa",
+    "hono": "Hono", "next": "Next.js", "@nestjs/common": "NestJS",
+}
+
+# Base classes that make a Python class an ORM model
+PY_MODEL_BASES = {"Model", "Base", "DeclarativeBase", "SQLModel", "Document", "DynamicDocument", "EmbeddedDocument"}
+PY_FIELD_CALLS = {"Column", "mapped_column", "Field", "relationship", "ForeignKey", "StringField", "IntField",
+                  "ReferenceField", "ListField"}
+
+
+def library_for(module):
+    """DB_LIBRARIES key for `module` or one of its parent packages ("sqlalchemy.orm", "drizzle-orm/pg-core")."""
+    for separator in (".", "/"):
+        parts = module.split(separator)
+        for i in range(len(parts), 0, -1):
+            name = separator.join(parts[:i])
+            if name in DB_LIBRARIES:
+                return name
+    return None
+
+
+# --------------------------------
+# 🐍 Python (ast)
+# --------------------------------
+def _dotted(node):
+    """'app.route' for an Attribute/Name chain, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return None
+
+
+def _string(node):
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _keyword(call, name):
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    return None
+
+
+def _methods(node):
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [m.upper() for m in (_string(e) for e in node.elts) if m]
+    return []
+
+
+def extract_python(text):
+    tree = ast.parse(text)
+    facts = {"routes": [], "models": [], "libraries": [], "frameworks": []}
+    prefixes = {}   # router / blueprint variable → url prefix
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            modules = [alias.name for alias in node.names] if isinstance(node, ast.Import) else [node.module or ""]
+            for module in modules:
+                library = library_for(module)
+                if library:
+                    facts["libraries"].append({"library": library, "line": node.lineno})
+                framework = WEB_FRAMEWORKS.get(module.split(".")[0])
+                if framework and framework not in facts["frameworks"]:
+                    facts["frameworks"].append(framework)
+
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            # router = APIRouter(prefix="/users") / bp = Blueprint("users", __name__, url_prefix="/users")
+            prefix = _string(_keyword(node.value, "prefix") or _keyword(node.value, "url_prefix"))
+            if prefix:
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        prefixes[target.id] = prefix
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if not isinstance(decorator, ast.Call):
+                    continue
+                name = _dotted(decorator.func)
+                if not name or "." not in name or not decorator.args:
+                    continue
+                owner, attr = name.rsplit(".", 1)
+                path = _string(decorator.args[0])
+                if path is None:
+                    continue
+                if attr in HTTP_METHODS:
+                    methods = [attr.upper()]
+                elif attr in ("route", "api_route"):
+                    methods = _methods(_keyword(decorator, "methods")) or ["GET"]
+                elif attr == "websocket":
+                    methods = ["WS"]
+                else:
+                    continue
+                for method in methods:
+                    facts["routes"].append({"method": method, "path": prefixes.get(owner, "") + path,
+                                            "handler": node.name, "line": node.lineno})
+
+        elif isinstance(node, ast.Call):
+            name = _dotted(node.func) or ""
+            if name.endswith("add_url_rule") and node.args and _string(node.args[0]):
+                owner = name.rsplit(".", 1)[0]
+                view = _keyword(node, "view_func")
+                methods = _methods(_keyword(node, "methods")) or ["GET"]
+                for method in methods:
+                    facts["routes"].append({"method": method, "path": prefixes.get(owner, "") + _string(node.args[0]),
+                                            "handler": _dotted(view) if view is not None else None,
+                                            "line": node.lineno})
+            elif name in ("path", "re_path", "url") and "Django" in facts["frameworks"] \
+                    and len(node.args) > 1 and _string(node.args[0]) is not None:
+                # Django urlpatterns
+                view = node.args[1]
+                handler = _dotted(view.func if isinstance(view, ast.Call) else view)
+                facts["routes"].append({"method": "ANY", "path": "/" + _string(node.args[0]).lstrip("^/"),
+                                        "handler": handler, "line": node.lineno})
+
+        elif isinstance(node, ast.ClassDef):
+            model = _python_model(node)
+            if model:
+                facts["models"].append(model)
+
+    return facts
+
+
+def _python_model(node):
+    bases = [(_dotted(b) or "") for b in node.bases]
+    base_names = {b.rsplit(".", 1)[-1] for b in bases}
+    table = None
+    fields = []
+    for statement in node.body:
+        if isinstance(statement, ast.Assign):
+            targets = [t.id for t in statement.targets if isinstance(t, ast.Name)]
+            value = statement.value
+        elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+            targets = [statement.target.id]
+            value = statement.value
+        else:
+            continue
+        if "__tablename__" in targets:
+            table = _string(value)
+        elif isinstance(value, ast.Call):
+            call = (_dotted(value.func) or "").rsplit(".", 1)[-1]
+            if call in PY_FIELD_CALLS or call.endswith("Field"):
+                fields.extend(targets)
+
+    is_model = table is not None or bool(base_names & PY_MODEL_BASES and (fields or "Model" in base_names))
+    if "SQLModel" in base_names:
+        is_model = any(k.arg == "table" for k in node.keywords)
+    if not is_model or node.name in PY_MODEL_BASES:
+        return None
+    return {"name": node.name, "base": bases[0] if bases else "", "table": table,
+            "fields": fields[:30], "line": node.lineno}
+
+
+# --------------------------------
+# 🟨 JavaScript / TypeScript (tokenizer)
+# --------------------------------
+JS_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\$]|\\.|\$(?!\{))*`)
+  | (?P<template>`)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<newline>\n)
+  | (?P<punct>[^\s\w])
+""", re.VERBOSE | re.DOTALL)
+
+JS_SERVER_FACTORIES = {"express", "Router", "fastify", "Fastify", "Hono", "Koa", "KoaRouter", "createRouter"}
+
+
+def tokenize_js(text):
+    """[(kind, value, line)] with comments dropped; kind is "name", "string" or "punct".
+    Template literals with ${...} are kept as a single opaque "template" token."""
+    tokens = []
+    line = 1
+    position = 0
+    while True:
+        match = JS_TOKEN.search(text, position)
+        if not match:
+            break
+        kind = match.lastgroup
+        value = match.group()
+        position = match.end()
+        if kind == "template":
+            end = _template_end(text, position)
+            value = text[match.start():end]
+            position = end
+        if kind == "string":
+            tokens.append(("string", value[1:-1], line))
+        elif kind in ("name", "punct", "template"):
+            tokens.append((kind, value, line))
+        line += value.count("\n")
+    return tokens
+
+
+def _template_end(text, position):
+    """Index just past the closing backtick of a template literal starting before `position`."""
+    depth = 0
+    i = position
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "`" and depth == 0:
+            return i + 1
+        if text.startswith("${", i):
+            depth += 1
+            i += 2
+            continue
+        if ch == "}" and depth:
+            depth -= 1
+        i += 1
+    return len(text)
+
+
+def extract_javascript(text, path=""):
+    tokens = tokenize_js(text)
+    facts = {"routes": [], "models": [], "libraries": [], "frameworks": []}
+    servers = set()
+    values = [t[1] for t in tokens]
+
+    def at(i, kind=None, value=None):
+        if i >= len(tokens):
+            return False
+        return (kind is None or tokens[i][0] == kind) and (value is None or tokens[i][1] == value)
+
+    for i, (kind, value, line) in enumerate(tokens):
+        # import x from "module" / import "module" / require("module")
+        if kind == "string" and i and values[i - 1] in ("from", "import") \
+                or kind == "string" and i > 1 and values[i - 1] == "(" and values[i - 2] in ("require", "import"):
+            module = value
+            library = library_for(module)
+            if library:
+                facts["libraries"].append({"library": library, "line": line})
+            framework = WEB_FRAMEWORKS.get(module)
+            if framework and framework not in facts["frameworks"]:
+                facts["frameworks"].append(framework)
+
+        elif kind == "name" and value in ("const", "let", "var") and at(i + 1, "name") and at(i + 2, "punct", "="):
+            # const app = express() / const router = express.Router() / new Hono()
+            j = i + 3
+            if at(j, "name", "new"):
+                j += 1
+            callee = None
+            while at(j, "name"):
+                callee = values[j]
+                if at(j + 1, "punct", "."):
+                    j += 2
+                else:
+                    j += 1
+                    break
+            if callee in JS_SERVER_FACTORIES and at(j, "punct", "("):
+                servers.add(values[i + 1])
+
+    known = servers or ({"app", "router", "server", "api"} if facts["frameworks"] else set())
+    for i, (kind, value, line) in enumerate(tokens):
+        # app.get("/path", ...) / router.route("/path").get(...).post(...)
+        if kind == "name" and value in known and at(i + 1, "punct", ".") and at(i + 2, "name") \
+                and at(i + 3, "punct", "(") and at(i + 4, "string"):
+            method, route = values[i + 2], values[i + 4]
+            if method in HTTP_METHODS or method == "all":
+                facts["routes"].append({"method": method.upper(), "path": route, "handler": None, "line": line})
+            elif method == "route":
+                j = i + 5
+                while j + 2 < len(tokens) and values[j] != ";":
+                    if values[j] == "." and values[j + 1] in HTTP_METHODS and values[j + 2] == "(":
+                        facts["routes"].append({"method": values[j + 1].upper(), "path": route,
+                                                "handler": None, "line": tokens[j][2]})
+                    j += 1
+            elif method == "use" and route.startswith("/") and at(i + 5, "punct", ","):
+                facts["routes"].append({"method": "USE", "path": route, "handler": values[i + 6]
+                                        if at(i + 6, "name") else None, "line": line})
+
+        # mongoose.model("User", schema) / sequelize.define("User", {...})
+        elif kind == "name" and value in ("model", "define") and at(i + 1, "punct", "(") and at(i + 2, "string") \
+                and i and values[i - 1] == "." and at(i + 3, "punct", ","):
+            facts["models"].append({"name": values[i + 2], "base": f"{values[i - 2]}.{value}", "table": None,
+                                    "fields": [], "line": line})
+
+        # @Entity() class User / class User extends Model
+        elif kind == "name" and value == "class" and at(i + 1, "name"):
+            name = values[i + 1]
+            decorated = any(values[k] == "@" and values[k + 1] in ("Entity", "Table", "Schema")
+                            for k in range(max(0, i - 12), i - 1))
+            extends = values[i + 3] if at(i + 2, "name", "extends") and at(i + 3, "name") else None
+            if decorated or extends in ("Model", "BaseEntity"):
+                facts["models"].append({"name": name, "base": extends or "@Entity", "table": None,
+                                        "fields": [], "line": line})
+
+    # Next.js file-system routes: pages/api/**.js and app/**/route.ts exporting GET/POST/...
+    normalized = path.replace(os.sep, "/")
+    stem = re.sub(r"\.(js|jsx|ts|tsx|mjs)$", "", normalized)
+    if "/pages/api/" in normalized:
+        route = "/api/" + stem.split("/pages/api/", 1)[1]
+        facts["routes"].append({"method": "ANY", "path": re.sub(r"/index$", "", route), "handler": "default",
+                                "line": 1})
+    elif stem.endswith("/route") and "/app/" in normalized:
+        route = "/" + stem.split("/app/", 1)[1][: -len("route")].strip("/")
+        for i, (kind, value, line) in enumerate(tokens):
+            if value != "export":
+                continue
+            # export async function GET / export function POST / export const PUT
+            for k in range(i + 1, min(i + 4, len(tokens))):
+                if tokens[k][0] == "name" and values[k].isupper() and values[k].lower() in HTTP_METHODS:
+                    facts["routes"].append({"method": values[k], "path": route, "handler": values[k], "line": line})
+                    break
+
+    return facts
+
+
+def extract_prisma(text):
+    facts = {"routes": [], "models": [], "libraries": [{"library": "@prisma/client", "line": 1}], "frameworks": []}
+    block = None
+    for number, line in enumerate(text.splitlines(), 1):
+        stripped = line.split("//", 1)[0].strip()
+        header = re.match(r"(model|datasource|generator|enum)\s+(\w+)\s*\{", stripped)
+        if header:
+            block = header.group(1)
+            if block == "model":
+                facts["models"].append({"name": header.group(2), "base": "prisma", "table": None,
+                                        "fields": [], "line": number})
+            continue
+        if stripped == "}":
+            block = None
+        elif block == "model" and re.match(r"\w+\s+\w", stripped):
+            facts["models"][-1]["fields"].append(stripped.split()[0])
+        elif block == "datasource":
+            provider = re.match(r'provider\s*=\s*"(\w+)"', stripped)
+            if provider:
+                facts["database"] = provider.group(1)
+    return facts
+
+
+def extract_facts(path, text):
+    """Routes, ORM models, database libraries and web frameworks found in one file."""
+    if path.endswith(PYTHON_EXTENSIONS):
+        try:
+            return extract_python(text)
+        except (SyntaxError, ValueError):
+            return None
+    if path.endswith(JS_EXTENSIONS):
+        return extract_javascript(text, path)
+    if path.endswith(PRISMA_EXTENSIONS):
+        return extract_prisma(text)
+    return None
+
+
+PRISMA_PROVIDERS = {"postgresql": "PostgreSQL", "mysql": "MySQL", "sqlite": "SQLite", "mongodb": "MongoDB",
+                    "sqlserver": "SQL Server", "cockroachdb": "CockroachDB"}
+
+
+class CodeIndex:
+    """
+    Persistent structural index of a repo: HTTP routes, ORM models and
+    database libraries per file, extracted statically (ast for Python, a
+    small tokenizer for JS/TS, line rules for schema.prisma).
+
+    Entries are keyed by content hash, so a rescan only re-parses files
+    whose hash changed.
+    """
+
+    def __init__(self, path=".code_index.json"):
+        self.path = path
+        self.files = {}   # path -> {"hash", "routes", "models", "libraries", "frameworks"[, "database"]}
+        self.dirty = False
+        self.generation = 0   # bumped on every change, lets callers detect stale derived results
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ Ignoring unreadable code index {self.path}")
+            self.files = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.files, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def is_current(self, path, file_hash):
+        entry = self.files.get(path)
+        return entry is not None and entry["hash"] == file_hash
+
+    def update(self, path, file_hash, text):
+        """Re-extract `path` unless its hash is unchanged. Returns True if the entry changed."""
+        if not path.endswith(INDEXED_EXTENSIONS) or self.is_current(path, file_hash):
+            return False
+        facts = extract_facts(path, text) if text is not None else None
+        if not facts or not (facts["routes"] or facts["models"] or facts["libraries"] or facts["frameworks"]):
+            # keep a hash-only entry so unchanged files aren't parsed again
+            facts = {"routes": [], "models": [], "libraries": [], "frameworks": []}
+        self.files[path] = {"hash": file_hash, **facts}
+        self.dirty = True
+        self.generation += 1
+        return True
+
+    def update_scanned(self, scanned):
+        """Scanner callback form of update(): reads the file only if the index needs it."""
+        if scanned.path.endswith(INDEXED_EXTENSIONS) and not self.is_current(scanned.path, scanned.hash):
+            self.update(scanned.path, scanned.hash, scanned.read_text())
+
+    def remove(self, path):
+        if self.files.pop(path, None) is not None:
+            self.dirty = True
+            self.generation += 1
+
+    def prune(self, root, seen):
+        """Forget files under `root` that were not seen by the latest scan."""
+        root = os.path.join(os.path.abspath(root), "")
+        for path in list(self.files):
+            if os.path.abspath(path).startswith(root) and path not in seen:
+                self.remove(path)
+
+    def _collect(self, kind, root=None):
+        root = os.path.join(os.path.abspath(root), "") if root else None
+        for path in sorted(self.files):
+            if root and not os.path.abspath(path).startswith(root):
+                continue
+            for item in self.files[path][kind]:
+                yield path, item
+
+    def routes(self, root=None):
+        """Every route as a dict with method, path, handler, file, line and framework."""
+        return [
+            {**route, "file": path, "framework": ", ".join(self.files[path]["frameworks"]) or None}
+            for path, route in self._collect("routes", root)
+        ]
+
+    def models(self, root=None):
+        return [{**model, "file": path} for path, model in self._collect("models", root)]
+
+    def databases(self, root=None):
+        """{"libraries": {library: [files]}, "databases": [names]} across the index."""
+        libraries = {}
+        databases = []
+        for path, item in self._collect("libraries", root):
+            libraries.setdefault(item["library"], [])
+            if path not in libraries[item["library"]]:
+                libraries[item["library"]].append(path)
+            database = DB_LIBRARIES.get(item["library"], (None, None))[1]
+            if database and database not in databases:
+                databases.append(database)
+        for path, entry in self.files.items():
+            if root and not os.path.abspath(path).startswith(os.path.join(os.path.abspath(root), "")):
+                continue
+            database = PRISMA_PROVIDERS.get(entry.get("database"))
+            if database and database not in databases:
+                databases.append(database)
+        return {"libraries": libraries, "databases": databases}
+
+    # --------------------------------
+    # 📋 Compact listings (LLM input, or the answer itself)
+    # --------------------------------
+    def api_table(self, root=None):
+        """One line per route, or "" when none were found."""
+        lines = []
+        for route in self.routes(root):
+            where = f"{_relative(route['file'], root)}:{route['line']}"
+            handler = f" → {route['handler']}" if route.get("handler") else ""
+            framework = f" [{route['framework']}]" if route.get("framework") else ""
+            lines.append(f"- [{route['method']}] {route['path']}{handler} ({where}){framework}")
+        return "\n".join(lines)
+
+    def database_table(self, root=None):
+        """Databases, ORM/driver libraries and models, or "" when nothing was found."""
+        found = self.databases(root)
+        models = self.models(root)
+        if not (found["libraries"] or models):
+            return ""
+        orms = [lib for lib in found["libraries"] if DB_LIBRARIES.get(lib, ("orm",))[0] == "orm"]
+        drivers = [lib for lib in found["libraries"] if lib not in orms]
+        lines = [
+            f"- Database(s) used: {', '.join(found['databases']) or 'not determinable from imports'}",
+            f"- ORM libraries: {', '.join(orms) or 'none'}",
+            f"- Driver libraries: {', '.join(drivers) or 'none'}",
+        ]
+        if models:
+            lines.append("- Models:")
+            for model in models:
+                table = f" (table {model['table']})" if model.get("table") else ""
+                fields = f": {', '.join(model['fields'][:10])}" if model.get("fields") else ""
+                lines.append(f"  - {model['name']}{table}{fields} "
+                             f"({_relative(model['file'], root)}:{model['line']})")
+        return "\n".join(lines)
+
+
+def _relative(path, root):
+    return os.path.relpath(path, root) if root else path
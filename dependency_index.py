@@ -0,0 +1,618 @@
+# dependency_index.py
+import ast
+import configparser
+import fnmatch
+import json
+import os
+import re
+
+from file_manifest import hash_bytes
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+MANIFEST_NAMES = {
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "pnpm-workspace.yaml",
+    "pyproject.toml", "setup.py", "setup.cfg", "Pipfile", "Pipfile.lock", "poetry.lock",
+    "go.mod", "Cargo.toml", "composer.json", "Gemfile",
+}
+MANIFEST_PATTERNS = ("requirements*.txt", "*requirements.txt")
+
+# Bump when the parsers or the fingerprint table change, to invalidate cached results
+ENGINE_VERSION = 1
+
+FRONTEND = "Frontend framework"
+BACKEND = "Backend framework"
+DATABASE = "Database or APIs"
+INTEGRATIONS = "Payment gateways or integrations"
+BUILD = "Build tools"
+STYLING = "Styling"
+TESTING = "Testing"
+
+# (ecosystem, normalized package name) → (category, label)
+FINGERPRINTS = {
+    ("npm", "react"): (FRONTEND, "React"), ("npm", "next"): (FRONTEND, "Next.js"),
+    ("npm", "vue"): (FRONTEND, "Vue"), ("npm", "nuxt"): (FRONTEND, "Nuxt"),
+    ("npm", "@angular/core"): (FRONTEND, "Angular"), ("npm", "svelte"): (FRONTEND, "Svelte"),
+    ("npm", "@sveltejs/kit"): (FRONTEND, "SvelteKit"), ("npm", "solid-js"): (FRONTEND, "SolidJS"),
+    ("npm", "preact"): (FRONTEND, "Preact"), ("npm", "astro"): (FRONTEND, "Astro"),
+    ("npm", "@remix-run/react"): (FRONTEND, "Remix"), ("npm", "react-native"): (FRONTEND, "React Native"),
+    ("npm", "electron"): (FRONTEND, "Electron"),
+    ("npm", "express"): (BACKEND, "Express"), ("npm", "fastify"): (BACKEND, "Fastify"),
+    ("npm", "koa"): (BACKEND, "Koa"), ("npm", "@nestjs/core"): (BACKEND, "NestJS"),
+    ("npm", "hono"): (BACKEND, "Hono"), ("npm", "@hapi/hapi"): (BACKEND, "hapi"),
+    ("npm", "apollo-server"): (BACKEND, "Apollo Server"), ("npm", "@apollo/server"): (BACKEND, "Apollo Server"),
+    ("npm", "socket.io"): (BACKEND, "Socket.IO"),
+    ("npm", "mongoose"): (DATABASE, "MongoDB (Mongoose)"), ("npm", "mongodb"): (DATABASE, "MongoDB"),
+    ("npm", "pg"): (DATABASE, "PostgreSQL"), ("npm", "postgres"): (DATABASE, "PostgreSQL"),
+    ("npm", "mysql"): (DATABASE, "MySQL"), ("npm", "mysql2"): (DATABASE, "MySQL"),
+    ("npm", "sqlite3"): (DATABASE, "SQLite"), ("npm", "better-sqlite3"): (DATABASE, "SQLite"),
+    ("npm", "prisma"): (DATABASE, "Prisma"), ("npm", "@prisma/client"): (DATABASE, "Prisma"),
+    ("npm", "sequelize"): (DATABASE, "Sequelize"), ("npm", "typeorm"): (DATABASE, "TypeORM"),
+    ("npm", "drizzle-orm"): (DATABASE, "Drizzle ORM"), ("npm", "knex"): (DATABASE, "Knex"),
+    ("npm", "redis"): (DATABASE, "Redis"), ("npm", "ioredis"): (DATABASE, "Redis"),
+    ("npm", "firebase"): (DATABASE, "Firebase"), ("npm", "@supabase/supabase-js"): (DATABASE, "Supabase"),
+    ("npm", "graphql"): (DATABASE, "GraphQL"), ("npm", "axios"): (DATABASE, "HTTP client (axios)"),
+    ("npm", "stripe"): (INTEGRATIONS, "Stripe"), ("npm", "@stripe/stripe-js"): (INTEGRATIONS, "Stripe"),
+    ("npm", "@paypal/checkout-server-sdk"): (INTEGRATIONS, "PayPal"), ("npm", "razorpay"): (INTEGRATIONS, "Razorpay"),
+    ("npm", "twilio"): (INTEGRATIONS, "Twilio"), ("npm", "nodemailer"): (INTEGRATIONS, "Nodemailer"),
+    ("npm", "@sendgrid/mail"): (INTEGRATIONS, "SendGrid"), ("npm", "aws-sdk"): (INTEGRATIONS, "AWS SDK"),
+    ("npm", "openai"): (INTEGRATIONS, "OpenAI"), ("npm", "next-auth"): (INTEGRATIONS, "NextAuth"),
+    ("npm", "passport"): (INTEGRATIONS, "Passport"), ("npm", "jsonwebtoken"): (INTEGRATIONS, "JWT"),
+    ("npm", "vite"): (BUILD, "Vite"), ("npm", "webpack"): (BUILD, "webpack"), ("npm", "esbuild"): (BUILD, "esbuild"),
+    ("npm", "rollup"): (BUILD, "Rollup"), ("npm", "parcel"): (BUILD, "Parcel"), ("npm", "turbo"): (BUILD, "Turborepo"),
+    ("npm", "nx"): (BUILD, "Nx"), ("npm", "lerna"): (BUILD, "Lerna"), ("npm", "@babel/core"): (BUILD, "Babel"),
+    ("npm", "react-scripts"): (BUILD, "Create React App"), ("npm", "typescript"): (BUILD, "TypeScript compiler"),
+    ("npm", "tailwindcss"): (STYLING, "Tailwind CSS"), ("npm", "bootstrap"): (STYLING, "Bootstrap"),
+    ("npm", "sass"): (STYLING, "Sass"), ("npm", "styled-components"): (STYLING, "styled-components"),
+    ("npm", "@mui/material"): (STYLING, "Material UI"), ("npm", "@chakra-ui/react"): (STYLING, "Chakra UI"),
+    ("npm", "jest"): (TESTING, "Jest"), ("npm", "vitest"): (TESTING, "Vitest"), ("npm", "mocha"): (TESTING, "Mocha"),
+    ("npm", "cypress"): (TESTING, "Cypress"), ("npm", "@playwright/test"): (TESTING, "Playwright"),
+
+    ("pypi", "django"): (BACKEND, "Django"), ("pypi", "flask"): (BACKEND, "Flask"),
+    ("pypi", "fastapi"): (BACKEND, "FastAPI"), ("pypi", "starlette"): (BACKEND, "Starlette"),
+    ("pypi", "tornado"): (BACKEND, "Tornado"), ("pypi", "aiohttp"): (BACKEND, "aiohttp"),
+    ("pypi", "sanic"): (BACKEND, "Sanic"), ("pypi", "djangorestframework"): (BACKEND, "Django REST framework"),
+    ("pypi", "celery"): (BACKEND, "Celery"), ("pypi", "streamlit"): (FRONTEND, "Streamlit"),
+    ("pypi", "gradio"): (FRONTEND, "Gradio"), ("pypi", "dash"): (FRONTEND, "Dash"),
+    ("pypi", "sqlalchemy"): (DATABASE, "SQLAlchemy"), ("pypi", "flask-sqlalchemy"): (DATABASE, "SQLAlchemy"),
+    ("pypi", "sqlmodel"): (DATABASE, "SQLModel"), ("pypi", "peewee"): (DATABASE, "Peewee"),
+    ("pypi", "tortoise-orm"): (DATABASE, "Tortoise ORM"), ("pypi", "alembic"): (DATABASE, "Alembic"),
+    ("pypi", "psycopg2"): (DATABASE, "PostgreSQL"), ("pypi", "psycopg2-binary"): (DATABASE, "PostgreSQL"),
+    ("pypi", "psycopg"): (DATABASE, "PostgreSQL"), ("pypi", "asyncpg"): (DATABASE, "PostgreSQL"),
+    ("pypi", "pymysql"): (DATABASE, "MySQL"), ("pypi", "mysqlclient"): (DATABASE, "MySQL"),
+    ("pypi", "mysql-connector-python"): (DATABASE, "MySQL"), ("pypi", "pymongo"): (DATABASE, "MongoDB"),
+    ("pypi", "motor"): (DATABASE, "MongoDB"), ("pypi", "mongoengine"): (DATABASE, "MongoDB"),
+    ("pypi", "redis"): (DATABASE, "Redis"), ("pypi", "elasticsearch"): (DATABASE, "Elasticsearch"),
+    ("pypi", "requests"): (DATABASE, "HTTP client (requests)"), ("pypi", "httpx"): (DATABASE, "HTTP client (httpx)"),
+    ("pypi", "stripe"): (INTEGRATIONS, "Stripe"), ("pypi", "razorpay"): (INTEGRATIONS, "Razorpay"),
+    ("pypi", "paypalrestsdk"): (INTEGRATIONS, "PayPal"), ("pypi", "twilio"): (INTEGRATIONS, "Twilio"),
+    ("pypi", "sendgrid"): (INTEGRATIONS, "SendGrid"), ("pypi", "boto3"): (INTEGRATIONS, "AWS SDK"),
+    ("pypi", "openai"): (INTEGRATIONS, "OpenAI"), ("pypi", "sentence-transformers"): (INTEGRATIONS, "Sentence Transformers"),
+    ("pypi", "torch"): (INTEGRATIONS, "PyTorch"), ("pypi", "transformers"): (INTEGRATIONS, "Hugging Face Transformers"),
+    ("pypi", "setuptools"): (BUILD, "setuptools"), ("pypi", "poetry-core"): (BUILD, "Poetry"),
+    ("pypi", "hatchling"): (BUILD, "Hatch"), ("pypi", "flit-core"): (BUILD, "Flit"),
+    ("pypi", "pytest"): (TESTING, "pytest"), ("pypi", "tox"): (TESTING, "tox"),
+
+    ("go", "github.com/gin-gonic/gin"): (BACKEND, "Gin"), ("go", "github.com/labstack/echo/v4"): (BACKEND, "Echo"),
+    ("go", "github.com/gofiber/fiber/v2"): (BACKEND, "Fiber"), ("go", "gorm.io/gorm"): (DATABASE, "GORM"),
+    ("cargo", "actix-web"): (BACKEND, "Actix Web"), ("cargo", "axum"): (BACKEND, "Axum"),
+    ("cargo", "rocket"): (BACKEND, "Rocket"), ("cargo", "diesel"): (DATABASE, "Diesel"), ("cargo", "sqlx"): (DATABASE, "SQLx"),
+    ("composer", "laravel/framework"): (BACKEND, "Laravel"), ("composer", "symfony/framework-bundle"): (BACKEND, "Symfony"),
+    ("rubygems", "rails"): (BACKEND, "Ruby on Rails"), ("rubygems", "sinatra"): (BACKEND, "Sinatra"),
+}
+
+LANGUAGES = {"npm": "JavaScript", "pypi": "Python", "go": "Go", "cargo": "Rust", "composer": "PHP", "rubygems": "Ruby"}
+
+
+def is_manifest(name):
+    return name in MANIFEST_NAMES or any(fnmatch.fnmatch(name, p) for p in MANIFEST_PATTERNS)
+
+
+def normalize_name(ecosystem, name):
+    """PEP 503 names for Python packages; lower case elsewhere (npm scopes and Go paths kept)."""
+    name = name.strip()
+    if ecosystem == "pypi":
+        return re.sub(r"[-_.]+", "-", name).lower()
+    return name.lower() if ecosystem != "go" else name
+
+
+def version_of(spec):
+    """First concrete version in a specifier ("^18.2.0" → "18.2.0", ">=2.0,<3" → "2.0"), else None."""
+    match = re.search(r"\d+(?:\.\d+)*(?:[-.+]?[A-Za-z0-9.]+)?", spec or "")
+    return match.group(0) if match else None
+
+
+def dependency(ecosystem, name, spec="", dev=False):
+    return {"ecosystem": ecosystem, "name": normalize_name(ecosystem, name), "spec": (spec or "").strip(), "dev": dev}
+
+
+# --------------------------------
+# 📦 Parsers: text → {"dependencies", "resolved", "workspaces", "package"}
+# --------------------------------
+def parse_pep508(requirement, dev=False):
+    """'flask[async]>=2.0; python_version>"3.8"' → dependency dict (None for options / blanks)."""
+    requirement = requirement.split("#", 1)[0].strip()
+    if not requirement or requirement.startswith(("-", "git+", "http:", "https:", "file:", ".")):
+        return None
+    requirement = requirement.split(";", 1)[0].strip()
+    match = re.match(r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)", requirement)
+    if not match:
+        return None
+    spec = match.group(3).strip()
+    if spec.startswith("@"):
+        spec = "@ " + spec[1:].strip()   # direct URL reference
+    return dependency("pypi", match.group(1), spec, dev)
+
+
+def parse_requirements(text, dev=False):
+    return {"dependencies": [d for d in (parse_pep508(line, dev) for line in text.splitlines()) if d]}
+
+
+def parse_package_json(text):
+    data = json.loads(text)
+    deps = []
+    for field, dev in (("dependencies", False), ("devDependencies", True),
+                       ("peerDependencies", False), ("optionalDependencies", False)):
+        for name, spec in (data.get(field) or {}).items():
+            deps.append(dependency("npm", name, str(spec), dev))
+    workspaces = data.get("workspaces") or []
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages") or []
+    return {"dependencies": deps, "workspaces": list(workspaces), "package": data.get("name")}
+
+
+def parse_package_lock(text):
+    data = json.loads(text)
+    resolved = {}
+    for key, info in (data.get("packages") or {}).items():
+        # lockfile v2/v3: "node_modules/a/node_modules/b" → b; only hoisted (top-level) entries count
+        if key.startswith("node_modules/") and "/node_modules/" not in key[len("node_modules/"):] and info.get("version"):
+            resolved[normalize_name("npm", key[len("node_modules/"):])] = info["version"]
+    for name, info in (data.get("dependencies") or {}).items():   # lockfile v1
+        if isinstance(info, dict) and info.get("version"):
+            resolved.setdefault(normalize_name("npm", name), info["version"])
+    return {"resolved": resolved}
+
+
+def parse_yarn_lock(text):
+    """Classic (`version "1.2.3"`) and Berry (`version: 1.2.3`) lockfiles."""
+    resolved = {}
+    names = []
+    for line in text.splitlines():
+        if line and not line[0].isspace() and line.rstrip().endswith(":") and not line.startswith("#"):
+            names = []
+            for selector in line.rstrip(":").split(","):
+                selector = selector.strip().strip('"')
+                name = selector[: selector.index("@", 1)] if "@" in selector[1:] else selector
+                if name and name != "__metadata":
+                    names.append(normalize_name("npm", name))
+        else:
+            match = re.match(r'\s+version:?\s+"?([^"\s]+)"?', line)
+            if match and names:
+                for name in names:
+                    resolved.setdefault(name, match.group(1))
+                names = []
+    return {"resolved": resolved}
+
+
+def parse_pnpm_lock(text):
+    """Versions from the `packages:` keys ("/name@1.2.3", "name@1.2.3" or "/name/1.2.3") — no YAML parser needed."""
+    resolved = {}
+    in_packages = False
+    for line in text.splitlines():
+        if not line.startswith(" "):
+            in_packages = line.startswith("packages:")
+            continue
+        match = re.match(r"  '?/?((?:@[^/@\s]+/)?[^/@\s']+)[@/](\d[^:('\s]*)", line)
+        if in_packages and match:
+            resolved.setdefault(normalize_name("npm", match.group(1)), match.group(2))
+    return {"resolved": resolved}
+
+
+def parse_pnpm_workspace(text):
+    globs = re.findall(r"^\s*-\s*['\"]?([^'\"\n#]+?)['\"]?\s*$", text, re.MULTILINE)
+    return {"workspaces": globs}
+
+
+def _load_toml(text):
+    if tomllib is None:
+        raise ValueError("TOML parsing needs Python 3.11+ or the tomli package")
+    return tomllib.loads(text)
+
+
+def parse_pyproject(text):
+    data = _load_toml(text)
+    project = data.get("project") or {}
+    deps = [parse_pep508(r) for r in project.get("dependencies") or []]
+    for extra, requirements in (project.get("optional-dependencies") or {}).items():
+        deps += [parse_pep508(r, dev=extra in ("dev", "test", "tests", "lint", "docs")) for r in requirements]
+    for group, requirements in (data.get("dependency-groups") or {}).items():
+        deps += [parse_pep508(r, dev=True) for r in requirements if isinstance(r, str)]
+    deps += [parse_pep508(r) for r in (data.get("build-system") or {}).get("requires") or []]
+
+    poetry = (data.get("tool") or {}).get("poetry") or {}
+    tables = [(poetry.get("dependencies") or {}, False), (poetry.get("dev-dependencies") or {}, True)]
+    tables += [((g or {}).get("dependencies") or {}, True) for g in (poetry.get("group") or {}).values()]
+    for table, dev in tables:
+        for name, spec in table.items():
+            if name.lower() != "python":
+                deps.append(dependency("pypi", name, spec if isinstance(spec, str) else (spec or {}).get("version", ""), dev))
+    return {"dependencies": [d for d in deps if d], "package": project.get("name") or poetry.get("name")}
+
+
+def parse_setup_py(text):
+    """install_requires / extras_require / tests_require from the setup() call, resolving
+    module-level list constants (REQUIREMENTS = [...]); the file is parsed, never executed."""
+    tree = ast.parse(text)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            constants[node.targets[0].id] = node.value
+
+    def strings(node):
+        if isinstance(node, ast.Name):
+            node = constants.get(node.id)
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [e.value for e in node.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+        return []
+
+    deps, package = [], None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "id", getattr(node.func, "attr", None)) == "setup":
+            for keyword in node.keywords:
+                if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                    package = keyword.value.value
+                elif keyword.arg in ("install_requires", "setup_requires"):
+                    deps += [parse_pep508(r) for r in strings(keyword.value)]
+                elif keyword.arg == "tests_require":
+                    deps += [parse_pep508(r, dev=True) for r in strings(keyword.value)]
+                elif keyword.arg == "extras_require":
+                    value = constants.get(keyword.value.id) if isinstance(keyword.value, ast.Name) else keyword.value
+                    if isinstance(value, ast.Dict):
+                        for extra in value.values:
+                            deps += [parse_pep508(r, dev=True) for r in strings(extra)]
+    return {"dependencies": [d for d in deps if d], "package": package}
+
+
+def parse_setup_cfg(text):
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_string(text)
+    requirements = config.get("options", "install_requires", fallback="")
+    deps = [parse_pep508(r) for r in requirements.splitlines()]
+    if config.has_section("options.extras_require"):
+        for _, value in config.items("options.extras_require"):
+            deps += [parse_pep508(r, dev=True) for r in value.splitlines()]
+    return {"dependencies": [d for d in deps if d], "package": config.get("metadata", "name", fallback=None)}
+
+
+def parse_pipfile(text):
+    data = _load_toml(text)
+    deps = []
+    for table, dev in (("packages", False), ("dev-packages", True)):
+        for name, spec in (data.get(table) or {}).items():
+            deps.append(dependency("pypi", name, spec if isinstance(spec, str) else (spec or {}).get("version", ""), dev))
+    return {"dependencies": deps}
+
+
+def parse_pipfile_lock(text):
+    data = json.loads(text)
+    resolved = {}
+    for table in ("default", "develop"):
+        for name, info in (data.get(table) or {}).items():
+            resolved[normalize_name("pypi", name)] = (info.get("version") or "").lstrip("=")
+    return {"resolved": resolved}
+
+
+def parse_poetry_lock(text):
+    data = _load_toml(text)
+    return {"resolved": {normalize_name("pypi", p["name"]): p.get("version") for p in data.get("package") or []}}
+
+
+def parse_go_mod(text):
+    deps = []
+    for match in re.finditer(r"^\s*(?:require\s+)?([\w.\-]+\.[\w.\-/]+)\s+(v[\w.\-+]+)", text, re.MULTILINE):
+        deps.append(dependency("go", match.group(1), match.group(2)))
+    package = re.search(r"^module\s+(\S+)", text, re.MULTILINE)
+    return {"dependencies": deps, "package": package.group(1) if package else None}
+
+
+def parse_cargo_toml(text):
+    data = _load_toml(text)
+    deps = []
+    for table, dev in (("dependencies", False), ("dev-dependencies", True), ("build-dependencies", True)):
+        for name, spec in (data.get(table) or {}).items():
+            deps.append(dependency("cargo", name, spec if isinstance(spec, str) else (spec or {}).get("version", ""), dev))
+    members = ((data.get("workspace") or {}).get("members")) or []
+    return {"dependencies": deps, "workspaces": members, "package": (data.get("package") or {}).get("name")}
+
+
+def parse_composer_json(text):
+    data = json.loads(text)
+    deps = []
+    for field, dev in (("require", False), ("require-dev", True)):
+        for name, spec in (data.get(field) or {}).items():
+            if name != "php" and not name.startswith("ext-"):
+                deps.append(dependency("composer", name, spec, dev))
+    return {"dependencies": deps, "package": data.get("name")}
+
+
+def parse_gemfile(text):
+    deps = [dependency("rubygems", m.group(1), m.group(2) or "")
+            for m in re.finditer(r"""^\s*gem\s+['"]([^'"]+)['"](?:\s*,\s*['"]([^'"]+)['"])?""", text, re.MULTILINE)]
+    return {"dependencies": deps}
+
+
+PARSERS = {
+    "package.json": parse_package_json, "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock, "yarn.lock": parse_yarn_lock, "pnpm-lock.yaml": parse_pnpm_lock,
+    "pnpm-workspace.yaml": parse_pnpm_workspace, "pyproject.toml": parse_pyproject, "setup.py": parse_setup_py,
+    "setup.cfg": parse_setup_cfg, "Pipfile": parse_pipfile, "Pipfile.lock": parse_pipfile_lock,
+    "poetry.lock": parse_poetry_lock, "go.mod": parse_go_mod, "Cargo.toml": parse_cargo_toml,
+    "composer.json": parse_composer_json, "Gemfile": parse_gemfile,
+}
+
+
+def parse_manifest(path, text):
+    name = os.path.basename(path)
+    parser = PARSERS.get(name)
+    if parser is None:
+        dev = any(word in name.lower() for word in ("dev", "test", "lint", "doc"))
+        return parse_requirements(text, dev=dev)
+    return parser(text)
+
+
+class DependencyIndex:
+    """
+    Every dependency manifest and lockfile in a repo (nested packages and
+    workspaces included), parsed properly and cached per file hash, plus a
+    tech-stack fingerprint cached per combination of manifest hashes.
+
+    Feed it from the project scan with update_scanned(); a rescan only
+    re-parses manifests whose content changed, and an unchanged repo gets its
+    fingerprint back without re-deriving it. Only the latest fingerprint of
+    each of the `max_roots` most recently fingerprinted roots is kept.
+    """
+
+    def __init__(self, path=".dependency_index.json", max_roots=32):
+        self.path = path
+        self.max_roots = max_roots
+        self.files = {}          # manifest path -> {"hash", "dependencies", "resolved", "workspaces", "package"}
+        self.fingerprints = {}   # combined manifest hash -> fingerprint
+        self.roots = {}          # root -> stack key of its latest fingerprint, least recently used first
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == ENGINE_VERSION:
+                self.files = data.get("files", {})
+                self.fingerprints = data.get("fingerprints", {})
+                self.roots = data.get("roots", {})
+        except (OSError, ValueError, AttributeError):
+            print(f"⚠️ Ignoring unreadable dependency index {self.path}")
+
+    def save(self):
+        if not self.dirty:
+            return
+        self._prune_fingerprints()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": ENGINE_VERSION, "files": self.files, "fingerprints": self.fingerprints,
+                       "roots": self.roots}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def update(self, path, file_hash, text):
+        """Parse `path` unless its hash is unchanged. Returns True if the entry changed."""
+        entry = self.files.get(path)
+        if entry is not None and entry["hash"] == file_hash:
+            return False
+        try:
+            parsed = parse_manifest(path, text or "")
+        except (ValueError, SyntaxError, configparser.Error) as e:
+            print(f"⚠️ Could not parse {path}: {e}")
+            parsed = {}
+        self.files[path] = {
+            "hash": file_hash,
+            "dependencies": parsed.get("dependencies", []),
+            "resolved": parsed.get("resolved", {}),
+            "workspaces": parsed.get("workspaces", []),
+            "package": parsed.get("package"),
+        }
+        self.dirty = True
+        return True
+
+    def update_scanned(self, scanned):
+        """Scanner callback form of update(): reads the file only if it is a new or changed manifest."""
+        if not is_manifest(scanned.name):
+            return
+        entry = self.files.get(scanned.path)
+        if entry is None or entry["hash"] != scanned.hash:
+            self.update(scanned.path, scanned.hash, scanned.read_text())
+
+    def remove(self, path):
+        if self.files.pop(path, None) is not None:
+            self.dirty = True
+
+    def prune(self, root, seen):
+        """Forget manifests under `root` that were not seen by the latest scan."""
+        root = os.path.join(os.path.abspath(root), "")
+        for path in list(self.files):
+            if os.path.abspath(path).startswith(root) and path not in seen:
+                self.remove(path)
+
+    def manifests(self, root):
+        root = os.path.join(os.path.abspath(root), "")
+        return {path: entry for path, entry in sorted(self.files.items()) if os.path.abspath(path).startswith(root)}
+
+    # --------------------------------
+    # 🧮 Merged view
+    # --------------------------------
+    def workspaces(self, root):
+        """{workspace root dir: [member package dirs]} for npm/yarn/pnpm/Cargo workspaces."""
+        manifests = self.manifests(root)
+        package_dirs = sorted({os.path.dirname(p) for p in manifests
+                               if os.path.basename(p) in ("package.json", "Cargo.toml", "pyproject.toml")})
+        result = {}
+        for path, entry in manifests.items():
+            if not entry["workspaces"]:
+                continue
+            base = os.path.dirname(path)
+            members = [
+                d for d in package_dirs
+                if d != base and d.startswith(os.path.join(base, ""))
+                and any(fnmatch.fnmatch(os.path.relpath(d, base).replace(os.sep, "/"), g.rstrip("/"))
+                        for g in entry["workspaces"])
+            ]
+            result.setdefault(base, [])
+            result[base] += [m for m in members if m not in result[base]]
+        return result
+
+    def dependencies(self, root):
+        """
+        One record per (ecosystem, package) across every manifest under `root`:
+        name, ecosystem, spec(s), version (lockfile-resolved when available,
+        else the first version in the spec), dev (only ever a dev dependency)
+        and the manifests declaring it. Packages that are themselves part of
+        the repo (workspace members) are left out.
+        """
+        manifests = self.manifests(root)
+        local_packages = {entry["package"].lower() for entry in manifests.values() if entry.get("package")}
+
+        # A lockfile resolves the manifests in its own directory and below
+        lockfiles = sorted(
+            ((os.path.dirname(path), entry["resolved"]) for path, entry in manifests.items() if entry["resolved"]),
+            key=lambda item: -len(item[0]),
+        )
+
+        merged = {}
+        for path, entry in manifests.items():
+            directory = os.path.dirname(path)
+            for dep in entry["dependencies"]:
+                if dep["name"] in local_packages or dep["spec"].startswith(("workspace:", "file:", "link:")):
+                    continue
+                key = (dep["ecosystem"], dep["name"])
+                record = merged.get(key)
+                if record is None:
+                    record = merged[key] = {"ecosystem": dep["ecosystem"], "name": dep["name"], "specs": [],
+                                            "version": None, "dev": True, "sources": []}
+                if dep["spec"] and dep["spec"] not in record["specs"]:
+                    record["specs"].append(dep["spec"])
+                record["dev"] = record["dev"] and dep["dev"]
+                record["sources"].append(os.path.relpath(path, root))
+                if record["version"] is None:
+                    record["version"] = next(
+                        (resolved[dep["name"]] for lock_dir, resolved in lockfiles
+                         if dep["name"] in resolved and (directory + os.sep).startswith(lock_dir + os.sep)),
+                        None,
+                    )
+        for record in merged.values():
+            if record["version"] is None and record["specs"]:
+                record["version"] = version_of(record["specs"][0])
+        return sorted(merged.values(), key=lambda r: (r["ecosystem"], r["name"]))
+
+    def dependency_names(self, root):
+        """Display form for prompts: "name@version" (dev dependencies marked)."""
+        return [
+            (f"{d['name']}@{d['version']}" if d["version"] else d["name"]) + (" (dev)" if d["dev"] else "")
+            for d in self.dependencies(root)
+        ]
+
+    # --------------------------------
+    # 🧬 Tech-stack fingerprint
+    # --------------------------------
+    def stack_key(self, root):
+        """Content key of the manifests under `root` (changes iff any manifest changes)."""
+        manifests = self.manifests(root)
+        material = "\n".join(f"{os.path.relpath(p, root)}:{e['hash']}" for p, e in manifests.items())
+        return hash_bytes(f"{ENGINE_VERSION}\n{material}".encode("utf-8"))
+
+    def fingerprint(self, root):
+        """
+        {"stack": {category: [labels]}, "languages": [...], "workspaces": n,
+        "manifests": n, "known": bool} for the repo under `root`, cached per
+        stack_key(). `known` means at least one framework was recognised.
+        """
+        key = self.stack_key(root)
+        self._touch(root, key)
+        cached = self.fingerprints.get(key)
+        if cached is not None:
+            return cached
+
+        stack = {}
+        seen = set()
+        languages = []
+        for dep in self.dependencies(root):
+            language = LANGUAGES.get(dep["ecosystem"])
+            if language and language not in languages:
+                languages.append(language)
+            if dep["ecosystem"] == "npm" and dep["name"] == "typescript" and "TypeScript" not in languages:
+                languages.append("TypeScript")
+            hit = FINGERPRINTS.get((dep["ecosystem"], dep["name"]))
+            if hit:
+                category, label = hit
+                if (category, label) in seen:
+                    continue   # e.g. pg and postgres both mean PostgreSQL
+                seen.add((category, label))
+                if dep["version"] and category in (FRONTEND, BACKEND):
+                    label = f"{label} {dep['version']}"
+                stack.setdefault(category, []).append(label)
+
+        result = {
+            "stack": stack,
+            "languages": languages,
+            "workspaces": sum(len(m) for m in self.workspaces(root).values()),
+            "manifests": len(self.manifests(root)),
+            "known": bool(stack.get(FRONTEND) or stack.get(BACKEND)),
+        }
+        self.fingerprints[key] = result
+        self.dirty = True
+        return result
+
+    def _touch(self, root, key):
+        root = os.path.abspath(root)
+        if self.roots.get(root) != key:
+            self.dirty = True
+        self.roots.pop(root, None)
+        self.roots[root] = key
+
+    def _prune_fingerprints(self):
+        """Drop fingerprints of superseded manifest sets and of the least recently used roots."""
+        for root in list(self.roots)[:-self.max_roots or None]:
+            del self.roots[root]
+        live = set(self.roots.values())
+        self.fingerprints = {key: value for key, value in self.fingerprints.items() if key in live}
+
+
+def describe_stack(fingerprint):
+    """The framework analysis answer, in the same layout the model is asked for."""
+    stack = fingerprint["stack"]
+
+    def line(category):
+        return ", ".join(stack.get(category, [])) or "None detected"
+
+    lines = [
+        f"- Backend framework: {line(BACKEND)}",
+        f"- Frontend framework: {line(FRONTEND)}",
+        f"- Database or APIs: {line(DATABASE)}",
+        f"- Payment gateways or integrations: {line(INTEGRATIONS)}",
+        f"- Build tools: {line(BUILD)}",
+        f"- Programming language: {', '.join(fingerprint['languages']) or 'None detected'}",
+    ]
+    if stack.get(STYLING):
+        lines.append(f"- Styling: {line(STYLING)}")
+    if stack.get(TESTING):
+        lines.append(f"- Testing: {line(TESTING)}")
+    if fingerprint.get("workspaces"):
+        lines.append(f"- Monorepo: {fingerprint['workspaces']} workspace package(s) across {fingerprint['manifests']} manifests")
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+# file_generator.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from plan_executor import resolve_in
+
+FENCE = "```"
+
+
+class CodeFenceStripper:
+    """
+    Streaming counterpart of plan_refiner.strip_code_fences: drops an opening
+    ```lang line and the matching closing fence while text is still arriving.
+    feed() returns the text that is safe to write now; a trailing line that
+    might turn out to be the closing fence is held back until finish().
+    """
+
+    def __init__(self):
+        self.started = False   # opening fence decided
+        self.fenced = False
+        self.pending = ""
+
+    def feed(self, chunk):
+        self.pending += chunk
+        if not self.started:
+            head = self.pending.lstrip()
+            if len(head) < len(FENCE) and FENCE.startswith(head):
+                return ""   # could still become a fence
+            if head.startswith(FENCE):
+                if "\n" not in head:
+                    return ""   # wait for the end of the ```lang line
+                self.pending = head.split("\n", 1)[1]
+                self.fenced = True
+            self.started = True
+        return self._flush_lines()
+
+    def _flush_lines(self):
+        lines = self.pending.split("\n")
+        keep = len(lines) - 1   # the partial last line is always held
+        if self.fenced:
+            # hold back trailing blank / fence lines: they may be the closing fence
+            while keep > 0 and lines[keep - 1].strip() in ("", FENCE):
+                keep -= 1
+        ready = "\n".join(lines[:keep])
+        self.pending = "\n".join(lines[keep:])
+        return ready + "\n" if keep else ""
+
+    def finish(self):
+        """Return the held-back tail, minus the closing fence."""
+        if not self.started:
+            self.started = True
+            if self.pending.lstrip().startswith(FENCE):
+                self.pending = ""
+        tail = self.pending.rstrip()
+        if self.fenced and tail.endswith(FENCE):
+            tail = tail[: -len(FENCE)].rstrip()
+        self.pending = ""
+        return tail + "\n" if tail else ""
+
+
+class FileGenerator:
+    """
+    Second phase of two-phase project generation: given a skeleton plan
+    (paths and purposes, no bodies), requests every file's content separately
+    and streams each response straight into its file as tokens arrive.
+
+    Requests run concurrently (up to the client's limit across its hosts) and the
+    model answers with raw file text, so nothing waits for one giant JSON
+    document and file bodies are not JSON-escaped.
+    """
+
+    def __init__(self, client, refiner, workers=None):
+        self.client = client
+        self.refiner = refiner
+        self.workers = workers or client.max_concurrency * len(client.hosts)
+
+    def targets(self, plan):
+        """(action_index, file_index, file) for every file of every write_files action."""
+        return [
+            (ai, fi, file)
+            for ai, step in enumerate(plan.get("actions") or [])
+            if isinstance(step, dict) and step.get("action") == "write_files"
+            for fi, file in enumerate(step.get("files") or [])
+        ]
+
+    def generate(self, user_query, plan, base, on_file=None):
+        """
+        Write every file of `plan` under `base` and fill its `content` into the
+        plan (in place). Returns one result per file: path, status, bytes,
+        first_byte (seconds until the first write) and seconds.
+        `on_file(result)` is called as each file completes.
+        """
+        started = time.perf_counter()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self._stream_file, user_query, plan, file, base, started): (ai, fi, file)
+                for ai, fi, file in self.targets(plan)
+            }
+            for future in as_completed(futures):
+                ai, fi, file = futures[future]
+                result, content = future.result()
+                file["content"] = content
+                results.append(result)
+                if on_file:
+                    on_file(result)
+        return results
+
+    def _stream_file(self, user_query, plan, file, base, started):
+        relative = file.get("path") or ""
+        result = {"path": relative, "status": "ok", "bytes": 0, "first_byte": None}
+        parts = []
+        temp = None
+        try:
+            path = resolve_in(base, relative)
+            prompt = self.refiner.file_prompt(user_query, plan, file)
+            stripper = CodeFenceStripper()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Stream into a sibling temp file; the target only ever holds a complete file
+            temp = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                for token in self.client.stream(prompt):
+                    text = stripper.feed(token)
+                    if text:
+                        if result["first_byte"] is None:
+                            result["first_byte"] = round(time.perf_counter() - started, 3)
+                        f.write(text)
+                        f.flush()
+                        parts.append(text)
+                tail = stripper.finish()
+                f.write(tail)
+                parts.append(tail)
+            os.replace(temp, path)
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+            parts = []
+            # drop the partial temp file; an existing target is left untouched and the
+            # plan keeps empty content, which ProjectManager.generate_project retries
+            if temp and os.path.exists(temp):
+                os.remove(temp)
+
+        content = "".join(parts)
+        result["bytes"] = len(content.encode("utf-8"))
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result, content
@@ -0,0 +1,86 @@
+# file_manifest.py
+import hashlib
+import json
+import os
+
+try:
+    import xxhash  # optional, faster than BLAKE2 for large trees
+except ImportError:
+    xxhash = None
+
+
+def new_hasher():
+    """Fast non-cryptographic hasher (xxh3-128 if installed, else BLAKE2b-128)."""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data):
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def hash_file(path, block_size=1024 * 1024):
+    """Hash a file with streaming reads (constant memory)."""
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class FileManifest:
+    """
+    Persistent record of (size, mtime_ns, inode, content hash) per file.
+    A file whose stat metadata is unchanged keeps its recorded hash without
+    being read; only files whose metadata changed need hashing again.
+    """
+
+    def __init__(self, path=".file_manifest.json"):
+        self.path = path
+        self.files = {}   # path -> [size, mtime_ns, inode, hash]
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ Ignoring unreadable manifest {self.path}")
+            self.files = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.files, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def lookup(self, path, st):
+        """Return the recorded hash if `st` matches the recorded metadata, else None."""
+        record = self.files.get(path)
+        if record and record[0] == st.st_size and record[1] == st.st_mtime_ns and record[2] == st.st_ino:
+            return record[3]
+        return None
+
+    def update(self, path, st, file_hash):
+        self.files[path] = [st.st_size, st.st_mtime_ns, st.st_ino, file_hash]
+        self.dirty = True
+
+    def remove(self, path):
+        if self.files.pop(path, None) is not None:
+            self.dirty = True
+
+    def prune(self, root, seen):
+        """Forget files under `root` that were not seen by the latest scan."""
+        root = os.path.join(os.path.abspath(root), "")
+        for path in list(self.files):
+            if os.path.abspath(path).startswith(root) and path not in seen:
+                self.remove(path)
@@ -0,0 +1,293 @@
+# file_sampler.py
+import ast
+import json
+import math
+import os
+import re
+import subprocess
+
+PYTHON_EXTENSIONS = (".py",)
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+JS_RESOLVE_SUFFIXES = JS_EXTENSIONS + tuple(f"/index{ext}" for ext in JS_EXTENSIONS)
+
+# Files that describe or start an application, by name (root config files rank first)
+ROOT_FILES = ["package.json", "requirements.txt", "setup.py", "pyproject.toml", "index.js", "main.py"]
+ENTRY_POINTS = {
+    "main.py", "app.py", "__main__.py", "manage.py", "wsgi.py", "asgi.py", "server.py", "cli.py",
+    "index.js", "index.ts", "index.jsx", "index.tsx", "main.js", "main.ts", "main.jsx", "main.tsx",
+    "app.js", "app.ts", "App.js", "App.jsx", "App.tsx", "server.js", "server.ts",
+    "_app.js", "_app.tsx", "layout.tsx", "layout.js", "urls.py", "settings.py",
+}
+TEST_PATH = re.compile(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|_test\.py$|\.(test|spec)\.[jt]sx?$")
+
+PY_IMPORT = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import|import\s+([\w.]+(?:\s*,\s*[\w.]+)*))", re.MULTILINE)
+JS_IMPORT = re.compile(r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"]([^'"\n]+)['"]""")
+JS_OUTLINE = re.compile(
+    r"^\s*(?:export\s|module\.exports|(?:async\s+)?function\s|class\s|"
+    r"(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:\(|function|\w+\s*=>)|"
+    r"(?:app|router|server)\.(?:get|post|put|patch|delete|use|route)\s*\()"
+)
+
+SUMMARY_CHARS = 800   # what the analysis prompts keep of each sample
+
+
+# --------------------------------
+# 🔗 Imports
+# --------------------------------
+def extract_imports(path, text):
+    """Raw import specifiers of a Python or JS/TS file (regex only: no parsing, no resolution)."""
+    if path.endswith(PYTHON_EXTENSIONS):
+        imports = []
+        for source, names in PY_IMPORT.findall(text):
+            imports += [source] if source else [n.strip() for n in names.split(",")]
+        return imports
+    if path.endswith(JS_EXTENSIONS):
+        return JS_IMPORT.findall(text)
+    return []
+
+
+class ImportResolver:
+    """Maps import specifiers to project files, for Python modules (any package root) and relative JS paths."""
+
+    def __init__(self, root, paths):
+        self.root = root
+        self.paths = set(paths)
+        self.modules = {}   # dotted suffix -> path, e.g. "pkg.mod" and "mod" for src/pkg/mod.py
+        for path in sorted(paths, key=lambda p: p.count(os.sep)):
+            if not path.endswith(PYTHON_EXTENSIONS):
+                continue
+            parts = os.path.relpath(path, root)[: -len(".py")].split(os.sep)
+            if parts[-1] == "__init__":
+                parts = parts[:-1]
+            for i in range(len(parts)):
+                self.modules.setdefault(".".join(parts[i:]), path)
+
+    def resolve(self, importer, spec):
+        if importer.endswith(PYTHON_EXTENSIONS):
+            if spec.startswith("."):
+                level = len(spec) - len(spec.lstrip("."))
+                base = os.path.relpath(os.path.dirname(importer), self.root).split(os.sep)
+                base = [] if base == ["."] else base
+                base = base[: len(base) - (level - 1)] if level > 1 else base
+                spec = ".".join(base + ([spec.lstrip(".")] if spec.lstrip(".") else []))
+            # "a.b.c" may name a module or an attribute of "a.b"
+            while spec:
+                if spec in self.modules:
+                    return self.modules[spec]
+                spec = spec.rpartition(".")[0]
+            return None
+
+        if not spec.startswith("."):
+            return None   # bare specifier: an npm package
+        target = os.path.normpath(os.path.join(os.path.dirname(importer), spec))
+        if target in self.paths:
+            return target
+        return next((target + suffix for suffix in JS_RESOLVE_SUFFIXES if target + suffix in self.paths), None)
+
+
+# --------------------------------
+# 📝 Outlines
+# --------------------------------
+def summarize(path, text, limit=SUMMARY_CHARS):
+    """
+    Compact outline of a file for prompts: docstring, imports and top-level
+    signatures for Python, exports / functions / routes for JS. Other files
+    (configs, markup) and unparsable code keep their first `limit` characters.
+    """
+    lines = []
+    if path.endswith(PYTHON_EXTENSIONS):
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            doc = ast.get_docstring(tree)
+            if doc:
+                lines.append('"""' + doc.strip().split("\n\n")[0] + '"""')
+            for node in tree.body:
+                if isinstance(node, (ast.Import, ast.ImportFrom)):
+                    lines.append(ast.get_source_segment(text, node) or "")
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    lines += [f"@{ast.get_source_segment(text, d)}" for d in node.decorator_list[:1]]
+                    lines.append(_signature(text, node))
+                    if isinstance(node, ast.ClassDef):
+                        lines += [
+                            "    " + _signature(text, item) for item in node.body
+                            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                        ]
+                elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                    lines.append((ast.get_source_segment(text, node) or "").split("\n")[0])
+    elif path.endswith(JS_EXTENSIONS):
+        lines = [line.rstrip() for line in text.splitlines() if JS_OUTLINE.match(line) or line.lstrip().startswith("import ")]
+
+    outline = "\n".join(line for line in lines if line)
+    if not outline:
+        outline = text
+    return outline[:limit]
+
+
+def _signature(text, node):
+    header = (ast.get_source_segment(text, node) or "").split("\n")[0].rstrip()
+    return header if header.endswith(":") else header + " ..."
+
+
+# --------------------------------
+# 🕒 Git recency
+# --------------------------------
+def git_recency(root, max_commits=300, timeout=5):
+    """
+    {absolute path: 0..1} for files touched by the last `max_commits` commits,
+    1 for the most recently changed. {} when `root` is not a git checkout.
+    """
+    try:
+        output = subprocess.run(
+            ["git", "-C", root, "log", f"-n{max_commits}", "--name-only", "--relative", "--format=%x00"],
+            capture_output=True, text=True, timeout=timeout, check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    commits = output.split("\x00")[1:]
+    recency = {}
+    for i, names in enumerate(commits):
+        for relative in filter(None, names.splitlines()):
+            recency.setdefault(os.path.join(root, relative.replace("/", os.sep)), 1 - i / len(commits))
+    return recency
+
+
+class FileSampler:
+    """
+    Chooses which files represent a project in prompts.
+
+    observe() is called for every scanned file and records only its metadata
+    and import specifiers (taken from text the scan already read, or from the
+    cache for unchanged files). select() then scores every file cheaply —
+    entry point names, import in-degree over the project's import graph, recent
+    git changes, size, depth, tests — and reads only the top-N. Per-file
+    imports and outlines are cached by content hash, so reopening a project
+    reads nothing that has not changed.
+    """
+
+    def __init__(self, path=".file_summaries.json"):
+        self.path = path
+        self.files = {}     # path -> {"hash", "imports", "summary"}
+        self.dirty = False
+        self.observed = {}  # path -> (size, hash), for the current scan
+        self.scores = {}    # path -> score details of the last select()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ Ignoring unreadable summary cache {self.path}")
+            self.files = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.files, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def reset(self):
+        self.observed = {}
+        self.scores = {}
+
+    def _entry(self, path, file_hash):
+        entry = self.files.get(path)
+        if entry is None or entry["hash"] != file_hash:
+            entry = self.files[path] = {"hash": file_hash, "imports": None, "summary": None}
+            self.dirty = True
+        return entry
+
+    def observe(self, scanned):
+        """Scanner callback: remember the file and its imports (no read unless the cache lacks them)."""
+        self.observed[scanned.path] = (scanned.size, scanned.hash)
+        if not scanned.path.endswith(PYTHON_EXTENSIONS + JS_EXTENSIONS):
+            return
+        entry = self._entry(scanned.path, scanned.hash)
+        if entry["imports"] is None:
+            entry["imports"] = extract_imports(scanned.path, scanned.read_text())
+            self.dirty = True
+
+    def prune(self, root, seen):
+        root = os.path.join(os.path.abspath(root), "")
+        for path in list(self.files):
+            if os.path.abspath(path).startswith(root) and path not in seen:
+                del self.files[path]
+                self.dirty = True
+
+    def in_degrees(self, root):
+        """How many project files import each project file."""
+        resolver = ImportResolver(root, self.observed)
+        degrees = {}
+        for path in self.observed:
+            entry = self.files.get(path)
+            targets = {resolver.resolve(path, spec) for spec in (entry or {}).get("imports") or []}
+            for target in targets - {None, path}:
+                degrees[target] = degrees.get(target, 0) + 1
+        return degrees
+
+    def score(self, root, path, size, in_degree, recency, max_size_kb):
+        relative = os.path.relpath(path, root).replace(os.sep, "/")
+        name = os.path.basename(path)
+        details = {"root file": 0.0, "entry": 0.0, "imports": 2.0 * math.log2(1 + in_degree),
+                   "recent": 3.0 * recency, "size": 0.0, "depth": -0.3 * relative.count("/"), "test": 0.0}
+        if relative in ROOT_FILES:
+            details["root file"] = 20.0 - ROOT_FILES.index(relative)
+        elif name in ENTRY_POINTS:
+            details["entry"] = 5.0
+        if size < 200:
+            details["size"] = 0.0 if details["root file"] or details["entry"] else -2.0
+        elif size / 1024 >= max_size_kb:
+            details["size"] = -8.0   # only sampled (truncated) when little else exists
+        elif size <= 50 * 1024:
+            details["size"] = 1.0
+        if TEST_PATH.search(relative):
+            details["test"] = -3.0
+        details["total"] = round(sum(details.values()), 3)
+        return details
+
+    def select(self, root, max_files=20, max_size_kb=150, min_files=5, use_git=True):
+        """
+        The `max_files` best-scoring files as (path, outline) pairs. Oversized
+        files only fill in when fewer than `min_files` others exist. Only the
+        selected files are read, and only if their outline is not cached.
+        """
+        degrees = self.in_degrees(root)
+        recency = git_recency(root) if use_git else {}
+        ranked = []
+        for path, (size, file_hash) in self.observed.items():
+            details = self.score(root, path, size, degrees.get(path, 0), recency.get(path, 0.0), max_size_kb)
+            self.scores[path] = details
+            ranked.append((-details["total"], path))
+        ranked.sort()
+
+        regular = [p for _, p in ranked if self.observed[p][0] / 1024 < max_size_kb]
+        chosen = regular[:max_files]
+        if len(chosen) < min_files:
+            chosen += [p for _, p in ranked if p not in chosen][: min_files - len(chosen)]
+
+        samples = []
+        for path in chosen:
+            size, file_hash = self.observed[path]
+            entry = self._entry(path, file_hash)
+            if entry["summary"] is None:
+                text = _read_head(path, limit=max_size_kb * 1024)
+                entry["summary"] = summarize(path, text)
+                self.dirty = True
+            samples.append((path, entry["summary"]))
+        return samples
+
+
+def _read_head(path, limit):
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read(limit)
+    except OSError:
+        return ""
@@ -1,10 +1,16 @@
 # hierarchical_intent_detector.py
-from sentence_transformers import SentenceTransformer, util
-import torch
+from model_registry import get_model
+from intent_prototypes import PrototypeMatrix
+from keyword_classifier import KeywordIntentClassifier, TierStats
+
+CREATE = r"\b(create|generate|build|scaffold|set ?up|make|start|bootstrap|init(ialize)?)\b"
+# verbs that ask for new code, whatever noun follows ("create a database schema")
+GENERATE = r"\b(create|generate|build|scaffold|set ?up|make|bootstrap|write|add|implement)\b"
 
 class HierarchicalIntentDetector:
-    def __init__(self):
-        self.model = SentenceTransformer("all-mpnet-base-v2")
+    def __init__(self, model_name="all-mpnet-base-v2", fast_threshold=0.75):
+        # shared with IntentDetector through the model registry, loaded on first use
+        self.model_name = model_name
 
         self.intent_hierarchy = {
             "analytics": {
@@ -23,6 +29,11 @@ class HierarchicalIntentDetector:
                     "find what database or orm is used",
                     "detect sql, mysql, mongodb, or sqlalchemy",
                     "which database technology is used"
+                ],
+                "project_report": [
+                    "give me a full report of this project",
+                    "summarize the whole project: stack, apis and database",
+                    "complete overview of frameworks, routes and databases"
                 ]
             },
             "generative": {
@@ -44,22 +55,90 @@ class HierarchicalIntentDetector:
             }
         }
 
-        # store precomputed embeddings
-        self.embeddings = {}
-        for main_intent, sub_intents in self.intent_hierarchy.items():
-            for sub_intent, examples in sub_intents.items():
-                emb = [self.model.encode(e, convert_to_tensor=True) for e in examples]
-                self.embeddings[(main_intent, sub_intent)] = torch.stack(emb).mean(dim=0)
+        # cheap first tier: obvious queries never reach the transformer
+        self.fast_threshold = fast_threshold
+        self.tier_stats = TierStats()
+        self.fast = KeywordIntentClassifier({
+            ("analytics", "framework_analysis"): [
+                (r"\b(framework|tech ?stack|stack|librar(y|ies)|technolog(y|ies)|language)\b", 2),
+                (r"\b(which|what|detect|find|identify)\b", 0.5),
+            ],
+            ("analytics", "api_analysis"): [
+                (r"\b(endpoints?|routes?|http methods?|handlers?)\b", 2),
+                (r"\b(list|find|show|detect)\b.*\bapis?\b", 1),
+            ],
+            ("analytics", "database_analysis"): [
+                (r"\b(database|db|orm|sql|mysql|postgres(ql)?|mongo(db)?|sqlalchemy|prisma|schema)\b", 2),
+            ],
+            ("analytics", "project_report"): [
+                (r"\b(full|complete|whole|overall)\b.*\b(report|overview|summary|analysis)\b", 3),
+            ],
+            ("generative", "project_creation"): [
+                (CREATE + r".*\b(project|app|application|backend|frontend|website|service|api)\b", 3),
+            ],
+            ("generative", "component_generation"): [
+                (r"\b(create|add|generate|build|make)\b.*\b(component|page|modal|form|button|widget|view)\b", 4),
+            ],
+            ("generative", "code_refactor"): [
+                (r"\b(refactor|optimi[sz]e|rewrite|clean ?up|simplify|speed up)\b", 3),
+            ],
+        }, verbs=[
+            (GENERATE, [("generative", sub_intent) for sub_intent in self.intent_hierarchy["generative"]]),
+        ])
+
+        # one prototype per (main_intent, sub_intent), batch-encoded once and cached on disk
+        self.prototypes = PrototypeMatrix(self.model_name, {
+            (main_intent, sub_intent): examples
+            for main_intent, sub_intents in self.intent_hierarchy.items()
+            for sub_intent, examples in sub_intents.items()
+        })
+
+    @property
+    def model(self):
+        return get_model(self.model_name)
 
     def detect_intent(self, query):
-        query_emb = self.model.encode(query, convert_to_tensor=True)
-        scores = {
-            key: float(util.cos_sim(query_emb, emb))
-            for key, emb in self.embeddings.items()
-        }
+        return self.detect_intents([query])[0]
+
+    def detect_intent_with_embedding(self, query):
+        """
+        Like detect_intent(), plus the query embedding when the model tier had to
+        compute one (None when the keyword tier answered).
+        """
+        label, confidence = self.fast.classify(query)
+        if label is not None and confidence >= self.fast_threshold:
+            self.tier_stats.record("keyword")
+            return label[0], label[1], round(confidence, 3), None
+
+        self.tier_stats.record("embedding")
+        vectors = self.prototypes.encode([query])
+        main_intent, sub_intent, confidence = self.classify_embeddings(vectors)[0]
+        return main_intent, sub_intent, confidence, vectors[0]
+
+    def detect_intents(self, queries):
+        """
+        Classify a batch of queries: keyword tier first, then one encode call and
+        one matrix product for the queries it isn't confident about.
+        """
+        results = [None] * len(queries)
+        fallback = []
+        for i, query in enumerate(queries):
+            label, confidence = self.fast.classify(query)
+            if label is not None and confidence >= self.fast_threshold:
+                results[i] = (label[0], label[1], round(confidence, 3))
+            else:
+                fallback.append(i)
+
+        self.tier_stats.record("keyword", len(queries) - len(fallback))
+        if fallback:
+            self.tier_stats.record("embedding", len(fallback))
+            vectors = self.prototypes.encode([queries[i] for i in fallback])
+            for i, result in zip(fallback, self.classify_embeddings(vectors)):
+                results[i] = result
+        return results
 
-        # find best match
-        best_key = max(scores, key=scores.get)
-        main_intent, sub_intent = best_key
-        confidence = round(scores[best_key], 3)
-        return main_intent, sub_intent, confidence
+    def classify_embeddings(self, query_vectors):
+        results = []
+        for (main_intent, sub_intent), confidence in self.prototypes.classify(query_vectors):
+            results.append((main_intent, sub_intent, round(confidence, 3)))
+        return results
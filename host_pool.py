@@ -0,0 +1,234 @@
+# host_pool.py
+import threading
+import time
+
+import requests
+
+
+class NoHostAvailable(RuntimeError):
+    """No configured Ollama host can take the request (all down, open or missing the model)."""
+
+
+class Endpoint:
+    """One Ollama server: in-flight count, circuit breaker state, models and latency."""
+
+    def __init__(self, url, max_concurrency):
+        self.url = url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.models = None        # names from /api/tags; None until the first health check
+        self.missing = set()      # models the server answered 404 for
+        self.healthy = True
+        self.state = "closed"     # "open" after `failure_threshold` consecutive failures
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_inflight = False
+        self.served = 0
+        self.errors = 0
+        self.latency = None       # moving average of request seconds
+
+    def serves(self, model):
+        if model in self.missing:
+            return False
+        if self.models is None:
+            return True
+        return model in self.models or (":" not in model and f"{model}:latest" in self.models)
+
+    def admits(self, now, reset_timeout):
+        """Closed circuits admit requests; an open one admits a single trial once `reset_timeout` has passed."""
+        if self.state == "closed":
+            return True
+        return now - self.opened_at >= reset_timeout and not self.trial_inflight
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "errors": self.errors,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "models": len(self.models) if self.models is not None else None,
+        }
+
+
+class Lease:
+    """A request slot reserved on an endpoint by acquire(); `trial` marks an open circuit's single probe."""
+
+    __slots__ = ("endpoint", "trial")
+
+    def __init__(self, endpoint, trial=False):
+        self.endpoint = endpoint
+        self.trial = trial
+
+    @property
+    def url(self):
+        return self.endpoint.url
+
+
+class HostPool:
+    """
+    Client-side balancer over several Ollama servers.
+
+    acquire() reserves a Lease on, among hosts that are healthy, whose circuit admits
+    requests and that serve the model, the one with the fewest outstanding
+    requests relative to its `max_concurrency` (ties go to the lower latency),
+    and blocks while all of them are at capacity. release(lease) feeds the outcome
+    back: `failure_threshold` consecutive errors open a host's circuit, and
+    after `reset_timeout` seconds one trial request decides whether it closes.
+
+    Endpoints are shared by every pool in the process (like the per-host
+    limits they replace), so a host's `max_concurrency` is the one given by
+    the first pool that registers it; a later pool asking for a different
+    limit gets a warning and the existing one. A pool with more than one host
+    polls /api/tags on its hosts every `health_interval` seconds for liveness
+    and model lists, from a thread started on its first request and stopped
+    by close().
+    """
+
+    _endpoints = {}                     # url -> Endpoint
+    _condition = threading.Condition()  # guards every Endpoint; notified on release
+
+    def __init__(self, hosts, max_concurrency=3, failure_threshold=3, reset_timeout=30,
+                 health_interval=30, health_timeout=2):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._monitor = None
+        self._stopped = threading.Event()
+        with HostPool._condition:
+            self.endpoints = []
+            for url in hosts:
+                url = url.rstrip("/")
+                endpoint = HostPool._endpoints.get(url)
+                if endpoint is None:
+                    endpoint = HostPool._endpoints[url] = Endpoint(url, max_concurrency)
+                elif endpoint.max_concurrency != max_concurrency:
+                    print(f"⚠️ {url} is already limited to {endpoint.max_concurrency} concurrent requests "
+                          f"by another client; ignoring max_concurrency={max_concurrency}")
+                self.endpoints.append(endpoint)
+
+    # --------------------------------
+    # ⚖️ Routing
+    # --------------------------------
+    def acquire(self, model, exclude=(), timeout=None):
+        """Reserve a slot on the best host for `model`, skipping `exclude` (urls) when possible."""
+        self._start_monitor()
+        deadline = time.monotonic() + timeout if timeout else None
+        with HostPool._condition:
+            while True:
+                candidates = self._candidates(model, exclude) or self._candidates(model, ())
+                if not candidates:
+                    raise NoHostAvailable(self._explain(model))
+
+                free = [e for e in candidates if e.outstanding < e.max_concurrency]
+                if free:
+                    endpoint = min(free, key=lambda e: (e.outstanding / e.max_concurrency, e.latency or 0.0))
+                    endpoint.outstanding += 1
+                    trial = endpoint.state == "open"
+                    if trial:
+                        endpoint.trial_inflight = True
+                    return Lease(endpoint, trial)
+
+                wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+                if wait <= 0:
+                    raise NoHostAvailable("Timed out waiting for a free Ollama host")
+                HostPool._condition.wait(wait)
+
+    def _candidates(self, model, exclude):
+        now = time.monotonic()
+        usable = [
+            e for e in self.endpoints
+            if e.url not in exclude and e.serves(model) and e.admits(now, self.reset_timeout)
+        ]
+        # Hosts failing health checks are a last resort
+        return [e for e in usable if e.healthy] or usable
+
+    def _explain(self, model):
+        if not any(e.serves(model) for e in self.endpoints):
+            return f"No Ollama host serves model {model}"
+        return "No healthy Ollama host available (all circuits open)"
+
+    def release(self, lease, outcome, seconds=None):
+        """outcome: "ok", "error" (counts towards the circuit breaker) or "missing" (see mark_missing)."""
+        endpoint = lease.endpoint
+        with HostPool._condition:
+            endpoint.outstanding -= 1
+            if lease.trial:
+                # only the probe itself ends the half-open state; other requests may still be finishing
+                endpoint.trial_inflight = False
+            if outcome == "ok":
+                endpoint.served += 1
+                endpoint.failures = 0
+                endpoint.state = "closed"
+                if seconds is not None:
+                    endpoint.latency = seconds if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * seconds
+            elif outcome == "error":
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.state == "open" or endpoint.failures >= self.failure_threshold:
+                    if endpoint.state != "open":
+                        print(f"⛔ Circuit opened for {endpoint.url} after {endpoint.failures} failures")
+                    endpoint.state = "open"
+                    endpoint.opened_at = time.monotonic()
+            HostPool._condition.notify_all()
+
+    def mark_missing(self, lease, model):
+        with HostPool._condition:
+            lease.endpoint.missing.add(model)
+
+    # --------------------------------
+    # 🩺 Health checks
+    # --------------------------------
+    def check_health(self, session=None):
+        """Probe this pool's hosts' /api/tags now; updates liveness and model lists."""
+        session = session or requests.Session()
+        for endpoint in self.endpoints:
+            try:
+                response = session.get(f"{endpoint.url}/api/tags", timeout=self.health_timeout)
+                response.raise_for_status()
+                models = {m.get("name") for m in response.json().get("models", [])}
+            except (requests.RequestException, ValueError):
+                with HostPool._condition:
+                    if endpoint.healthy:
+                        print(f"🩺 {endpoint.url} failed its health check")
+                    endpoint.healthy = False
+                continue
+
+            with HostPool._condition:
+                endpoint.healthy = True
+                endpoint.models = models
+                endpoint.missing.clear()
+                if endpoint.state == "open":
+                    endpoint.opened_at = 0.0   # reachable again: allow a trial request right away
+                HostPool._condition.notify_all()
+
+    def _start_monitor(self):
+        # A single host has nothing to fail over to: its errors surface on the request itself
+        if self._monitor is not None or not self.health_interval or len(self.endpoints) < 2:
+            return
+        with HostPool._condition:
+            if self._monitor is not None or self._stopped.is_set():
+                return
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True, name="ollama-health")
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        with requests.Session() as session:
+            while not self._stopped.is_set():
+                self.check_health(session)
+                self._stopped.wait(self.health_interval)
+
+    def close(self):
+        """Stop the health monitor (if it was started) and wait for it to exit."""
+        self._stopped.set()
+        monitor, self._monitor = self._monitor, None
+        if monitor is not None:
+            monitor.join(timeout=self.health_timeout + 1)
+
+    def stats(self):
+        with HostPool._condition:
+            return {e.url: e.stats() for e in self.endpoints}
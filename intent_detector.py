@@ -1,11 +1,12 @@
 # intent_detector.py (improved)
-from sentence_transformers import SentenceTransformer, util
-import torch
+from model_registry import get_model
+from intent_prototypes import PrototypeMatrix
+from keyword_classifier import KeywordIntentClassifier, TierStats
 
 class IntentDetector:
-    def __init__(self):
-        # more semantically accurate embedding model
-        self.model = SentenceTransformer("all-mpnet-base-v2")
+    def __init__(self, model_name="all-mpnet-base-v2", fast_threshold=0.75):
+        # more semantically accurate embedding model (shared, loaded on first use)
+        self.model_name = model_name
 
         # few-shot examples for each intent
         self.intents = {
@@ -25,18 +26,51 @@ class IntentDetector:
             ]
         }
 
-        # pre-compute averaged embeddings
-        self.intent_embeddings = {}
-        for name, examples in self.intents.items():
-            emb = [self.model.encode(e, convert_to_tensor=True) for e in examples]
-            self.intent_embeddings[name] = torch.stack(emb).mean(dim=0)
+        # cheap first tier: obvious queries never reach the transformer
+        self.fast_threshold = fast_threshold
+        self.tier_stats = TierStats()
+        self.fast = KeywordIntentClassifier({
+            "analytics": [
+                (r"\b(which|what|find|detect|list|analy[sz]e|identify|show)\b", 1),
+                (r"\b(framework|tech ?stack|librar(y|ies)|dependenc(y|ies)|database|orm|endpoints?|routes?)\b", 2),
+            ],
+            "generative": [
+                (r"\b(create|generate|build|scaffold|set ?up|make|add|write|refactor|implement)\b", 2),
+                (r"\b(new|project|app|application|component|page)\b", 1),
+            ],
+        })
+
+        # averaged example embeddings, batch-encoded once and cached on disk
+        self.prototypes = PrototypeMatrix(self.model_name, self.intents)
+
+    @property
+    def model(self):
+        return get_model(self.model_name)
 
     def detect_intent(self, query):
-        query_emb = self.model.encode(query, convert_to_tensor=True)
-        scores = {
-            name: float(util.cos_sim(query_emb, emb))
-            for name, emb in self.intent_embeddings.items()
-        }
-        best_intent = max(scores, key=scores.get)
-        confidence = scores[best_intent]
-        return best_intent, round(confidence, 3)
+        return self.detect_intents([query])[0]
+
+    def detect_intents(self, queries):
+        """
+        Classify a batch of queries: keyword tier first, then one encode call and
+        one matrix product for the queries it isn't confident about.
+        """
+        results = [None] * len(queries)
+        fallback = []
+        for i, query in enumerate(queries):
+            intent, confidence = self.fast.classify(query)
+            if intent is not None and confidence >= self.fast_threshold:
+                results[i] = (intent, round(confidence, 3))
+            else:
+                fallback.append(i)
+
+        self.tier_stats.record("keyword", len(queries) - len(fallback))
+        if fallback:
+            self.tier_stats.record("embedding", len(fallback))
+            vectors = self.prototypes.encode([queries[i] for i in fallback])
+            for i, result in zip(fallback, self.classify_embeddings(vectors)):
+                results[i] = result
+        return results
+
+    def classify_embeddings(self, query_vectors):
+        return [(intent, round(confidence, 3)) for intent, confidence in self.prototypes.classify(query_vectors)]
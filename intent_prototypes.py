@@ -0,0 +1,76 @@
+# intent_prototypes.py
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from model_registry import get_model
+
+
+class PrototypeMatrix:
+    """
+    One normalized prototype vector per intent label (the mean of its few-shot
+    examples), stacked into a (labels, dim) matrix so a whole batch of queries
+    is scored with a single matrix product.
+
+    Prototypes are encoded in one batch and cached on disk, keyed by the model
+    name and a hash of the example texts, so later runs skip the model entirely
+    until a query needs encoding.
+    """
+
+    def __init__(self, model_name, examples, cache_dir=".intent_cache"):
+        self.model_name = model_name
+        self.labels = list(examples)
+        self.examples = [list(examples[label]) for label in self.labels]
+        self.cache_dir = cache_dir
+        self._matrix = None
+
+    @property
+    def cache_file(self):
+        digest = hashlib.sha256(
+            json.dumps([self.model_name, [str(label) for label in self.labels], self.examples]).encode("utf-8")
+        ).hexdigest()[:16]
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", self.model_name)
+        return os.path.join(self.cache_dir, f"{safe_name}-{digest}.npy")
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            if os.path.exists(self.cache_file):
+                self._matrix = np.load(self.cache_file)
+            else:
+                self._matrix = self._build()
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.save(self.cache_file, self._matrix)
+        return self._matrix
+
+    def _build(self):
+        flat = [example for group in self.examples for example in group]
+        vectors = self.encode(flat)
+
+        prototypes = []
+        offset = 0
+        for group in self.examples:
+            prototypes.append(vectors[offset:offset + len(group)].mean(axis=0))
+            offset += len(group)
+        prototypes = np.stack(prototypes)
+        prototypes /= np.linalg.norm(prototypes, axis=1, keepdims=True)
+        return prototypes.astype(np.float32)
+
+    def encode(self, texts, batch_size=64):
+        """Normalized (len(texts), dim) embeddings in one batched forward pass."""
+        model = get_model(self.model_name)
+        vectors = model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def scores(self, query_vectors):
+        """Cosine scores, shape (queries, labels)."""
+        return np.atleast_2d(query_vectors) @ self.matrix.T
+
+    def classify(self, query_vectors):
+        """Best (label, score) per query vector."""
+        scores = self.scores(query_vectors)
+        best = scores.argmax(axis=1)
+        return [(self.labels[i], float(scores[row, i])) for row, i in enumerate(best)]
@@ -0,0 +1,239 @@
+# json_stream.py
+import json
+import re
+
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def parse_json_response(text, expect_json=False):
+    """Parse a model response that may be fenced (```json) or plain JSON,
+    repairing near-valid JSON (comments, trailing commas, truncation...) if needed.
+    Only text that starts with `{` / `[` is treated as JSON unless `expect_json`
+    is set (the caller constrained the output with a schema), so prose that
+    merely contains brackets is returned unchanged.
+    Returns the parsed object, or the raw text if it isn't JSON at all."""
+    raw = text.strip()
+    text = raw
+
+    if text.startswith("```json"):
+        # Strip the markdown fences
+        text = text.removeprefix("```json").strip()
+        if text.endswith("```"):
+            text = text[: -3].strip()
+
+    looks_like_json = text.startswith(("{", "["))
+    if not (looks_like_json or expect_json):
+        return raw
+
+    try:
+        if looks_like_json:
+            return json.loads(text)
+    except json.JSONDecodeError as e:
+        print("⚠️ Failed to parse JSON, attempting repair:", e)
+
+    if "{" in text or "[" in text:
+        try:
+            return repair_json(text)
+        except (json.JSONDecodeError, ValueError) as e:
+            print("⚠️ JSON repair failed:", e)
+
+    # fallback: return text if not JSON
+    return raw
+
+
+def repair_json(text):
+    """
+    Best-effort parse of near-valid JSON as produced by LLMs: skips any text
+    before the first '{' / '[', drops // and /* */ comments, trailing commas
+    and anything after the document, converts Python literals, escapes raw
+    newlines inside strings, and closes strings/brackets left open by a
+    truncated response. Raises json.JSONDecodeError / ValueError if still invalid.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object or array found")
+    text = text[min(starts):]
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    i = 0
+
+    def drop_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+
+    while i < len(text):
+        ch = text[i]
+
+        if in_string:
+            if escape:
+                escape = False
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ch == "\r":
+                out.append("\\r")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+            continue
+        elif ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end < 0 else end + 2
+            continue
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            drop_trailing_comma()
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                break  # ignore anything after the document
+            i += 1
+            continue
+        elif ch.isalpha():
+            match = re.match(r"[A-Za-z_]+", text[i:])
+            word = match.group(0)
+            out.append(PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+
+        out.append(ch)
+        i += 1
+
+    # Close whatever a truncated response left open
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    if stack:
+        drop_trailing_comma()
+        tail = "".join(out).rstrip()
+        if tail.endswith(":"):
+            out.append(" null")
+        elif stack[-1] == "{" and tail.endswith('"') and re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"$', tail):
+            out.append(": null")  # dangling key
+        for opener in reversed(stack):
+            out.append("}" if opener == "{" else "]")
+
+    return json.loads("".join(out))
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a JSON document chunk by chunk (as tokens stream in) and yields
+    every element of the top-level `array_key` array as soon as it is complete.
+
+    Anything before the first '{' (e.g. a ```json fence) and after the closing
+    '}' is ignored, so fenced and plain responses both work.
+    """
+
+    def __init__(self, array_key="actions"):
+        self.array_key = array_key
+        self.text = ""
+        self._pos = 0
+        self._stack = []          # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = False  # inside the top-level object, next string is a key
+        self._last_key = None
+        self._in_target = False   # currently inside the top-level `array_key` array
+        self._item_start = None
+        self.done = False
+        self.items = []
+
+    def feed(self, chunk):
+        """Add a chunk of text and return the list of newly completed items."""
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._expect_key:
+                        try:
+                            self._last_key = json.loads(text[self._string_start:i + 1])
+                        except json.JSONDecodeError:
+                            self._last_key = None
+                continue
+
+            depth = len(self._stack)
+
+            if depth == 0:
+                # skip fences / preamble until the document starts
+                if ch == "{":
+                    self._stack.append("{")
+                    self._expect_key = True
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if depth == 1 and ch == "[" and self._last_key == self.array_key:
+                    self._in_target = True
+                elif depth == 2 and self._in_target:
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 2 and self._in_target and self._item_start is not None:
+                    item = self._load_item(text[self._item_start:i + 1])
+                    self._item_start = None
+                    if item is not None:
+                        self.items.append(item)
+                        completed.append(item)
+                elif depth == 1 and self._in_target:
+                    self._in_target = False
+                elif depth == 0:
+                    self.done = True
+            elif depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif ch == ":":
+                    self._expect_key = False
+
+        return completed
+
+    def _load_item(self, fragment):
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError as e:
+            print("⚠️ Skipping unparsable streamed item:", e)
+            return None
+
+    def result(self, expect_json=False):
+        """Parse the full buffered document (same rules as a non-streamed response)."""
+        return parse_json_response(self.text, expect_json=expect_json)
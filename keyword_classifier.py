@@ -0,0 +1,69 @@
+# keyword_classifier.py
+import re
+from collections import Counter
+
+
+class KeywordIntentClassifier:
+    """
+    Microsecond-level intent routing from weighted regex rules.
+
+    rules: {label: [(pattern, weight), ...]}. A query's score for a label is the
+    sum of weights of the patterns it matches. Confidence combines how dominant
+    the best label is (share of all matched weight) with how much evidence there
+    is (`full_weight` or more counts as strong), so one weak or ambiguous hit
+    stays below the threshold and falls through to the embedding model.
+
+    verbs: [(pattern, labels), ...], checked before the noun rules. When a query
+    matches a verb pattern but the best label is not one of its `labels` (e.g.
+    "create a database schema" hitting a database-analysis noun), confidence is
+    scaled by `verb_mismatch` so the embedding model decides.
+    """
+
+    def __init__(self, rules, full_weight=2.0, verbs=(), verb_mismatch=0.5):
+        self.full_weight = full_weight
+        self.verbs = [(re.compile(pattern, re.IGNORECASE), set(labels)) for pattern, labels in verbs]
+        self.verb_mismatch = verb_mismatch
+        self.rules = {
+            label: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+            for label, patterns in rules.items()
+        }
+
+    def scores(self, query):
+        scores = Counter()
+        for label, patterns in self.rules.items():
+            for pattern, weight in patterns:
+                if pattern.search(query):
+                    scores[label] += weight
+        return scores
+
+    def classify(self, query):
+        """Return (label, confidence), or (None, 0.0) when no rule matches."""
+        expected = next((labels for pattern, labels in self.verbs if pattern.search(query)), None)
+        scores = self.scores(query)
+        if not scores:
+            return None, 0.0
+
+        label, best = scores.most_common(1)[0]
+        share = best / sum(scores.values())
+        strength = min(1.0, best / self.full_weight)
+        confidence = share * strength
+        if expected is not None and label not in expected:
+            confidence *= self.verb_mismatch
+        return label, confidence
+
+
+class TierStats:
+    """Counts which tier (keyword / embedding) answered each query."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def record(self, tier, n=1):
+        self.counts[tier] += n
+
+    def report(self):
+        total = sum(self.counts.values())
+        return {
+            tier: {"queries": count, "share": round(count / total, 3)}
+            for tier, count in self.counts.items()
+        } if total else {}
@@ -0,0 +1,67 @@
+# model_registry.py
+import os
+import threading
+import time
+
+_models = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _rss_bytes():
+    """Current resident set size of this process (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_model(name):
+    """
+    Return the process-wide SentenceTransformer for `name`, loading it on first use.
+    `sentence_transformers` (and torch) are only imported when a model is actually needed.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            rss_before = _rss_bytes()
+            start = time.time()
+            model = SentenceTransformer(name)
+            load_time = time.time() - start
+
+            try:
+                param_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+            except Exception:
+                param_bytes = None
+
+            _stats[name] = {
+                "load_seconds": round(load_time, 3),
+                "param_bytes": param_bytes,
+                "rss_delta_bytes": _rss_bytes() - rss_before,
+            }
+            _models[name] = model
+            print(f"📦 Loaded model {name} in {load_time:.2f}s")
+    return model
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def model_stats():
+    """Load time and memory per loaded model."""
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def unload(name):
+    with _lock:
+        _models.pop(name, None)
+        _stats.pop(name, None)
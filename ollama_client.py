@@ -1,53 +1,219 @@
 # ollama_client.py
+import asyncio
+import functools
+import random
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from json_stream import parse_json_response
+from response_cache import ResponseCache
+from host_pool import HostPool
 
 class OllamaClient:
-    def __init__(self, model="deepseek-coder:6.7b", host="http://192.168.1.14:11434"):
+    def __init__(self, model="deepseek-coder:6.7b", host="http://192.168.1.14:11434",
+                 pool_size=10, timeout=300, max_concurrency=3, cache=True,
+                 context_window=4096, max_output_tokens=1024,
+                 hosts=None, retries=2, backoff=0.5, health_interval=30):
         self.model = model
-        self.host = host
-
-    def generate(self, prompt, json_response=True):
-        """Send a prompt to Ollama and return clean structured response if it's JSON."""
-        response = requests.post(
-            f"{self.host}/api/generate",
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False
-            },
-        )
+        # Several Ollama servers can share the load: requests go to the least busy one
+        self.hosts = list(hosts) if hosts else [host]
+        self.host = self.hosts[0]
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency   # per host
+        self.retries = retries
+        self.backoff = backoff
+        self.pool = HostPool(self.hosts, max_concurrency=max_concurrency, health_interval=health_interval)
+        self._executor = None
+
+        # Ollama silently truncates prompts beyond num_ctx, so prompts are budgeted against it
+        self.context_window = context_window
+        self.max_output_tokens = max_output_tokens
+
+        # On-disk response cache: True → default location, False/None → disabled
+        self.cache = ResponseCache() if cache is True else (cache or None)
+
+        # One keep-alive session per client: every call reuses pooled TCP connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(pool_size, len(self.hosts)), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def prompt_budget(self):
+        """Tokens available for the prompt once room for the answer is reserved."""
+        return self.context_window - self.max_output_tokens
 
+    def _options(self, options=None):
+        return {"num_ctx": self.context_window, **(options or {})}
+
+    def _payload(self, prompt, stream, options=None, format=None):
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self._options(options)
+        }
+        # "json" or a JSON schema: Ollama constrains decoding to match it
+        if format:
+            payload["format"] = format
+        return payload
+
+    def _cache_key(self, prompt, options, use_cache, format=None):
+        if not (use_cache and self.cache):
+            return None
+        return ResponseCache.make_key(self.model, prompt, self._options(options), format)
+
+    def stream(self, prompt, on_token=None, options=None, use_cache=True, format=None):
+        """
+        Send a prompt with streaming enabled and yield response tokens as Ollama
+        produces them (one NDJSON line per chunk). `on_token` is called for each token.
+        A cached response is replayed as a single token.
+        """
+        key = self._cache_key(prompt, options, use_cache, format)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                yield cached
+                return
+
+        tokens = []
+        lease, response, started = self._post(self._payload(prompt, True, options, format), stream=True)
+        outcome = "error"
         try:
-            data = response.json()
-        except Exception as e:
-            print("❌ Invalid response from Ollama:", e)
-            return response.text.strip()
+            with response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
 
-        text = data.get("response", "").strip()
+                    token = chunk.get("response", "")
+                    if token:
+                        tokens.append(token)
+                        if on_token:
+                            on_token(token)
+                        yield token
 
-        # 🧠 If expecting JSON, check if starts with ```json
-        if json_response:
-            if text.startswith("```json"):
-                # Strip the markdown fences
-                text = text.removeprefix("```json").strip()
-                if text.endswith("```"):
-                    text = text[: -3].strip()
+                    if chunk.get("done"):
+                        break
+            outcome = "ok"
+        except GeneratorExit:
+            outcome = "ok"   # the consumer stopped early; the host is fine
+            raise
+        finally:
+            self.pool.release(lease, outcome, time.perf_counter() - started)
 
-                try:
-                    return json.loads(text)
-                except json.JSONDecodeError as e:
-                    print("⚠️ Failed to parse fenced JSON:", e)
-                    return text
+        if key and tokens:
+            self.cache.put(key, "".join(tokens).strip())
+
+    def generate(self, prompt, json_response=True, stream=False, on_token=None, options=None, use_cache=True,
+                 format=None):
+        """Send a prompt to Ollama and return clean structured response if it's JSON.
+        With `stream=True` (or an `on_token` callback) tokens are consumed as they arrive.
+        `format` ("json" or a JSON schema dict) constrains the output server-side.
+        Pass `use_cache=False` to always hit the model."""
+        if stream or on_token:
+            text = "".join(self.stream(prompt, on_token=on_token, options=options, use_cache=use_cache,
+                                       format=format)).strip()
+        else:
+            key = self._cache_key(prompt, options, use_cache, format)
+            text = self.cache.get(key) if key else None
+
+            if text is None:
+                lease, response, started = self._post(self._payload(prompt, False, options, format), stream=False)
+                self.pool.release(lease, "ok", time.perf_counter() - started)
 
-            elif text.startswith("{") and text.endswith("}"):
-                # Plain valid JSON without fences
                 try:
-                    return json.loads(text)
-                except json.JSONDecodeError as e:
-                    print("⚠️ Failed to parse plain JSON:", e)
-                    return text
+                    data = response.json()
+                except Exception as e:
+                    print("❌ Invalid response from Ollama:", e)
+                    return response.text.strip()
+
+                text = data.get("response", "").strip()
+                if key and text and response.ok:
+                    self.cache.put(key, text)
+
+        # 🧠 If expecting JSON, strip ```json fences / parse plain JSON (repairing near-misses)
+        if json_response or format:
+            return parse_json_response(text, expect_json=bool(format))
 
         # fallback: return text if not JSON
         return text
 
+    def _post(self, payload, stream):
+        """
+        POST /api/generate to the least busy host that serves the model, failing
+        over to another host (with exponential backoff) on connection errors,
+        timeouts and 5xx answers. Returns (lease, response, start time); the
+        caller releases the lease once the body has been read.
+        """
+        tried = set()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            lease = self.pool.acquire(self.model, exclude=tried)
+            started = time.perf_counter()
+            try:
+                response = self.session.post(
+                    f"{lease.url}/api/generate",
+                    json=payload,
+                    stream=stream,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            else:
+                if response.status_code == 404:
+                    # Model not pulled on this host: route elsewhere, no penalty
+                    last_error = RuntimeError(f"{lease.url}: {response.text.strip()}")
+                    response.close()
+                    self.pool.mark_missing(lease, self.model)
+                    self.pool.release(lease, "missing")
+                    tried.add(lease.url)
+                    continue
+                if response.status_code < 500:
+                    return lease, response, started
+                last_error = RuntimeError(f"{lease.url} answered {response.status_code}")
+                response.close()
+
+            self.pool.release(lease, "error")
+            tried.add(lease.url)
+            print(f"⚠️ Ollama request to {lease.url} failed (attempt {attempt + 1}/{self.retries + 1}): {last_error}")
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        raise RuntimeError(f"Ollama request failed after {self.retries + 1} attempts: {last_error}")
+
+    def stats(self):
+        """Per-host routing state: circuit, health, outstanding, served, errors, latency."""
+        return self.pool.stats()
+
+    def close(self):
+        """Stop the host health monitor and release the worker threads and pooled connections."""
+        self.pool.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
+
+    # --------------------------------
+    # ⚡ Async API
+    # --------------------------------
+    async def agenerate(self, prompt, json_response=True, on_token=None, options=None, use_cache=True,
+                        format=None):
+        """
+        Async variant of generate(). Runs the request on a worker thread over the
+        pooled session; the host pool caps in-flight calls at `max_concurrency` per host.
+        """
+        if self._executor is None:
+            # Enough threads to keep every host busy (asyncio's default pool is sized by CPU count)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency * len(self.hosts),
+                                                thread_name_prefix="ollama")
+        call = functools.partial(self.generate, prompt, json_response=json_response, on_token=on_token,
+                                 options=options, use_cache=use_cache, format=format)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
@@ -0,0 +1,341 @@
+# plan_executor.py
+import os
+import re
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Execution phases: an action waits for every action of the earlier phases
+PHASES = ["scaffold", "write", "install", "build", "run"]
+
+SCAFFOLD_COMMAND = re.compile(
+    r"^(npx\s+(create-|degit|@angular/cli\s+new|nest\s+new)|npm\s+(init|create)|yarn\s+create|pnpm\s+create"
+    r"|django-admin\s+startproject|cargo\s+(new|init)|go\s+mod\s+init|git\s+init|mkdir|python3?\s+-m\s+venv|virtualenv"
+    r"|rails\s+new|dotnet\s+new|composer\s+create-project|poetry\s+new)",
+    re.IGNORECASE,
+)
+INSTALL_COMMAND = re.compile(
+    r"^((npm|pnpm)\s+(install|i|ci|add)\b|yarn(\s+(install|add)\b|\s*$)|pip3?\s+install|python3?\s+-m\s+pip\s+install"
+    r"|poetry\s+(install|add)|pipenv\s+install|bundle(\s+install)?\s*$|go\s+(mod\s+tidy|get)|cargo\s+fetch"
+    r"|composer\s+(install|require)|dotnet\s+restore)",
+    re.IGNORECASE,
+)
+RUN_COMMAND = re.compile(
+    r"^((npm|pnpm|yarn)\s+(run\s+)?(start|dev|serve)\b|node\s|nodemon|python3?\s+\S+\.py|python3?\s+-m\s+(flask|uvicorn|http\.server)"
+    r"|flask\s+run|uvicorn|gunicorn|python3?\s+manage\.py\s+runserver|cargo\s+run|go\s+run|rails\s+s(erver)?\b|dotnet\s+run)",
+    re.IGNORECASE,
+)
+
+
+class SandboxError(ValueError):
+    """A plan path resolves outside the sandbox root."""
+
+
+def resolve_in(base, relative_path):
+    """Absolute path of `relative_path` under `base`, refusing anything that escapes it."""
+    if os.path.isabs(relative_path):
+        raise SandboxError(f"Absolute path not allowed: {relative_path}")
+    path = os.path.realpath(os.path.join(base, relative_path))
+    if path != base and not path.startswith(base + os.sep):
+        raise SandboxError(f"Path escapes {base}: {relative_path}")
+    return path
+
+
+def command_phase(command):
+    """Phase of a shell command, judged by its first segment (before any && / ;)."""
+    first = re.split(r"&&|;|\|\|", command.strip(), maxsplit=1)[0].strip()
+    if first.startswith("cd ") and ("&&" in command or ";" in command):
+        # "cd app && npm install" → classify what runs after the cd
+        first = re.split(r"&&|;", command, maxsplit=2)[1].strip()
+    if SCAFFOLD_COMMAND.match(first):
+        return "scaffold"
+    if INSTALL_COMMAND.match(first):
+        return "install"
+    if RUN_COMMAND.match(first):
+        return "run"
+    return "build"
+
+
+def command_tool(command):
+    """Program a command runs (e.g. "npm"); commands using the same tool run one at a time."""
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        words = command.split()
+    for word in words:
+        if word not in ("cd", "&&", ";", "sudo") and "=" not in word and not word.startswith(("./", "/", "..")):
+            return os.path.basename(word).lower()
+    return ""
+
+
+class PlanExecutor:
+    """
+    Runs a plan from ProjectManager.get_project_plan.
+
+    Actions are ordered by a dependency graph rather than executed one by one:
+    each action is assigned a phase (scaffold → write files → install → build
+    → run) and depends on every action of an earlier phase, plus the previous
+    command using the same tool (two `npm install`s never race). Everything
+    else runs concurrently: file contents are written by a thread pool and
+    independent commands run side by side, their output streamed line by line
+    to `on_output(action_index, line)`.
+
+    All paths are confined to `root` (the sandbox): the base directory and
+    every file path must resolve inside it. Commands run with the base
+    directory as cwd, but their own side effects are not confined.
+    With `dry_run=True` nothing is written or run; the report shows what would be.
+
+    Run-phase commands (`npm start`, `flask run`, ...) usually start servers
+    that never exit, so they are started detached instead of awaited: one
+    still running after `startup_wait` seconds is reported as "started" with
+    its pid and the output so far (the rest goes to its log file), and is
+    left running until stop_background().
+    """
+
+    def __init__(self, root=".", dry_run=False, workers=8, max_parallel_commands=4,
+                 command_timeout=600, on_output=None, output_tail=50, startup_wait=5):
+        self.root = os.path.realpath(root)
+        self.dry_run = dry_run
+        self.workers = workers
+        self.max_parallel_commands = max_parallel_commands
+        self.command_timeout = command_timeout
+        self.on_output = on_output or self._print_output
+        self.output_tail = output_tail
+        self.startup_wait = startup_wait
+        self.background = []   # (process, log path) of detached run-phase commands
+        self._print_lock = threading.Lock()
+
+    # --------------------------------
+    # 🗺️ Planning
+    # --------------------------------
+    def resolve(self, base, relative_path):
+        return resolve_in(base, relative_path)
+
+    def action_phase(self, action):
+        kind = action.get("action")
+        if kind == "write_files":
+            return "write"
+        if kind == "run_command" and (action.get("command") or "").strip():
+            return command_phase(action["command"])
+        return None   # analyze / explain: nothing to execute
+
+    def build_graph(self, actions):
+        """{index: set of indices it depends on} for every executable action, and their phases."""
+        phases = {i: self.action_phase(a) for i, a in enumerate(actions)}
+        phases = {i: p for i, p in phases.items() if p}
+        graph = {}
+        last_by_tool = {}
+        for i in sorted(phases):
+            rank = PHASES.index(phases[i])
+            deps = {j for j in phases if PHASES.index(phases[j]) < rank}
+            if actions[i].get("action") == "run_command":
+                tool = command_tool(actions[i]["command"])
+                previous = last_by_tool.get(tool)
+                if previous is not None:
+                    deps.add(previous)
+                last_by_tool[tool] = i
+            graph[i] = deps
+        return graph, phases
+
+    # --------------------------------
+    # ⚙️ Execution
+    # --------------------------------
+    def execute(self, plan):
+        """
+        Execute `plan` and return a report:
+        {"base_directory", "dry_run", "seconds", "ok", "actions": [per-action results]}.
+        Each result has index, action, phase, status (ok / failed / skipped / noop),
+        seconds and details (files written, command, returncode, output tail).
+        """
+        started = time.perf_counter()
+        actions = plan.get("actions") or []
+        base = self.resolve(self.root, plan.get("base_directory") or ".")
+        if not self.dry_run:
+            os.makedirs(base, exist_ok=True)
+
+        graph, phases = self.build_graph(actions)
+        results = {
+            i: {"index": i, "action": a.get("action"), "phase": phases.get(i), "status": "noop",
+                "seconds": 0.0, "message": a.get("message", "")}
+            for i, a in enumerate(actions)
+        }
+
+        with ThreadPoolExecutor(max_workers=self.workers) as file_pool, \
+                ThreadPoolExecutor(max_workers=max(1, self.max_parallel_commands)) as action_pool:
+            pending = dict(graph)
+            running = {}
+            while pending or running:
+                for i in [i for i, deps in pending.items() if not deps & (set(pending) | set(running.values()))]:
+                    del pending[i]
+                    failed = [j for j in graph[i] if results[j]["status"] in ("failed", "skipped")]
+                    if failed:
+                        results[i].update(status="skipped", reason=f"dependency failed: {sorted(failed)}")
+                        continue
+                    future = action_pool.submit(self._run_action, i, actions[i], base, file_pool)
+                    running[future] = i
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    results[i].update(future.result())
+
+        ordered = [results[i] for i in sorted(results)]
+        return {
+            "base_directory": base,
+            "dry_run": self.dry_run,
+            "seconds": round(time.perf_counter() - started, 3),
+            "ok": all(r["status"] in ("ok", "noop", "started") for r in ordered),
+            "actions": ordered,
+        }
+
+    def _run_action(self, index, action, base, file_pool):
+        started = time.perf_counter()
+        try:
+            if action.get("action") == "write_files":
+                result = self._write_files(action.get("files") or [], base, file_pool)
+            elif command_phase(action["command"]) == "run":
+                result = self._start_command(index, action["command"], base)
+            else:
+                result = self._run_command(index, action["command"], base)
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def _write_files(self, files, base, file_pool):
+        # Resolve everything first so a bad path fails the action before anything is written
+        targets = [(self.resolve(base, f.get("path") or ""), f.get("content") or "") for f in files]
+        if self.dry_run:
+            return {"status": "ok", "files": [{"path": p, "bytes": len(c.encode("utf-8")), "written": False}
+                                              for p, c in targets]}
+
+        futures = [file_pool.submit(self._write_file, path, content) for path, content in targets]
+        written = [future.result() for future in futures]
+        return {"status": "ok", "files": written}
+
+    @staticmethod
+    def _write_file(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = content.encode("utf-8")
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        return {"path": path, "bytes": len(data), "written": True}
+
+    def _run_command(self, index, command, base):
+        if self.dry_run:
+            return {"status": "ok", "command": command, "cwd": base, "returncode": None}
+
+        tail = deque(maxlen=self.output_tail)
+        # Own process group: on timeout the shell's children (`cd x && npm test`) are killed with it
+        process = subprocess.Popen(
+            command, shell=True, cwd=base, text=True, bufsize=1, start_new_session=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+        )
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()   # Windows: no process groups to signal
+            except ProcessLookupError:
+                pass
+
+        timer = threading.Timer(self.command_timeout, kill) if self.command_timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        try:
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                tail.append(line)
+                self.on_output(index, line)
+            returncode = process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            process.stdout.close()
+
+        result = {"command": command, "cwd": base, "returncode": returncode, "output": list(tail)}
+        if timed_out.is_set():
+            result.update(status="failed", error=f"timed out after {self.command_timeout}s")
+        else:
+            result["status"] = "ok" if returncode == 0 else "failed"
+        return result
+
+    def _start_command(self, index, command, base):
+        """Start a (probably long-running) run-phase command detached; see the class docstring."""
+        if self.dry_run:
+            return {"status": "ok", "command": command, "cwd": base, "returncode": None}
+
+        log = tempfile.NamedTemporaryFile(prefix=f"plan-run-{index}-", suffix=".log", delete=False)
+        with log:
+            process = subprocess.Popen(
+                command, shell=True, cwd=base, start_new_session=True,
+                stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            )
+        try:
+            returncode = process.wait(timeout=self.startup_wait)
+        except subprocess.TimeoutExpired:
+            returncode = None
+
+        with open(log.name, "r", encoding="utf-8", errors="replace") as f:
+            tail = [line.rstrip("\n") for line in deque(f, maxlen=self.output_tail)]
+        for line in tail:
+            self.on_output(index, line)
+
+        result = {"command": command, "cwd": base, "returncode": returncode, "output": tail}
+        if returncode is None:
+            self.background.append((process, log.name))
+            result.update(status="started", pid=process.pid, log=log.name)
+        else:
+            os.remove(log.name)
+            result["status"] = "ok" if returncode == 0 else "failed"
+        return result
+
+    def stop_background(self):
+        """Stop every detached run-phase command (and its children) this executor started; removes their logs."""
+        for process, log in self.background:
+            if process.poll() is None:
+                try:
+                    if hasattr(os, "killpg"):
+                        os.killpg(process.pid, signal.SIGTERM)
+                    else:
+                        process.terminate()
+                except ProcessLookupError:
+                    pass
+            process.wait()
+            if os.path.exists(log):
+                os.remove(log)
+        self.background = []
+
+    def _print_output(self, index, line):
+        with self._print_lock:
+            print(f"   [{index}] {line}")
+
+
+def describe_execution(report):
+    """Human-readable per-action timing summary of an execute() report."""
+    icons = {"ok": "✅", "failed": "❌", "skipped": "⏭️", "noop": "💬", "started": "🚀"}
+    mode = " (dry run)" if report["dry_run"] else ""
+    lines = [f"🏗️ Executed plan in {report['base_directory']}{mode}: {report['seconds']}s"]
+    for r in report["actions"]:
+        detail = r.get("command") or (f"{len(r['files'])} file(s)" if "files" in r else r.get("message", ""))
+        if r.get("error") or r.get("reason"):
+            detail += f" — {r.get('error') or r.get('reason')}"
+        if r["status"] == "started":
+            detail += f" — running as pid {r['pid']}, log {r['log']}"
+        lines.append(f"  {icons.get(r['status'], '•')} [{r['index']}] {r['action']}"
+                     f"{' / ' + r['phase'] if r['phase'] else ''} {r['seconds']}s: {detail}")
+    return "\n".join(lines)
@@ -1,24 +1,42 @@
 # plan_refiner.py
-import json
+import asyncio
+import copy
+
+from prompt_builder import PromptBuilder, TokenCounter, describe_report
 
 class PlanRefiner:
-    def __init__(self, client):
+    def __init__(self, client, token_counter=None):
         self.client = client
+        self.token_counter = token_counter or TokenCounter()
+        self.issues = []   # what validate_plan still reports for the plan the last refine_plan() returned
+
+    def validate_action(self, action: dict) -> list:
+        """Check a single plan action (usable while the plan is still streaming)."""
+        issues = []
+        if action.get("action") == "write_files":
+            for file in plan_files(action):
+                if not isinstance(file, dict):
+                    issues.append(f"Invalid file entry: {file!r}")
+                elif not file.get("content", ""):
+                    issues.append(f"Empty content in {file.get('path', 'unknown')}")
+        return issues
 
     def validate_plan(self, plan: dict) -> list:
         # print("plan",plan,plan.get("plan"))
+        if not isinstance(plan, dict):
+            return ["Plan is not a JSON object"]
         steps=plan.get("actions")
+        if not isinstance(steps, list):
+            return ["Missing 'actions' list"]
         issues = []
-        
+
         for step in steps:
-            if(step.get("action")=="write_files"):
-                files =step.get("files")
-                print(files)
-                for file in files:
-                    if(not file.get("content","")):
-                        issues.append(f"Empty content in {f.get('path', 'unknown')}")
-                        
-                    
+            if not isinstance(step, dict):
+                issues.append(f"Invalid action: {step!r}")
+                continue
+            issues += self.validate_action(step)
+
+
         # if not plan.get("files"):
         #     issues.append("Missing 'files' key.")
         # for f in plan.get("files", []):
@@ -30,47 +48,130 @@ class PlanRefiner:
         #     issues.append("Missing 'run' commands.")
         return issues
 
-    def refine_plan(self, user_query: str, original_plan_json) -> str:
+    def find_empty_files(self, plan: dict) -> list:
+        """(action_index, file_index, file) for every write_files entry with empty content."""
+        targets = []
+        for ai, step in enumerate(plan.get("actions") or []):
+            if not isinstance(step, dict) or step.get("action") != "write_files":
+                continue
+            for fi, file in enumerate(plan_files(step)):
+                if isinstance(file, dict) and not file.get("content", ""):
+                    targets.append((ai, fi, file))
+        return targets
+
+    def refine_plan(self, user_query: str, original_plan_json, max_rounds=2):
         """
-        Accepts either a JSON string or a Python dict.
-        Uses user query + incomplete plan as context to re-prompt the model
-        and generate a more complete plan.
-        Returns the final corrected JSON string.
+        Fill in only what validate_plan flagged: one small prompt per empty file,
+        issued concurrently, with the results patched into a copy of the plan.
+        Re-validates after each round and stops after `max_rounds`.
+        Returns the patched plan dict; problems refinement cannot fix (malformed
+        actions or file entries) are printed and left in `self.issues`.
         """
-        # ✅ Ensure original_plan is always a dict
-        
-        # print(original_plan.get("plan"))
-        # Now plan is a dictionary — safe to proceed
-        issues = self.validate_plan(original_plan_json)
-        # print(issues)
-        # return
+        issues = self.issues = self.validate_plan(original_plan_json)
         if not issues:
             print("✅ Plan looks complete. No refinement needed.")
             return original_plan_json
 
+        if not isinstance(original_plan_json, dict) or not isinstance(original_plan_json.get("actions"), list):
+            print("❌ Plan could not be parsed; nothing to refine:", issues)
+            return original_plan_json
+
         print("🧩 Refining plan. Found issues:", issues)
+        plan = copy.deepcopy(original_plan_json)
 
-        refine_prompt = f"""
-    The following project setup plan is incomplete.
+        for round_number in range(1, max_rounds + 1):
+            targets = self.find_empty_files(plan)
+            if not targets:
+                break
+
+            print(f"🧠 Round {round_number}: generating {len(targets)} file(s) in parallel...")
+            contents = self._run_generation(user_query, plan, targets)
+
+            for (ai, fi, file), content in zip(targets, contents):
+                if isinstance(content, Exception):
+                    print(f"⚠️ Could not generate {file.get('path', 'unknown')}: {content}")
+                    continue
+                content = strip_code_fences(content)
+                if content:
+                    plan["actions"][ai]["files"][fi]["content"] = content
+
+            issues = self.validate_plan(plan)
+            if not issues:
+                print("✅ Plan complete after refinement.")
+                break
+
+        if issues:
+            print("⚠️ Plan still has issues after refinement:", issues)
+        self.issues = issues
+        return plan
+
+    def _run_generation(self, user_query, plan, targets):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._generate_files(user_query, plan, targets))
+        # Called from inside an event loop (asyncio.run would fail): generate one by one
+        contents = []
+        for _, _, file in targets:
+            try:
+                contents.append(self.client.generate(self.file_prompt(user_query, plan, file), json_response=False))
+            except Exception as e:
+                contents.append(e)
+        return contents
+
+    async def _generate_files(self, user_query, plan, targets):
+        prompts = [self.file_prompt(user_query, plan, file) for _, _, file in targets]
+        return await asyncio.gather(
+            *(self.client.agenerate(prompt, json_response=False) for prompt in prompts),
+            return_exceptions=True,
+        )
+
+    def file_prompt(self, user_query, plan, file):
+        """Prompt for a single file's content, with the rest of the plan as light context."""
+        path = file.get("path", "unknown")
+        language = file.get("language", "")
+        purpose = f"\n    Purpose: {file['purpose']}" if file.get("purpose") else ""
+        other_paths = [
+            f.get("path", "")
+            for step in plan.get("actions") or []
+            for f in plan_files(step)
+            if isinstance(f, dict) and f is not file
+        ]
+
+        builder = PromptBuilder(self.client.prompt_budget, self.token_counter, separator="\n")
+        builder.add("header", f"""
+    You are writing one file of a project the user asked for.
 
     User originally asked:
     "{user_query}"
 
-    The plan generated so far:
-    {json.dumps(original_plan_json, indent=2)}
+    Project folder: {plan.get("base_directory", "")}
+    File to write: {path} ({language}){purpose}
+""", priority=100)
+        builder.add("siblings", "    Other files in the project:\n" + "\n".join(f"    - {p}" for p in other_paths),
+                    priority=50, truncatable=True)
+        builder.add("instructions", f"""
+    Your task:
+    - Write the complete, realistic, runnable content of {path}, consistent with the other files.
+    - Return only the file content: no JSON, no markdown fences, no explanations.
+    """, priority=100)
 
-    Issues detected:
-    {issues}
+        prompt, report = builder.build()
+        print(describe_report(report))
+        return prompt
 
-    Your task:
-    - Fix missing or empty 'content' fields with realistic runnable code relevant to the user's request.
-    - Add any missing 'install' or 'run' commands (like npm start, pip install, etc.).
-    - Keep the same JSON structure.
-    - Return only valid JSON, no extra text.
-    """
 
-        refined_json = self.client.generate(refine_prompt)
-        print("🧠 Refinement requested from model...")
+def plan_files(step):
+    """The `files` list of a plan action, or [] when the model produced something else."""
+    files = step.get("files") if isinstance(step, dict) else None
+    return files if isinstance(files, list) else []
 
-        return refined_json
 
+def strip_code_fences(text):
+    """Remove a surrounding ```lang ... ``` fence if the model added one anyway."""
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        if stripped.rstrip().endswith("```"):
+            stripped = stripped.rstrip()[:-3]
+    return stripped.strip("\n") + "\n" if stripped.strip() else ""
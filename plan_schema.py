@@ -0,0 +1,143 @@
+# plan_schema.py
+PLAN_ACTIONS = ["analyze", "write_files", "run_command", "explain"]
+
+
+def plan_schema(file_fields):
+    """Schema of a plan whose write_files entries carry `file_fields` (all strings, all required)."""
+    return {
+        "type": "object",
+        "properties": {
+            "base_directory": {"type": "string"},
+            "actions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "action": {"type": "string", "enum": PLAN_ACTIONS},
+                        "command": {"type": "string"},
+                        "files": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {field: {"type": "string"} for field in file_fields},
+                                "required": list(file_fields),
+                            },
+                        },
+                        "message": {"type": "string"},
+                    },
+                    "required": ["action", "files", "message"],
+                },
+            },
+        },
+        "required": ["base_directory", "actions"],
+    }
+
+
+# Passed to Ollama as `format`, so the model can only emit plans of this shape
+PLAN_SCHEMA = plan_schema(["path", "language", "content"])
+
+# Phase one of two-phase generation: the plan without file bodies
+SKELETON_SCHEMA = plan_schema(["path", "language", "purpose"])
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def compile_schema(schema):
+    """
+    Turn a JSON schema into a validator function `validate(value) -> [errors]`
+    (empty list when valid). The schema is walked once here, so validating a
+    plan is just a chain of closures. Uses fastjsonschema when installed
+    (it stops at the first error); otherwise supports the subset the plan
+    schema needs: type, enum, properties, required and items.
+    """
+    try:
+        import fastjsonschema
+    except ImportError:
+        return _compile(schema, "$")
+
+    check = fastjsonschema.compile(schema)
+
+    def validate(value):
+        try:
+            check(value)
+            return []
+        except fastjsonschema.JsonSchemaException as e:
+            return [e.message]
+
+    return validate
+
+
+def _compile(schema, where):
+    checks = []
+
+    expected = schema.get("type")
+    if expected:
+        python_type = JSON_TYPES[expected]
+
+        def check_type(value, path):
+            # bool is an int subclass, but not a JSON number
+            if not isinstance(value, python_type) or (isinstance(value, bool) and expected != "boolean"):
+                return [f"{path}: expected {expected}, got {type(value).__name__}"]
+            return []
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path):
+            return [] if value in allowed else [f"{path}: {value!r} is not one of {allowed}"]
+
+        checks.append(check_enum)
+
+    required = schema.get("required", [])
+    properties = {
+        name: _compile(subschema, f"{where}.{name}")
+        for name, subschema in schema.get("properties", {}).items()
+    }
+    if required or properties:
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}: missing '{name}'" for name in required if name not in value]
+            for name, validate in properties.items():
+                if name in value:
+                    errors += validate(value[name], f"{path}.{name}")
+            return errors
+
+        checks.append(check_object)
+
+    if "items" in schema:
+        validate_item = _compile(schema["items"], f"{where}[]")
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            errors = []
+            for i, item in enumerate(value):
+                errors += validate_item(item, f"{path}[{i}]")
+            return errors
+
+        checks.append(check_items)
+
+    def validate(value, path=where):
+        errors = []
+        for check in checks:
+            errors += check(value, path)
+            if errors:
+                break  # a wrong type makes the remaining checks meaningless
+        return errors
+
+    return validate
+
+
+validate_plan_schema = compile_schema(PLAN_SCHEMA)
+validate_skeleton_schema = compile_schema(SKELETON_SCHEMA)
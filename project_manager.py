@@ -1,9 +1,17 @@
 # project_manager.py
 import os
 import json
+import time
 from ollama_client import OllamaClient
 from plan_refiner import PlanRefiner
-import json
+from json_stream import IncrementalJSONParser
+from plan_schema import PLAN_SCHEMA, SKELETON_SCHEMA, validate_plan_schema, validate_skeleton_schema
+from plan_executor import PlanExecutor, describe_execution
+from file_generator import FileGenerator
+from project_scanner import ProjectScanner
+from file_manifest import FileManifest
+from dependency_index import DependencyIndex
+from file_sampler import FileSampler, ROOT_FILES
 
 class ProjectManager:
     def __init__(self):
@@ -12,178 +20,231 @@ class ProjectManager:
         self.project_path = None
         self.file_samples = []
         self.dependencies = []
-
-    def open_project(self, folder_path):
+        self.stack = None      # tech-stack fingerprint from the dependency manifests
+        self.file_index = {}   # path -> (size, mtime_ns, hash) from the last scan
+        self.manifest = FileManifest()
+        self.dependency_index = DependencyIndex()
+        self.sampler = FileSampler()
+        self.scanner = ProjectScanner(manifest=self.manifest)
+
+    def open_project(self, folder_path, on_file=None):
         if not os.path.isdir(folder_path):
             raise ValueError("Invalid folder path")
         self.project_path = folder_path
-        self.index_project()
+        self.index_project(on_file=on_file)
 
-    def index_project(self, max_files=20, max_size_kb=150):
+    def index_project(self, max_files=20, max_size_kb=150, on_file=None):
         """
         Scan the project directory to gather relevant code and configuration files.
         Includes dependency detection for better AI context.
+        The tree is walked once and each changed file read once (unchanged files
+        are recognised from the manifest by stat alone); `on_file(scanned)` is
+        called for every scanned file so other indexes can reuse the same read.
+        Samples are the `max_files` most important files (see FileSampler), as
+        cached outlines rather than raw heads.
         """
         self.file_samples = []
         self.dependencies = []
-
-        # Extract dependencies first
-        self.dependencies = self.extract_dependencies()
-
-        # Define which folders to skip
-        ignored_dirs = ["node_modules", ".git", "__pycache__", "venv", "env"]
-
-        # Prioritize key config files
-        priority_files = [
-            "package.json",
-            "requirements.txt",
-            "setup.py",
-            "pyproject.toml",
-            "index.js",
-            "main.py",
-        ]
-
-        for pf in priority_files:
-            path = os.path.join(self.project_path, pf)
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                self.file_samples.append((path, content))
-
-        # Then collect source code samples
-        for root, _, files in os.walk(self.project_path):
-            # Skip ignored folders
-            if any(ignored in root for ignored in ignored_dirs):
-                continue
-
-            for file in files:
-                if file.endswith((".py", ".js", ".ts", ".html", ".css", ".jsx", ".tsx")):
-                    file_path = os.path.join(root, file)
-                    size_kb = os.path.getsize(file_path) / 1024
-                    if size_kb < max_size_kb:
-                        try:
-                            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                                code = f.read()
-                            self.file_samples.append((file_path, code))
-                        except Exception:
-                            continue
-
-                if len(self.file_samples) >= max_files:
-                    break
-
-        # Fallback: if too few files, sample a few more to guarantee context
-        if len(self.file_samples) < 5:
-            for root, _, files in os.walk(self.project_path):
-                if any(ignored in root for ignored in ignored_dirs):
-                    continue
-                for file in files:
-                    if file.endswith((".py", ".js", ".ts", ".jsx", ".tsx")):
-                        path = os.path.join(root, file)
-                        try:
-                            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                                code = f.read()
-                            self.file_samples.append((path, code[:2000]))
-                        except Exception:
-                            continue
-                    if len(self.file_samples) >= 10:
-                        break
+        self.file_index = {}
+        self.sampler.reset()
+        root = os.path.normpath(self.project_path)
+
+        for scanned in self.scanner.scan(self.project_path):
+            self.file_index[scanned.path] = (scanned.size, scanned.mtime_ns, scanned.hash)
+            # Every manifest / lockfile, nested ones included; re-parsed only when changed
+            self.dependency_index.update_scanned(scanned)
+            if on_file:
+                on_file(scanned)
+
+            # nested config files are indexed, not sampled
+            if scanned.name.endswith(self.scanner.extensions) or (
+                scanned.name in ROOT_FILES and os.path.dirname(scanned.path) == root
+            ):
+                self.sampler.observe(scanned)
+
+        self.manifest.prune(self.project_path, self.file_index)
+        self.manifest.save()
+        self.dependency_index.prune(self.project_path, self.file_index)
+        self.refresh_dependencies()
+
+        self.file_samples = self.sampler.select(self.project_path, max_files=max_files, max_size_kb=max_size_kb)
+        self.sampler.prune(self.project_path, self.file_index)
+        self.sampler.save()
 
     def extract_dependencies(self):
         """
-        Reads known dependency files (package.json, requirements.txt, setup.py)
-        and returns a list of dependency names.
+        Dependencies declared by every manifest in the project (package.json,
+        requirements*.txt, pyproject.toml, setup.py/cfg, Pipfile, go.mod, ...),
+        as "name@version" strings with versions resolved from lockfiles.
         """
-        deps = []
-        pkg = os.path.join(self.project_path, "package.json")
-        req = os.path.join(self.project_path, "requirements.txt")
-        setup = os.path.join(self.project_path, "setup.py")
-
-        # Extract from package.json
-        if os.path.exists(pkg):
-            try:
-                with open(pkg, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                deps += list(data.get("dependencies", {}).keys())
-                deps += list(data.get("devDependencies", {}).keys())
-            except Exception:
-                pass
-
-        # Extract from requirements.txt
-        if os.path.exists(req):
-            try:
-                with open(req, "r", encoding="utf-8") as f:
-                    deps += [
-                        line.strip()
-                        for line in f
-                        if line.strip() and not line.startswith("#")
-                    ]
-            except Exception:
-                pass
-
-        # Extract from setup.py (very rough, string-based)
-        if os.path.exists(setup):
-            try:
-                with open(setup, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if "install_requires" in line or "'" in line or '"' in line:
-                            deps.append(line.strip())
-            except Exception:
-                pass
-
-        return deps
-
-    def get_project_plan(self, user_query):
+        return self.dependency_index.dependency_names(self.project_path)
+
+    def refresh_dependencies(self):
+        """Recompute dependencies and the stack fingerprint after manifests changed."""
+        self.dependencies = self.extract_dependencies()
+        self.stack = self.dependency_index.fingerprint(self.project_path)
+        self.dependency_index.save()
+
+    def get_project_plan(self, user_query, stream=True, on_token=None, max_attempts=2):
+        # The JSON shape is enforced by PLAN_SCHEMA (Ollama `format`), so the prompt only covers semantics
         planning_prompt = f"""
 You are an expert project setup assistant.
-Understand the user's request and return a structured JSON plan describing what actions to perform.
+Understand the user's request and return a JSON plan describing what actions to perform.
 
 User request:
 "{user_query}"
 
-Follow these formatting rules strictly:
-
-1. The JSON must be a single object (no outer keys like "plan" or "steps").
-
-2. Use **exactly** these top-level keys:
-   {{
-     "base_directory": "string",                 // folder name where files and commands will be executed.
-                                                 // If the user explicitly mentions a folder, use that name.
-                                                 // Otherwise, automatically generate a short, meaningful name
-                                                 // based on the project type (e.g., "react-project", "flask-api").
-     "actions": [
-       {{
-         "action": "string",                     // one of ["analyze", "write_files", "run_command", "explain"]
-         "command": "string (if applicable)",    // required if action = "run_command"
-         "files": [                              // required if action = "write_files", else []
-            {{
-              "path": "string (relative to base_directory)",
-              "language": "string",
-              "content": "string"
-            }}
-         ],
-         "message": "string"                     // short explanation of this action
-       }}
-     ]
-   }}
-
-3. Always return all keys, even if arrays are empty (e.g., "files": []).
+Rules:
+1. "base_directory" is the folder where files and commands will be executed.
+   If the user explicitly mentions a folder, use that name; otherwise pick a short,
+   meaningful name based on the project type (e.g., "react-project", "flask-api").
+2. Each action is one of "analyze", "write_files", "run_command", "explain".
+   "command" is required for run_command; "files" lists the files for write_files and is [] otherwise.
+   "message" is a short explanation of the action.
+3. All file paths must be relative to "base_directory".
+4. Write complete, realistic file contents.
+"""
 
-4. Do not include markdown, code fences, or text outside JSON.
+        json_plan = self._request_plan(planning_prompt, PLAN_SCHEMA, validate_plan_schema,
+                                       stream=stream, on_token=on_token, max_attempts=max_attempts)
 
-5. If unsure about the folder name, make a reasonable assumption based on the project type.
+        #sometime model return empty content and files so we need refiner
+        response=self.refiner.refine_plan(user_query, json_plan)
+        return response
 
-6. All file paths must be relative to the "base_directory".
+    def _request_plan(self, prompt, schema, validate, stream=True, on_token=None, max_attempts=2):
+        """
+        Ask for a plan constrained to `schema`. Near-valid JSON is repaired
+        locally; the model is only re-prompted (with the schema errors) when the
+        repaired plan still fails `validate`.
+        """
+        json_plan = None
+        request = prompt
+        for attempt in range(1, max_attempts + 1):
+            # Only the first attempt may be served from the response cache
+            use_cache = attempt == 1
+            if stream:
+                # Validate each action as soon as the model finishes emitting it
+                parser = IncrementalJSONParser(array_key="actions")
+                for token in self.client.stream(request, on_token=on_token, use_cache=use_cache, format=schema):
+                    for action in parser.feed(token):
+                        issues = self.refiner.validate_action(action) if schema is PLAN_SCHEMA else []
+                        label = action.get("action", "unknown")
+                        if issues:
+                            print(f"⚠️ Streamed action '{label}' has issues: {issues}")
+                        else:
+                            print(f"✅ Streamed action '{label}' looks complete.")
+                json_plan = parser.result(expect_json=True)   # tolerant: repairs near-valid JSON
+            else:
+                json_plan = self.client.generate(request, use_cache=use_cache, format=schema)
+
+            errors = validate(json_plan)
+            if not errors:
+                break
+
+            print(f"⚠️ Plan does not match the schema (attempt {attempt}/{max_attempts}): {errors[:5]}")
+            request = prompt + "\nYour previous answer was rejected:\n" + "\n".join(
+                f"- {error}" for error in errors[:10]
+            )
+        return json_plan
+
+    def get_skeleton_plan(self, user_query, stream=True, on_token=None, max_attempts=2):
+        """Phase one of two-phase generation: the plan with each file's path and purpose, no bodies."""
+        skeleton_prompt = f"""
+You are an expert project setup assistant.
+Understand the user's request and return a JSON plan skeleton describing what actions to perform.
 
-7. Output valid JSON that can be parsed directly.
+User request:
+"{user_query}"
 
-Return only JSON, no markdown or commentary.
+Rules:
+1. "base_directory" is the folder where files and commands will be executed.
+   If the user explicitly mentions a folder, use that name; otherwise pick a short,
+   meaningful name based on the project type (e.g., "react-project", "flask-api").
+2. Each action is one of "analyze", "write_files", "run_command", "explain".
+   "command" is required for run_command; "files" lists the files for write_files and is [] otherwise.
+   "message" is a short explanation of the action.
+3. All file paths must be relative to "base_directory".
+4. Do NOT write file contents. For each file give a one-sentence "purpose"
+   (what it contains and how it relates to the other files); contents are generated separately.
 """
+        return self._request_plan(skeleton_prompt, SKELETON_SCHEMA, validate_skeleton_schema,
+                                  stream=stream, on_token=on_token, max_attempts=max_attempts)
 
-
-        json_plan = self.client.generate(planning_prompt)
-        # print(json_plan)
-        # return
-        
-        #sometime model return empty content and files so we need refiner
-        response=self.refiner.refine_plan(user_query, json_plan)
-        return response
\ No newline at end of file
+    def generate_project(self, user_query, root=None, run_commands=False, on_file=None, on_token=None):
+        """
+        Two-phase generation: a cheap skeleton plan first, then every file's
+        content requested concurrently and streamed straight into its file
+        under `root`/base_directory (default root: current directory).
+        With `run_commands`, scaffold commands run before the files are
+        written and the remaining commands after. Returns the plan with the
+        generated contents filled in.
+        """
+        plan = self.get_skeleton_plan(user_query, on_token=on_token)
+        if validate_skeleton_schema(plan):
+            print("❌ Could not get a valid plan skeleton.")
+            return plan
+
+        executor = PlanExecutor(root or os.getcwd())
+        base = executor.resolve(executor.root, plan.get("base_directory") or ".")
+        os.makedirs(base, exist_ok=True)
+        commands = [a for a in plan["actions"] if a.get("action") == "run_command"]
+        scaffold = [a for a in commands if executor.action_phase(a) == "scaffold"]
+        if run_commands and scaffold:
+            self.execute_plan({**plan, "actions": scaffold}, root=executor.root)
+
+        generator = FileGenerator(self.client, self.refiner)
+        started = time.perf_counter()
+        print(f"🧱 Generating {len(generator.targets(plan))} file(s) into {base}...")
+
+        def report_file(result):
+            status = "✅" if result["status"] == "ok" else "❌"
+            print(f"{status} {result['path']}: {result['bytes']} bytes, first byte {result['first_byte']}s,"
+                  f" done {result['seconds']}s{' — ' + result['error'] if result.get('error') else ''}")
+            if on_file:
+                on_file(result)
+
+        results = generator.generate(user_query, plan, base, on_file=report_file)
+        failed = [r["path"] for r in results if r["status"] != "ok"]
+        if failed:
+            plan = self._retry_files(user_query, plan, executor, failed)
+        print(f"🧱 Files written in {time.perf_counter() - started:.2f}s")
+
+        if run_commands:
+            rest = [a for a in commands if executor.action_phase(a) != "scaffold"]
+            if rest:
+                self.execute_plan({**plan, "actions": rest}, root=executor.root)
+        return plan
+
+    def _retry_files(self, user_query, plan, executor, failed):
+        """
+        Fill files whose stream failed (left empty in the plan) with the
+        refiner's non-streaming requests and write them. Returns the patched
+        plan; files that still have no content are reported.
+        """
+        print(f"🔁 Retrying {len(failed)} file(s) that failed to stream: {', '.join(failed)}")
+        plan = self.refiner.refine_plan(user_query, plan, max_rounds=1)
+        retried, missing = [], []
+        for step in plan.get("actions") or []:
+            if not isinstance(step, dict) or step.get("action") != "write_files":
+                continue
+            for file in step.get("files") or []:
+                if not isinstance(file, dict) or file.get("path") not in failed:
+                    continue
+                (retried if file.get("content") else missing).append(file)
+        if retried:
+            executor.execute({"base_directory": plan.get("base_directory"),
+                              "actions": [{"action": "write_files", "files": retried}]})
+        if missing:
+            print(f"⚠️ Still no content for: {', '.join(f['path'] for f in missing)}")
+        return plan
+
+    def execute_plan(self, plan, root=None, dry_run=False, **executor_options):
+        """
+        Write the plan's files and run its commands under `root` (the sandbox,
+        default: current directory). Returns the executor report.
+        """
+        executor = PlanExecutor(root or os.getcwd(), dry_run=dry_run, **executor_options)
+        report = executor.execute(plan)
+        print(describe_execution(report))
+        return report
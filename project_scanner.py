@@ -0,0 +1,152 @@
+# project_scanner.py
+import fnmatch
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dependency_index import MANIFEST_NAMES, MANIFEST_PATTERNS
+from file_manifest import hash_bytes
+
+# Directory names pruned from every walk
+IGNORED_DIRS = {
+    "node_modules", ".git", "__pycache__", "venv", "env", ".venv",
+    "dist", ".next", ".mypy_cache", ".pytest_cache", ".tox",
+}
+
+SOURCE_EXTENSIONS = (".py", ".js", ".ts", ".jsx", ".tsx", ".mjs", ".cjs", ".prisma", ".html", ".css")
+
+# Config / manifest files worth reading wherever they appear (dependency manifests and lockfiles)
+CONFIG_FILES = MANIFEST_NAMES
+CONFIG_PATTERNS = MANIFEST_PATTERNS
+
+
+class ScannedFile:
+    """
+    One file from a scan: stat metadata, content hash and decoded text.
+    `text` is None when the file was not read (unchanged per the manifest);
+    call read_text() to load it on demand.
+    """
+
+    __slots__ = ("path", "name", "size", "mtime", "mtime_ns", "hash", "text")
+
+    def __init__(self, path, size, mtime_ns, file_hash=None, text=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.mtime = mtime_ns / 1e9
+        self.hash = file_hash
+        self.text = text
+
+    def read_text(self):
+        if self.text is None:
+            try:
+                with open(self.path, "r", encoding="utf-8", errors="ignore") as f:
+                    self.text = f.read()
+            except OSError:
+                self.text = ""
+        return self.text
+
+
+class ProjectScanner:
+    """
+    Walks a project once with os.scandir (pruning ignored directories by name)
+    and reads every matching file at most once on a thread pool. Each file's
+    bytes produce both its content hash and its text, so samples, change
+    detection and embedding jobs can all be fed from the same read.
+
+    With a FileManifest, files whose size/mtime/inode are unchanged are not
+    read at all: their recorded hash is reused.
+    """
+
+    def __init__(self, ignored_dirs=None, extensions=SOURCE_EXTENSIONS, extra_names=CONFIG_FILES,
+                 workers=8, manifest=None, extra_patterns=CONFIG_PATTERNS):
+        self.ignored_dirs = set(IGNORED_DIRS if ignored_dirs is None else ignored_dirs)
+        self.extensions = tuple(extensions)
+        self.extra_names = set(extra_names)
+        self.extra_patterns = tuple(extra_patterns)
+        self.workers = workers
+        self.manifest = manifest
+
+    def walk(self, root):
+        """Yield (path, stat) for every matching file under `root`."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.ignored_dirs:
+                            subdirs.append(entry.path)
+                    elif entry.is_file() and self.matches(entry.name):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+            # depth-first, in name order
+            stack.extend(reversed(subdirs))
+
+    def matches(self, name):
+        return (
+            name.endswith(self.extensions)
+            or name in self.extra_names
+            or any(fnmatch.fnmatch(name, pattern) for pattern in self.extra_patterns)
+        )
+
+    def scan(self, root):
+        """Yield a ScannedFile for every matching file, in walk order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            window = deque()
+            for path, st in self.walk(root):
+                known = self.manifest.lookup(path, st) if self.manifest else None
+                if known is not None:
+                    # stat fast path: unchanged file, no read, no hashing
+                    done = Future()
+                    done.set_result(ScannedFile(path, st.st_size, st.st_mtime_ns, file_hash=known))
+                    window.append(done)
+                else:
+                    window.append(pool.submit(self.read_and_record, path, st))
+                # bound the number of files held in memory at once
+                if len(window) >= self.workers * 4:
+                    result = window.popleft().result()
+                    if result is not None:
+                        yield result
+            while window:
+                result = window.popleft().result()
+                if result is not None:
+                    yield result
+
+    def read_and_record(self, path, st=None):
+        """read() and, with a manifest, record the file's new metadata and hash."""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        scanned = self.read(path, st)
+        if scanned is not None and self.manifest is not None:
+            self.manifest.update(path, st, scanned.hash)
+        return scanned
+
+    @staticmethod
+    def read(path, st=None):
+        """Read a file once, returning its hash and decoded text (None if unreadable)."""
+        try:
+            st = st or os.stat(path)
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return ScannedFile(
+            path,
+            st.st_size,
+            st.st_mtime_ns,
+            file_hash=hash_bytes(data),
+            text=data.decode("utf-8", errors="ignore"),
+        )
@@ -0,0 +1,291 @@
+# project_watcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from project_scanner import ProjectScanner
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """Recursive inotify watch (Linux). Calls `on_change(paths)`, or `on_change(None)` on queue overflow."""
+
+    name = "inotify"
+
+    def __init__(self, root, on_change, scanner):
+        self.root = root
+        self.on_change = on_change
+        self.scanner = scanner
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}   # wd -> directory
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _add_tree(self, directory):
+        """Watch `directory` and every non-ignored subdirectory; returns files already inside."""
+        found = set()
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                continue
+            self.watches[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.scanner.ignored_dirs:
+                                stack.append(entry.path)
+                        else:
+                            found.add(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def start(self):
+        self._add_tree(self.root)
+        self._thread = threading.Thread(target=self._run, name="inotify-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        os.close(self.fd)
+
+    def _run(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+
+            changed = set()
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + EVENT_HEADER.size: offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.on_change(None)
+                    changed.clear()
+                    break
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                name = os.fsdecode(raw_name.rstrip(b"\0"))
+                path = os.path.join(directory, name) if name else directory
+
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and name not in self.scanner.ignored_dirs:
+                        # new directory: watch it and pick up anything written before the watch existed
+                        changed |= self._add_tree(path)
+                    elif mask & IN_MOVED_FROM:
+                        self.on_change(None)  # a whole subtree left; let the index rescan
+                else:
+                    changed.add(path)
+
+            if changed:
+                self.on_change(changed)
+
+
+class PollingBackend:
+    """Portable fallback: compares stat snapshots of the tree every `interval` seconds."""
+
+    name = "polling"
+
+    def __init__(self, root, on_change, scanner, interval=2.0):
+        self.root = root
+        self.on_change = on_change
+        self.scanner = scanner
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = {}
+
+    def _take_snapshot(self):
+        return {
+            path: (st.st_size, st.st_mtime_ns, st.st_ino)
+            for path, st in self.scanner.walk(self.root)
+        }
+
+    def start(self):
+        self._snapshot = self._take_snapshot()
+        self._thread = threading.Thread(target=self._run, name="polling-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._take_snapshot()
+            changed = {p for p, meta in current.items() if self._snapshot.get(p) != meta}
+            changed |= self._snapshot.keys() - current.keys()
+            self._snapshot = current
+            if changed:
+                self.on_change(changed)
+
+
+class ProjectWatcher:
+    """
+    Keeps an index live while files change. Events from the backend are
+    debounced (`debounce` seconds of quiet) and handed in batches to
+    `apply_changes(paths)` on a background worker; `apply_changes(None)`
+    requests a full incremental rescan.
+    """
+
+    def __init__(self, root, apply_changes, scanner=None, debounce=0.5, poll_interval=None):
+        self.root = root
+        self.apply_changes = apply_changes
+        self.scanner = scanner or ProjectScanner()
+        self.debounce = debounce
+
+        self.backend = self._create_backend(poll_interval)
+        self._cond = threading.Condition()
+        self._pending = set()
+        self._rescan = False
+        self._busy = False
+        self._stop = False
+        self._worker = None
+
+        self.last_event = None
+        self.last_update = None
+        self.batches = 0
+
+    def _create_backend(self, poll_interval):
+        if poll_interval is None and sys.platform.startswith("linux"):
+            try:
+                return InotifyBackend(self.root, self._on_change, self.scanner)
+            except (OSError, AttributeError) as e:
+                print(f"⚠️ inotify unavailable ({e}), falling back to polling")
+        return PollingBackend(self.root, self._on_change, self.scanner, interval=poll_interval or 2.0)
+
+    # --------------------------------
+    # ▶️ Lifecycle
+    # --------------------------------
+    def start(self):
+        self.backend.start()
+        self._worker = threading.Thread(target=self._run, name="index-updater", daemon=True)
+        self._worker.start()
+        print(f"👀 Watching {self.root} ({self.backend.name})")
+
+    def stop(self):
+        self.backend.stop()
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._worker:
+            self._worker.join(timeout=5)
+
+    # --------------------------------
+    # 📨 Events
+    # --------------------------------
+    def _relevant(self, path):
+        name = os.path.basename(path)
+        if not self.scanner.matches(name):
+            return False
+        rel = os.path.relpath(path, self.root)
+        return not any(part in self.scanner.ignored_dirs for part in rel.split(os.sep)[:-1])
+
+    def _on_change(self, paths):
+        with self._cond:
+            if paths is None:
+                self._rescan = True
+            else:
+                paths = {p for p in paths if self._relevant(p)}
+                if not paths:
+                    return
+                self._pending |= paths
+            self.last_event = time.time()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._pending or self._rescan or self._stop):
+                    self._cond.wait()
+                if self._stop:
+                    return
+
+                # debounce: wait until no new events arrived for `debounce` seconds
+                while not self._stop:
+                    quiet = time.time() - self.last_event
+                    if quiet >= self.debounce:
+                        break
+                    self._cond.wait(self.debounce - quiet)
+
+                batch = None if self._rescan else sorted(self._pending)
+                self._pending = set()
+                self._rescan = False
+                self._busy = True
+
+            try:
+                self.apply_changes(batch)
+            except Exception as e:
+                print(f"⚠️ Index update failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self.batches += 1
+                    self.last_update = time.time()
+                    self._cond.notify_all()
+
+    # --------------------------------
+    # 🕒 Freshness
+    # --------------------------------
+    @property
+    def is_fresh(self):
+        return not (self._pending or self._rescan or self._busy)
+
+    def wait_until_fresh(self, timeout=None):
+        """Block until every change seen so far has been applied. Returns True if fresh."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.is_fresh or self._stop, timeout=timeout) and self.is_fresh
+
+    def freshness(self):
+        with self._cond:
+            return {
+                "backend": self.backend.name,
+                "fresh": self.is_fresh,
+                "pending_files": len(self._pending),
+                "rescan_pending": self._rescan,
+                "last_event": self.last_event,
+                "last_update": self.last_update,
+                "batches_applied": self.batches,
+            }
@@ -0,0 +1,134 @@
+# prompt_builder.py
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(text):
+    """
+    Fast tokenizer-free estimate: one token per punctuation mark and roughly
+    one per 4 characters of each word (close to BPE counts for code and English).
+    A linear scan, deliberately uncached: memoizing it would keep every file,
+    snippet and truncation prefix counted alive for the life of the process.
+    """
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in TOKEN_PATTERN.findall(text))
+
+
+class TokenCounter:
+    """
+    Counts tokens with a pluggable tokenizer: a callable returning a count, or
+    any object with `encode(text)` (tiktoken, HF tokenizers...). Falls back to
+    approx_token_count when none is given.
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    @classmethod
+    def from_pretrained(cls, name):
+        """Use a Hugging Face tokenizer if `transformers` is installed, else the estimate."""
+        try:
+            from transformers import AutoTokenizer
+            return cls(AutoTokenizer.from_pretrained(name))
+        except Exception as e:
+            print(f"⚠️ Tokenizer {name} unavailable ({e}); using approximate token counts.")
+            return cls()
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return approx_token_count(text)
+        if callable(self.tokenizer) and not hasattr(self.tokenizer, "encode"):
+            return self.tokenizer(text)
+        return len(self.tokenizer.encode(text))
+
+
+class PromptBuilder:
+    """
+    Packs prompt sections by priority under a token budget.
+
+    Sections are admitted highest priority first; a truncatable section that
+    doesn't fit is cut (at a line boundary) to the space left, others are
+    dropped. The prompt keeps the order sections were added in, and build()
+    reports what was included, truncated and dropped.
+    """
+
+    def __init__(self, budget, counter=None, separator="\n\n"):
+        self.budget = budget
+        self.counter = counter or TokenCounter()
+        self.separator = separator
+        self.sections = []
+
+    def add(self, name, text, priority=0, truncatable=False):
+        if text and text.strip():
+            self.sections.append({
+                "name": name,
+                "text": text,
+                "priority": priority,
+                "truncatable": truncatable,
+                "order": len(self.sections),
+            })
+        return self
+
+    def build(self):
+        """Return (prompt, report)."""
+        separator_cost = self.counter.count(self.separator)
+        remaining = self.budget
+        chosen = []
+        report = {"budget": self.budget, "used": 0, "included": [], "truncated": [], "dropped": []}
+
+        for section in sorted(self.sections, key=lambda s: (-s["priority"], s["order"])):
+            cost = self.counter.count(section["text"]) + (separator_cost if chosen else 0)
+            if cost <= remaining:
+                chosen.append((section["order"], section["text"]))
+                report["included"].append(section["name"])
+                remaining -= cost
+                continue
+
+            if section["truncatable"]:
+                text = self._truncate(section["text"], remaining - separator_cost)
+                if text:
+                    chosen.append((section["order"], text))
+                    report["truncated"].append(section["name"])
+                    remaining -= self.counter.count(text) + separator_cost
+                    continue
+
+            report["dropped"].append(section["name"])
+
+        report["used"] = self.budget - remaining
+        prompt = self.separator.join(text for _, text in sorted(chosen))
+        return prompt, report
+
+    def _truncate(self, text, budget):
+        """Longest line-prefix of `text` within `budget` tokens (binary search).
+        A single line that is too long on its own is cut by characters instead."""
+        if budget <= 0:
+            return ""
+        lines = text.splitlines()
+        kept = self._longest_prefix(lines, budget, "\n")
+        if kept or not lines:
+            return "\n".join(lines[:kept])
+        first = lines[0]
+        return first[:self._longest_prefix(first, budget, "")]
+
+    def _longest_prefix(self, parts, budget, joiner):
+        low, high = 0, len(parts)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.counter.count(joiner.join(parts[:mid])) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+
+def describe_report(report):
+    """One-line summary of a build() report for logging."""
+    line = f"📏 Prompt: {report['used']}/{report['budget']} tokens"
+    if report["truncated"]:
+        line += f", truncated {len(report['truncated'])}"
+    if report["dropped"]:
+        line += f", dropped {len(report['dropped'])} ({', '.join(report['dropped'][:5])}{'…' if len(report['dropped']) > 5 else ''})"
+    return line
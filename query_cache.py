@@ -0,0 +1,129 @@
+# query_cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def normalize_query(query):
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query."""
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.strip(" ?!.")
+
+
+class QueryCache:
+    """
+    LRU cache of answers keyed on (normalized query, index version, intent).
+    Lookups can also match a semantically near-duplicate query when its
+    embedding is given (cosine >= `similarity_threshold`, same index version
+    and same intent, so "find security issues" never returns the answer to
+    "find performance issues"). `similarity_threshold=None` disables that.
+
+    A lookup without an intent matches the exact query under any intent: the
+    same text always detects the same intent, so repeats skip detection.
+    """
+
+    def __init__(self, max_entries=256, similarity_threshold=0.95, ttl=3600):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.entries = OrderedDict()   # (normalized, version, intent) -> (result, embedding, created)
+        self._by_query = {}            # (normalized, version) -> latest key for it
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def semantic(self):
+        return self.similarity_threshold is not None
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, query, version, intent=None, embedding=None):
+        normalized = normalize_query(query)
+        with self._lock:
+            key = (normalized, version, intent) if intent is not None else self._by_query.get((normalized, version))
+            item = self.entries.get(key)
+            if item is not None and not self._expired(item[2]):
+                self.entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return item[0]
+
+            if embedding is not None and intent is not None and self.semantic:
+                match = self._nearest(embedding, version, intent)
+                if match is not None:
+                    self.entries.move_to_end(match)
+                    self.hits["semantic"] += 1
+                    return self.entries[match][0]
+
+            self.misses += 1
+            return None
+
+    def _nearest(self, embedding, version, intent):
+        keys, vectors = [], []
+        for key, (_, vector, created) in self.entries.items():
+            if key[1:] == (version, intent) and vector is not None and not self._expired(created):
+                keys.append(key)
+                vectors.append(vector)
+        if not keys:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = np.stack(vectors) @ query
+        best = int(scores.argmax())
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def put(self, query, version, result, intent=None, embedding=None):
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32).ravel()
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        normalized = normalize_query(query)
+        key = (normalized, version, intent)
+        with self._lock:
+            self.entries[key] = (result, embedding, time.time())
+            self.entries.move_to_end(key)
+            self._by_query[(normalized, version)] = key
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                if self._by_query.get(evicted[:2]) == evicted:
+                    del self._by_query[evicted[:2]]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self.entries), "hits": dict(self.hits), "misses": self.misses}
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn`."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
@@ -0,0 +1,278 @@
+# repo_summarizer.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chunker import chunk_text
+from file_manifest import hash_bytes
+from prompt_builder import PromptBuilder, TokenCounter
+
+# Bump when the prompts change, to invalidate cached summaries
+SUMMARY_VERSION = 1
+
+FILE_PROMPT = """Summarize this source file for a developer who needs to understand the repository.
+In 2-4 sentences: its purpose, its main classes, functions or routes, the frameworks and
+libraries it uses, and how it connects to the rest of the code. Do not quote code.
+
+File: {label}
+
+{text}
+"""
+
+PARTS_PROMPT = """Below are summaries of consecutive parts of the source file `{label}`.
+Combine them into one 2-4 sentence summary of the file: its purpose, its main classes,
+functions or routes, the frameworks and libraries it uses.
+
+{text}
+"""
+
+DIRECTORY_PROMPT = """Below are summaries of the files and subdirectories of `{label}`.
+In 3-5 sentences, summarize what this part of the repository does as a whole: its
+responsibility, key modules, frameworks, APIs and data stores. Do not list every file.
+
+{text}
+"""
+
+REPO_PROMPT = """Below are summaries of the top-level parts of a software repository.
+Describe the whole repository in one paragraph of at most 8 sentences: its purpose,
+architecture and main components, languages and frameworks, APIs and data stores.
+
+{text}
+"""
+
+
+def node_key(*parts):
+    return hash_bytes("\x00".join(str(p) for p in (SUMMARY_VERSION,) + parts).encode("utf-8"))
+
+
+class RepoSummarizer:
+    """
+    Hierarchical (map-reduce) summary of a whole repository.
+
+    Map: every source file is summarized on its own; a file too large for one
+    prompt is split at function/class boundaries into parts that are
+    summarized separately and then combined. Reduce: each directory is
+    summarized from its children's summaries, deepest directories first,
+    up to the repository root. Calls at the same level run concurrently.
+
+    Every node is cached under a key derived from content only (file hash for
+    leaves, the children's keys for directories), so after an edit just the
+    changed file and the directories above it are summarized again.
+    Directories with a single child reuse that child's summary without a call.
+    Call and cache-hit counts are kept per summarize() call, so concurrent
+    calls (say, for two projects) don't mix them up.
+    """
+
+    def __init__(self, client, path=".repo_summaries.json", counter=None, workers=None, summary_tokens=200):
+        self.client = client
+        self.path = path
+        self.counter = counter or TokenCounter()
+        self.workers = workers or client.max_concurrency * len(client.hosts)
+        self.summary_tokens = summary_tokens
+        self.roots = {}      # absolute root -> {node key: summary}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.roots = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️ Ignoring unreadable summary cache {self.path}")
+            self.roots = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.roots, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    @property
+    def part_tokens(self):
+        """Tokens of content per prompt, leaving room for the instructions."""
+        return max(256, self.client.prompt_budget - 200)
+
+    # --------------------------------
+    # 🤖 Model calls (cached per node)
+    # --------------------------------
+    def _cached(self, nodes, used, stats, key, prompt):
+        used.add(key)
+        summary = nodes.get(key)
+        if summary is not None:
+            with self._lock:
+                stats["cached"] += 1
+            return summary
+        summary = self.client.generate(prompt, json_response=False, options={"num_predict": self.summary_tokens})
+        summary = str(summary).strip()
+        with self._lock:
+            stats["calls"] += 1
+            nodes[key] = summary
+            self.dirty = True
+        return summary
+
+    def _reduce(self, nodes, used, stats, template, label, parts, key):
+        """
+        Summarize `parts` ([(name, summary)]) with `template`. When they don't
+        fit one prompt, consecutive batches are summarized first (each cached
+        by its own content) and the batch summaries reduced in turn.
+        """
+        entries = [f"## {name}\n{summary}" for name, summary in parts]
+        batches, batch, size = [], [], 0
+        for entry in entries:
+            tokens = self.counter.count(entry)
+            if batch and size + tokens > self.part_tokens:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(entry)
+            size += tokens
+        batches.append(batch)
+
+        if len(batches) > 1:
+            parts = [
+                (f"{label} (part {i + 1})",
+                 self._cached(nodes, used, stats, node_key("batch", label, *batch),
+                              DIRECTORY_PROMPT.format(label=label, text="\n\n".join(batch))))
+                for i, batch in enumerate(batches)
+            ]
+            return self._reduce(nodes, used, stats, template, label, parts, key)
+        return self._cached(nodes, used, stats, key, template.format(label=label, text="\n\n".join(batches[0])))
+
+    # --------------------------------
+    # 🗺️ Map: files
+    # --------------------------------
+    def _split(self, path, text):
+        """
+        Consecutive chunks of `text` grouped into parts of at most part_tokens
+        tokens. A chunk too large on its own (long lines, minified code) is cut
+        into pieces that fit first.
+        """
+        parts, current, size = [], [], 0
+        for chunk in chunk_text(path, text, max_lines=80, overlap=0):
+            pieces = [(chunk["text"], self.counter.count(chunk["text"]))]
+            if pieces[0][1] > self.part_tokens:
+                pieces = [(piece, self.counter.count(piece)) for piece in self._pieces(chunk["text"])]
+            for piece, tokens in pieces:
+                if current and size + tokens > self.part_tokens:
+                    parts.append("\n".join(current))
+                    current, size = [], 0
+                current.append(piece)
+                size += tokens
+        if current:
+            parts.append("\n".join(current))
+        return parts
+
+    def _pieces(self, text):
+        """`text` cut into consecutive pieces of at most part_tokens tokens (at line boundaries when possible)."""
+        truncate = PromptBuilder(self.part_tokens, self.counter)._truncate
+        rest, pieces = "\n".join(text.splitlines()), []
+        while rest:
+            piece = truncate(rest, self.part_tokens) or rest[0]
+            pieces.append(piece)
+            rest = rest[len(piece):]
+            if rest.startswith("\n"):
+                rest = rest[1:]
+        return pieces
+
+    def _summarize_file(self, nodes, used, stats, root, relative, file_hash):
+        key = node_key("file", relative, file_hash)
+        if key in nodes:
+            return self._cached(nodes, used, stats, key, None)
+        try:
+            with open(os.path.join(root, relative), "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        except OSError:
+            return ""
+        parts = self._split(relative, text) or [""]
+        if len(parts) == 1:
+            return self._cached(nodes, used, stats, key, FILE_PROMPT.format(label=relative, text=parts[0]))
+        summaries = [
+            (f"{relative} (part {i + 1}/{len(parts)})",
+             self._cached(nodes, used, stats, node_key("part", relative, hash_bytes(part.encode("utf-8"))),
+                          FILE_PROMPT.format(label=f"{relative} (part {i + 1}/{len(parts)})", text=part)))
+            for i, part in enumerate(parts)
+        ]
+        return self._reduce(nodes, used, stats, PARTS_PROMPT, relative, summaries, key)
+
+    # --------------------------------
+    # 🌳 Whole tree
+    # --------------------------------
+    def summarize(self, root, files):
+        """
+        Summarize the repository at `root` from `files` ({path: content hash}).
+        Returns {"summary", "directories": {relative dir: summary},
+        "files": {relative path: summary}, "calls", "cached", "seconds"}.
+        """
+        started = time.perf_counter()
+        root_key = os.path.abspath(root)
+        nodes = self.roots.setdefault(root_key, {})
+        used = set()
+        stats = {"calls": 0, "cached": 0}
+
+        hashes = {os.path.relpath(path, root).replace(os.sep, "/"): h for path, h in files.items()}
+        children = {}   # directory -> [child names] ("" is the root)
+        for relative in hashes:
+            parts = relative.split("/")
+            for depth in range(len(parts)):
+                parent = "/".join(parts[:depth])
+                child = "/".join(parts[:depth + 1])
+                siblings = children.setdefault(parent, [])
+                if child not in siblings:
+                    siblings.append(child)
+
+        summaries, keys = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # map: every file (cached ones return immediately)
+            futures = {
+                relative: pool.submit(self._summarize_file, nodes, used, stats, root, relative, file_hash)
+                for relative, file_hash in sorted(hashes.items())
+            }
+            for relative, future in futures.items():
+                summaries[relative] = future.result()
+                keys[relative] = node_key("file", relative, hashes[relative])
+
+            # reduce: deepest directories first, one level at a time, the root last
+            levels = {}
+            for directory in children:
+                levels.setdefault(directory.count("/") + 1 if directory else 0, []).append(directory)
+            for depth in sorted(levels, reverse=True):
+                reduced = pool.map(
+                    lambda d: self._summarize_directory(nodes, used, stats, d, children, summaries, keys),
+                    levels[depth],
+                )
+                for directory, summary, key in reduced:
+                    summaries[directory], keys[directory] = summary, key
+
+        # Forget nodes of this root that the current tree no longer reaches
+        stale = set(nodes) - used
+        if stale:
+            for key in stale:
+                del nodes[key]
+            self.dirty = True
+        self.save()
+
+        return {
+            "summary": summaries.get("", ""),
+            "directories": {d: summaries[d] for d in sorted(children) if d},
+            "files": {f: summaries[f] for f in sorted(hashes)},
+            "calls": stats["calls"],
+            "cached": stats["cached"],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _summarize_directory(self, nodes, used, stats, directory, children, summaries, keys):
+        names = children[directory]
+        if len(names) == 1 and directory:
+            # nothing to roll up: a one-child directory is described by its child
+            return directory, summaries[names[0]], keys[names[0]]
+        key = node_key("dir", directory, *sorted(keys[name] for name in names))
+        parts = [(name.rsplit("/", 1)[-1] + ("/" if name in children else ""), summaries[name]) for name in sorted(names)]
+        template = DIRECTORY_PROMPT if directory else REPO_PROMPT
+        return directory, self._reduce(nodes, used, stats, template, directory or "repository root", parts, key), key
@@ -0,0 +1,100 @@
+# response_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw model responses, content-addressed by a hash of
+    (model, prompt, options). Entries expire after `ttl` seconds and the
+    least recently used ones are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=".ollama_cache.sqlite", max_bytes=200 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   response TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   created REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model, prompt, options=None, format=None):
+        """Stable content hash for a request."""
+        request = {"model": model, "prompt": prompt, "options": options or {}}
+        if format:
+            request["format"] = format
+        payload = json.dumps(request, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response, or None on a miss / expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
@@ -1,19 +1,75 @@
 # smart_assistant.py
+import os
+
 from hierarchical_intent_detector import HierarchicalIntentDetector
 from analyzer import ProjectAnalyzer
+from query_cache import QueryCache, SingleFlight, normalize_query
+
+# Where generated projects are written unless the caller chooses (never the process's CWD)
+DEFAULT_OUTPUT_ROOT = os.path.join(os.path.expanduser("~"), "ai-coding-agent-projects")
 
 class SmartAssistant:
-    def __init__(self):
+    def __init__(self, output_root=None):
+        self.output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_ROOT)
         self.detector = HierarchicalIntentDetector()
         self.analyzer = ProjectAnalyzer()
+        self.cache = QueryCache()
+        self.inflight = SingleFlight()
+
+    def _index_version(self):
+        """
+        Cached answers are only valid for the project index they were computed on:
+        the embeddings, the static code index and the dependency manifests.
+        """
+        project = self.analyzer.project
+        stack = project.dependency_index.stack_key(project.project_path) if project.project_path else None
+        return (project.project_path, self.analyzer.store.version, self.analyzer.code_index.generation, stack)
 
     def handle_query(self, user_query: str):
-        main_intent, sub_intent, confidence = self.detector.detect_intent(user_query)
+        version = self._index_version()
+
+        # Repeat question on an unchanged index: answer without intent detection
+        cached = self.cache.get(user_query, version)
+        if cached is not None:
+            print("⚡ Answered from query cache.")
+            return cached
+
+        main_intent, sub_intent, confidence, query_emb = self.detector.detect_intent_with_embedding(user_query)
         print(f"🧠 Detected Intent: {main_intent} → {sub_intent} (Confidence: {confidence})")
 
         if confidence < 0.5:
             return "⚠️ I'm not confident about the intent. Please rephrase your request."
 
+        # Near-duplicate of a cached question with the same intent. The embedding
+        # from intent detection is reused; the keyword tier doesn't compute one
+        intent = (main_intent, sub_intent)
+        if main_intent == "analytics" and query_emb is None:
+            query_emb = self._query_embedding(user_query)
+        if query_emb is not None:
+            cached = self.cache.get(user_query, version, intent=intent, embedding=query_emb)
+            if cached is not None:
+                print("⚡ Answered from query cache (similar question).")
+                return cached
+
+        # Identical concurrent requests share one in-flight model call
+        key = (normalize_query(user_query), version, main_intent, sub_intent)
+        result = self.inflight.do(key, lambda: self._route(main_intent, sub_intent, user_query))
+
+        # Analysis answers only depend on the index; generated plans are not reused
+        if main_intent == "analytics":
+            self.cache.put(user_query, version, result, intent=intent, embedding=query_emb)
+        return result
+
+    def _query_embedding(self, user_query):
+        """Query embedding for semantic cache lookups, or None when they are off or no model is available."""
+        if not self.cache.semantic:
+            return None
+        try:
+            return self.detector.prototypes.encode([user_query])[0]
+        except ImportError:
+            return None
+
+    def _route(self, main_intent, sub_intent, user_query):
         # Route based on intent
         if main_intent == "analytics":
             if sub_intent == "framework_analysis":
@@ -22,10 +78,12 @@ class SmartAssistant:
                 return self.analyzer.analyze_apis()
             elif sub_intent == "database_analysis":
                 return self.analyzer.analyze_database()
+            elif sub_intent == "project_report":
+                return self.analyzer.analyze_report()
 
         elif main_intent == "generative":
             if sub_intent == "project_creation":
-                return self.analyzer.generate_project(user_query)
+                return self.analyzer.generate_project(user_query, root=self.output_root)
             elif sub_intent == "component_generation":
                 return self.analyzer.generate_component(user_query)
             elif sub_intent == "code_refactor":
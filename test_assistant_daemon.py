@@ -0,0 +1,120 @@
+# test_assistant_daemon.py
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from assistant_cli import DaemonClient, DaemonError
+from assistant_daemon import AssistantDaemon, main as daemon_main, token_path
+
+FILES = {
+    "package.json": '{"dependencies": {"express": "^4.18.0", "react": "^18.2.0", "@prisma/client": "^5.6.0"}}',
+    "prisma/schema.prisma": 'datasource db {\n  provider = "postgresql"\n}\nmodel User {\n  id Int @id\n}\n',
+}
+
+
+def main():
+    # The daemon's caches (.code_index.json, .file_manifest.json, ...) are
+    # relative to the working directory: keep them in the temp dir too
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            run(workdir)
+        finally:
+            os.chdir(previous)
+
+
+def run(workdir):
+    project = os.path.join(workdir, "project")
+    for name, text in FILES.items():
+        os.makedirs(os.path.dirname(os.path.join(project, name)), exist_ok=True)
+        with open(os.path.join(project, name), "w") as f:
+            f.write(text)
+
+    address = os.path.join(workdir, "assistant.sock")
+    daemon = AssistantDaemon(workers=2, max_pending=4)
+    server = threading.Thread(target=daemon.serve, args=(address,), daemon=True)
+    server.start()
+    while daemon.server is None:
+        time.sleep(0.05)
+    print(f"\n🧪 Socket file mode: {oct(os.stat(address).st_mode & 0o777)}")
+
+    client = DaemonClient(address)
+    print("\n🧪 Opening the project once, in the daemon...")
+    print(client.open(project))
+
+    for analysis in ("framework", "database"):
+        start = time.perf_counter()
+        result = client.analyze(analysis, summarize=False)
+        print(f"\n🧪 {analysis} analysis over the socket in {(time.perf_counter() - start) * 1000:.1f}ms:\n{result}")
+
+    def burst(_):
+        other = DaemonClient(address)
+        try:
+            other.analyze("database", summarize=False)
+            return "ok"
+        except DaemonError as e:
+            return str(e)
+        finally:
+            other.close()
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        outcomes = list(pool.map(burst, range(12)))
+    print(f"\n🧪 12 concurrent requests against a queue of 4: {outcomes.count('ok')} served, "
+          f"{len(outcomes) - outcomes.count('ok')} rejected as busy")
+    print(f"Status: {client.status()['queue']}")
+
+    print(client.shutdown())
+    server.join(timeout=5)
+    client.close()
+
+    check_port_mode(project)
+
+
+def check_port_mode(project):
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    print(f"\n🧪 Loopback TCP daemon (--port {port})...")
+    server = threading.Thread(target=daemon_main, args=(["--port", str(port), "--project", project],), daemon=True)
+    server.start()
+    while not os.path.exists(token_path(port)):
+        time.sleep(0.05)
+    print(f"Token file mode: {oct(os.stat(token_path(port)).st_mode & 0o777)}")
+    with open(token_path(port)) as f:
+        token = f.read()
+
+    def raw(method, headers, body=None):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request(method, "/status" if method == "GET" else "/analyze", body=body, headers=headers)
+        response = connection.getresponse()
+        error = json.loads(response.read()).get("error")
+        connection.close()
+        return response.status, error
+
+    auth = {"Authorization": f"Bearer {token}"}
+    for label, method, headers, body in [
+        ("no token", "GET", {}, None),
+        ("wrong token", "GET", {"Authorization": "Bearer nope"}, None),
+        ("browser Origin", "POST", {**auth, "Origin": "http://evil.example", "Content-Type": "application/json"}, "{}"),
+        ("text/plain body", "POST", {**auth, "Content-Type": "text/plain"}, '{"type": "database"}'),
+    ]:
+        print(f"Refused ({label}): {raw(method, headers, body)}")
+
+    client = DaemonClient(("127.0.0.1", port))
+    print(f"Token client: {client.analyze('database', summarize=False)[:80]!r}...")
+    print(client.shutdown())
+    server.join(timeout=5)
+    client.close()
+    print(f"Token file removed on shutdown: {not os.path.exists(token_path(port))}")
+
+
+if __name__ == "__main__":
+    main()
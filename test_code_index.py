@@ -0,0 +1,87 @@
+# test_code_index.py
+import os
+import tempfile
+import time
+
+from code_index import CodeIndex
+from project_scanner import ProjectScanner
+
+FILES = {
+    "app.py": '''
+from flask import Flask, Blueprint
+from flask_sqlalchemy import SQLAlchemy
+app = Flask(__name__)
+db = SQLAlchemy(app)
+bp = Blueprint("users", __name__, url_prefix="/users")
+
+class User(db.Model):
+    __tablename__ = "users"
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String)
+
+@app.route("/health")
+def health():
+    return "ok"
+
+@bp.route("/<int:user_id>", methods=["GET", "DELETE"])
+def user(user_id):
+    ...
+''',
+    "api/items.py": '''
+from fastapi import APIRouter
+import asyncpg
+router = APIRouter(prefix="/items")
+
+@router.get("/{item_id}")
+async def read_item(item_id: int):
+    ...
+''',
+    "web/server.js": '''
+const express = require("express");
+const mongoose = require("mongoose");
+const app = express();
+const router = express.Router();
+// app.get("/commented-out", handler)
+app.get("/api/users", (req, res) => res.send(`hello ${req.query.name}`));
+router.route("/api/posts").get(listPosts).post(createPost);
+const Post = mongoose.model("Post", new mongoose.Schema({ title: String }));
+axios.get("/not-a-route");
+''',
+    "prisma/schema.prisma": '''
+datasource db {
+  provider = "postgresql"
+  url      = env("DATABASE_URL")
+}
+model Order {
+  id    Int    @id
+  total Float
+}
+''',
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        for name, text in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+            with open(os.path.join(root, name), "w") as f:
+                f.write(text)
+
+        index = CodeIndex(os.path.join(root, ".code_index.json"))
+        scanner = ProjectScanner()
+
+        start = time.perf_counter()
+        for scanned in scanner.scan(root):
+            index.update_scanned(scanned)
+        index.save()
+        print(f"\n🧪 Indexed in {time.perf_counter() - start:.3f}s\n")
+        print("API routes:\n" + index.api_table(root))
+        print("\nDatabase:\n" + index.database_table(root))
+
+        reloaded = CodeIndex(index.path)
+        changed = sum(reloaded.update(s.path, s.hash, s.text) for s in scanner.scan(root))
+        print(f"\n🧪 Rescan after reload re-parsed {changed} unchanged file(s)")
+
+
+if __name__ == "__main__":
+    main()
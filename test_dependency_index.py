@@ -0,0 +1,98 @@
+# test_dependency_index.py
+import os
+import tempfile
+import time
+
+from dependency_index import DependencyIndex, describe_stack
+from project_scanner import ProjectScanner
+
+FILES = {
+    # npm workspaces monorepo with a lockfile at the root
+    "package.json": '{"name": "shop", "private": true, "workspaces": ["apps/*", "packages/*"],'
+                    ' "devDependencies": {"turbo": "^1.10.0", "typescript": "~5.2.2"}}',
+    "package-lock.json": '{"lockfileVersion": 3, "packages": {'
+                         '"": {"name": "shop"},'
+                         '"node_modules/next": {"version": "14.0.3"},'
+                         '"node_modules/react": {"version": "18.2.0"},'
+                         '"node_modules/express": {"version": "4.18.2"},'
+                         '"node_modules/express/node_modules/debug": {"version": "2.6.9"},'
+                         '"node_modules/@prisma/client": {"version": "5.6.0"}}}',
+    "apps/web/package.json": '{"name": "web", "dependencies": {"next": "^14.0.0", "react": "^18",'
+                             ' "ui": "workspace:*", "@stripe/stripe-js": "^2.1.0"},'
+                             ' "devDependencies": {"tailwindcss": "^3.3.0"}}',
+    "apps/api/package.json": '{"name": "api", "dependencies": {"express": "^4.18.0", "@prisma/client": "^5.6.0"}}',
+    "packages/ui/package.json": '{"name": "ui", "peerDependencies": {"react": ">=18"}}',
+    # Python service with PEP 621 metadata, a poetry lockfile and extra requirement files
+    "services/ml/pyproject.toml": '''
+[project]
+name = "ml-service"
+dependencies = ["FastAPI>=0.104", "SQLAlchemy[asyncio]~=2.0", "psycopg2-binary; sys_platform != 'win32'"]
+
+[project.optional-dependencies]
+dev = ["pytest>=7"]
+
+[build-system]
+requires = ["hatchling"]
+''',
+    "services/ml/poetry.lock": '''
+[[package]]
+name = "fastapi"
+version = "0.104.1"
+
+[[package]]
+name = "sqlalchemy"
+version = "2.0.23"
+''',
+    "services/ml/requirements-dev.txt": "-r requirements.txt\n# tools\nblack==23.11.0\nRuff>=0.1  # linter\n",
+    "services/legacy/setup.py": '''
+from setuptools import setup
+REQUIREMENTS = ["Django>=4.2,<5", "celery"]
+setup(name="legacy", install_requires=REQUIREMENTS, extras_require={"test": ["pytest-django"]})
+''',
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        for name, text in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+            with open(os.path.join(root, name), "w") as f:
+                f.write(text)
+
+        index = DependencyIndex(os.path.join(root, ".dependency_index.json"))
+        start = time.perf_counter()
+        for scanned in ProjectScanner().scan(root):
+            index.update_scanned(scanned)
+        print(f"\n🧪 {len(index.manifests(root))} manifests parsed in {time.perf_counter() - start:.3f}s\n")
+
+        for dep in index.dependencies(root):
+            print(f" → [{dep['ecosystem']}] {dep['name']} {dep['version']} {dep['specs']}"
+                  f"{' (dev)' if dep['dev'] else ''} from {dep['sources']}")
+        print(f"\nWorkspaces: {index.workspaces(root)}")
+
+        start = time.perf_counter()
+        fingerprint = index.fingerprint(root)
+        print(f"\n🧪 Fingerprint in {(time.perf_counter() - start) * 1000:.2f}ms:\n{describe_stack(fingerprint)}")
+        index.save()
+
+        reloaded = DependencyIndex(index.path)
+        changed = sum(reloaded.update(s.path, s.hash, s.text) for s in ProjectScanner().scan(root))
+        start = time.perf_counter()
+        cached = reloaded.fingerprint(root)
+        print(f"\n🧪 After reload: re-parsed {changed} manifest(s), cached fingerprint in "
+              f"{(time.perf_counter() - start) * 1000:.2f}ms (same: {cached == fingerprint})")
+
+        with open(os.path.join(root, "package.json"), "a") as f:
+            f.write("\n")
+        for _ in range(3):
+            for scanned in ProjectScanner().scan(root):
+                reloaded.update_scanned(scanned)
+            reloaded.fingerprint(root)
+            reloaded.save()
+            with open(os.path.join(root, "package.json"), "a") as f:
+                f.write(" ")
+        print(f"\n🧪 After 3 manifest edits: {len(DependencyIndex(index.path).fingerprints)} fingerprint(s) kept on disk")
+
+
+if __name__ == "__main__":
+    main()
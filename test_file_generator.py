@@ -0,0 +1,110 @@
+# test_file_generator.py
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ollama_client import OllamaClient
+from plan_refiner import PlanRefiner
+from project_manager import ProjectManager
+
+SKELETON = {
+    "base_directory": "flask-api",
+    "actions": [
+        {"action": "write_files", "command": "", "message": "app", "files": [
+            {"path": "app.py", "language": "python", "purpose": "Flask app with a /health route"},
+            {"path": "models.py", "language": "python", "purpose": "SQLAlchemy models"},
+            {"path": "README.md", "language": "markdown", "purpose": "How to run the API"},
+        ]},
+        {"action": "run_command", "command": "pip install flask", "files": [], "message": "install"},
+    ],
+}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Skeleton for schema-constrained requests, a slowly streamed fenced file body otherwise.
+    Streams for files named in `fail_midway` break off with an error halfway through;
+    non-streaming (retry) requests answer in one piece, or with nothing when `fail_retries`."""
+    fail_midway = set()
+    fail_retries = False
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        name = None
+        if body.get("format"):
+            text = json.dumps(SKELETON)
+        else:
+            name = body["prompt"].split("File to write: ", 1)[1].split(" ", 1)[0]
+            text = f"```\n# {name}\n" + "".join(f"line_{i} = {i}\n" for i in range(20)) + "```"
+
+        if not body.get("stream", True):
+            retried = "" if self.fail_retries else text.replace("\n", " (retried)\n", 2)
+            data = json.dumps({"response": retried, "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for i in range(0, len(text), 16):
+            if name in self.fail_midway and i >= len(text) // 2:
+                self.wfile.write((json.dumps({"error": "model crashed"}) + "\n").encode())
+                return
+            self.wfile.write((json.dumps({"response": text[i:i + 16], "done": False}) + "\n").encode())
+            self.wfile.flush()
+            time.sleep(0.01)
+        self.wfile.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as root:
+        # ProjectManager's default client opens its response cache in the working directory
+        previous = os.getcwd()
+        os.chdir(root)
+        try:
+            manager = ProjectManager()
+        finally:
+            os.chdir(previous)
+        manager.client = OllamaClient(host=f"http://127.0.0.1:{server.server_port}", cache=False)
+        manager.refiner = PlanRefiner(manager.client)
+
+        print("\n🧪 Two-phase generation (skeleton, then files streamed concurrently)...\n")
+        plan = manager.generate_project("make a flask api", root=root)
+        for step in plan["actions"]:
+            for file in step.get("files") or []:
+                print(f" → {file['path']}: {len(file['content'])} chars, first line {file['content'].splitlines()[0]!r}")
+
+        print("\n🧪 Regenerating while models.py's stream fails and its retry comes back empty...\n")
+        FakeOllamaHandler.fail_midway.add("models.py")
+        FakeOllamaHandler.fail_retries = True
+        models = os.path.join(root, "flask-api", "models.py")
+        with open(models) as f:
+            before = f.read()
+        manager.generate_project("make a flask api", root=root)
+        with open(models) as f:
+            print(f" → models.py kept its previous content: {f.read() == before}")
+        print(f" → files left in flask-api: {sorted(os.listdir(os.path.dirname(models)))}")
+
+        print("\n🧪 Regenerating while only models.py's stream fails (the retry succeeds)...\n")
+        FakeOllamaHandler.fail_retries = False
+        manager.generate_project("make a flask api", root=root)
+        with open(models) as f:
+            print(f" → models.py first line after the retry: {f.readline().strip()!r}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
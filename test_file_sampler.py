@@ -0,0 +1,70 @@
+# test_file_sampler.py
+import os
+import subprocess
+import tempfile
+import time
+
+import file_sampler
+from file_sampler import FileSampler
+from project_scanner import ProjectScanner
+
+FILES = {
+    "package.json": '{"name": "shop", "main": "src/index.js", "dependencies": {"express": "^4.18.0"}}',
+    "src/index.js": 'const express = require("express");\nconst routes = require("./routes");\n'
+                    'const app = express();\napp.use("/api", routes);\napp.listen(3000);\n',
+    "src/routes/index.js": 'import { listUsers } from "../services/users";\nimport db from "../db";\n'
+                           'export default function routes(router) {\n  router.get("/users", listUsers);\n}\n',
+    "src/services/users.js": 'import db from "../db";\nimport { format } from "../util/format";\n'
+                             'export async function listUsers(req, res) {\n  res.json(await db.users());\n}\n',
+    "src/db.js": 'const { Pool } = require("pg");\nmodule.exports = { users: () => [] };\n' + "// padding\n" * 20,
+    "src/util/format.js": 'export const format = (s) => s.trim();\n' + "// padding\n" * 20,
+    "tests/users.test.js": 'import { listUsers } from "../src/services/users";\ntest("users", () => {});\n' + "// x\n" * 20,
+    "scripts/pkg/__init__.py": "",
+    "scripts/pkg/helpers.py": '"""Shared helpers for the maintenance scripts."""\n\ndef slug(s):\n    return s.lower()\n' + "# x\n" * 40,
+    "scripts/migrate.py": '"""Run database migrations."""\nfrom pkg.helpers import slug\n\n\ndef main():\n    print(slug("X"))\n' + "# x\n" * 40,
+    "docs/notes.html": "<p>" + "notes " * 200 + "</p>",
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        for name, text in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+            with open(os.path.join(root, name), "w") as f:
+                f.write(text)
+        git = ["git", "-C", root, "-c", "user.name=t", "-c", "user.email=t@t"]
+        subprocess.run(["git", "init", "-q", root], check=True)
+        subprocess.run(git + ["add", "."], check=True)
+        subprocess.run(git + ["commit", "-qm", "initial"], check=True)
+        with open(os.path.join(root, "src/db.js"), "a") as f:
+            f.write("// recently changed\n")
+        subprocess.run(git + ["commit", "-qam", "touch db"], check=True)
+
+        sampler = FileSampler(os.path.join(root, ".file_summaries.json"))
+        start = time.perf_counter()
+        for scanned in ProjectScanner().scan(root):
+            sampler.observe(scanned)
+        samples = sampler.select(root, max_files=5)
+        sampler.save()
+        print(f"\n🧪 Ranked {len(sampler.observed)} files in {time.perf_counter() - start:.3f}s; top 5:\n")
+        for path, outline in samples:
+            score = sampler.scores[path]
+            reasons = ", ".join(f"{k} {v:+.1f}" for k, v in score.items() if v and k != "total")
+            print(f" → {os.path.relpath(path, root)} ({score['total']}: {reasons})")
+        print(f"\nOutline of scripts/migrate.py:\n{file_sampler.summarize('migrate.py', FILES['scripts/migrate.py'])}")
+
+        # Reopen: imports and outlines come from the cache, nothing is re-read
+        reads = []
+        original = file_sampler._read_head
+        file_sampler._read_head = lambda path, limit: reads.append(path) or original(path, limit)
+        reopened = FileSampler(sampler.path)
+        for scanned in ProjectScanner().scan(root):
+            scanned.text = None
+            reopened.observe(scanned)
+        reopened.select(root, max_files=5)
+        file_sampler._read_head = original
+        print(f"\n🧪 Reopen re-read {len(reads)} file(s) for outlines")
+
+
+if __name__ == "__main__":
+    main()
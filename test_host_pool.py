@@ -0,0 +1,121 @@
+# test_host_pool.py
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from host_pool import HostPool, NoHostAvailable
+from ollama_client import OllamaClient
+
+MODEL = "deepseek-coder:6.7b"
+
+
+def fake_server(models=(MODEL,), fail=False, delay=0.2):
+    """A fake Ollama on a free port: /api/tags lists `models`, /api/generate answers after `delay`
+    (404 for unknown models, 500 when `fail`)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._send(200, {"models": [{"name": m} for m in models]})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if fail:
+                return self._send(500, {"error": "boom"})
+            if body["model"] not in models:
+                return self._send(404, {"error": f"model '{body['model']}' not found"})
+            time.sleep(delay)
+            self._send(200, {"response": f"served by {self.server.server_port}", "done": True})
+
+        def _send(self, status, data):
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def monitors():
+    return sum(thread.name == "ollama-health" for thread in threading.enumerate())
+
+
+async def burst(client, n):
+    started = time.perf_counter()
+    answers = await asyncio.gather(*(client.agenerate(f"prompt {i}", json_response=False) for i in range(n)))
+    return answers, time.perf_counter() - started
+
+
+def main():
+    servers = [fake_server() for _ in range(3)]
+    hosts = [url for _, url in servers]
+
+    print("\n🧪 Throughput: 12 concurrent requests, 1 host vs 3 hosts (max 3 in flight per host)...\n")
+    for count in (1, 3):
+        client = OllamaClient(hosts=hosts[:count], cache=False, health_interval=0)
+        answers, seconds = asyncio.run(burst(client, 12))
+        spread = {a: answers.count(a) for a in set(answers)}
+        print(f" → {count} host(s): {seconds:.2f}s  {spread}")
+        client.close()
+
+    print("\n🧪 Failover: one host down, one failing with 500s, one without the model, one healthy...\n")
+    _, broken = fake_server(fail=True)
+    _, no_model = fake_server(models=("llama3:8b",))
+    down = "http://127.0.0.1:9"   # nothing listens on the discard port
+    client = OllamaClient(hosts=[down, broken, no_model, hosts[0]], cache=False,
+                          health_interval=0, backoff=0.05, retries=3)
+    client.pool.check_health()
+    answers, seconds = asyncio.run(burst(client, 6))
+    print(f" → {len(answers)} answers in {seconds:.2f}s: {set(answers)}")
+    client.close()
+
+    print("\n🧪 Circuit breaker: without health checks, repeated failures open the broken host's circuit...\n")
+    _, broken = fake_server(fail=True)
+    _, healthy = fake_server()
+    client = OllamaClient(hosts=[broken, healthy], cache=False, health_interval=0, backoff=0.01, retries=2)
+    for _ in range(8):
+        client.generate("hello", json_response=False)
+    for url, stats in client.stats().items():
+        print(f" → {url}: {stats}")
+    client.close()
+
+    print("\n🧪 Half-open circuit: a request finishing during the trial doesn't let a second trial in...\n")
+    pool = HostPool(["http://127.0.0.1:9/half-open"], failure_threshold=1, reset_timeout=0, health_interval=0)
+    earlier = pool.acquire(MODEL)
+    pool.release(pool.acquire(MODEL), "error")          # opens the circuit
+    trial = pool.acquire(MODEL)
+    pool.release(earlier, "missing")                     # unrelated request ends mid-trial
+    try:
+        pool.acquire(MODEL, timeout=0.2)
+        print(" → ❌ a second trial was admitted")
+    except NoHostAvailable as e:
+        print(f" → trial={trial.trial}, second request refused: {e}")
+    pool.release(trial, "ok")
+    print(f" → after the trial succeeded: {pool.stats()}")
+
+    print("\n🧪 Health monitor: started by the first request of a multi-host client, stopped by close()...\n")
+    single = OllamaClient(hosts=[hosts[1]], cache=False, health_interval=0.1)
+    multi = OllamaClient(hosts=hosts[1:], cache=False, health_interval=0.1)
+    print(f" → before any request: {monitors()} monitor thread(s)")
+    single.generate("hello", json_response=False)
+    print(f" → after a single-host request: {monitors()} monitor thread(s)")
+    multi.generate("hello", json_response=False)
+    print(f" → after a multi-host request: {monitors()} monitor thread(s)")
+    multi.close()
+    single.close()
+    print(f" → after close(): {monitors()} monitor thread(s)")
+
+    for server, _ in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# test_intent_prototypes.py
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from hierarchical_intent_detector import HierarchicalIntentDetector
+from intent_prototypes import PrototypeMatrix
+
+# Phrasings the keyword tier is not confident about: they go to the prototypes
+QUERIES = [
+    "what is this codebase built with",
+    "where does it keep its data",
+    "tidy up this module",
+    "spin up a todo app for me",
+]
+
+
+def main():
+    detector = HierarchicalIntentDetector()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        examples = {label: texts for label, texts in zip(detector.prototypes.labels, detector.prototypes.examples)}
+
+        print("\n🧪 Prototypes: one batch encode, then the on-disk cache...")
+        try:
+            start = time.perf_counter()
+            first = PrototypeMatrix(detector.model_name, examples, cache_dir=cache_dir).matrix
+            built = time.perf_counter() - start
+        except ImportError as e:
+            print(f"⚠️ Skipped: {e}")
+            return
+        start = time.perf_counter()
+        cached = PrototypeMatrix(detector.model_name, examples, cache_dir=cache_dir)
+        reloaded = cached.matrix
+        print(f"Built {first.shape} in {built:.2f}s, reloaded in {(time.perf_counter() - start) * 1000:.1f}ms, "
+              f"identical: {np.array_equal(first, reloaded)}, files: {os.listdir(cache_dir)}")
+
+        changed = dict(examples)
+        label = next(iter(changed))
+        changed[label] = changed[label] + ["one more example"]
+        print(f"Changed examples use a new cache file: "
+              f"{PrototypeMatrix(detector.model_name, changed, cache_dir=cache_dir).cache_file != cached.cache_file}")
+
+        print("\n🧪 Batch classification: one encode call and one matrix product...")
+        detector.prototypes = cached
+        start = time.perf_counter()
+        results = detector.detect_intents(QUERIES * 250)
+        seconds = time.perf_counter() - start
+        for query, result in zip(QUERIES, results):
+            print(f" → {query!r}: {result}")
+        print(f"{len(results)} queries in {seconds:.2f}s; tiers: {detector.tier_stats.report()}")
+
+
+if __name__ == "__main__":
+    main()
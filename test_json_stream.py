@@ -0,0 +1,40 @@
+# test_json_stream.py
+from json_stream import IncrementalJSONParser, parse_json_response
+
+PROSE = [
+    "- Database or APIs: [None]",
+    "- [ ] Stripe",
+    "Routes found [1]: GET /users",
+    "Config lives in {project}/settings.py",
+]
+
+JSON = [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('{"a": [1, 2,], // trailing comma\n}', {"a": [1, 2]}),
+    ("[1, 2", [1, 2]),
+]
+
+
+def main():
+    print("\n🧪 Prose containing brackets comes back unchanged...\n")
+    for text in PROSE:
+        result = parse_json_response(text)
+        print(f" {'✅' if result == text else '❌'} {text!r} → {result!r}")
+
+    print("\n🧪 JSON (fenced, near-valid, truncated) is parsed and repaired...\n")
+    for text, expected in JSON:
+        result = parse_json_response(text)
+        print(f" {'✅' if result == expected else '❌'} {text!r} → {result!r}")
+
+    print("\n🧪 Schema-constrained output may be repaired after leading prose...\n")
+    text = 'Here is the plan: {"base_directory": "app", "actions": []'
+    parser = IncrementalJSONParser(array_key="actions")
+    parser.feed(text)
+    for label, result in (("expect_json", parse_json_response(text, expect_json=True)),
+                          ("parser.result(expect_json=True)", parser.result(expect_json=True)),
+                          ("default", parse_json_response(text))):
+        print(f" → {label}: {result!r}")
+
+
+if __name__ == "__main__":
+    main()
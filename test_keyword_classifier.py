@@ -0,0 +1,41 @@
+# test_keyword_classifier.py
+from hierarchical_intent_detector import HierarchicalIntentDetector
+
+# Requests for new code that name a database or API noun: the keyword tier
+# must not answer them as analytics, it leaves them to the model tier
+GENERATIVE = [
+    "create a database schema for a blog",
+    "generate a prisma schema for users",
+    "make a mongodb model for posts",
+    "build a SQLAlchemy model for orders",
+    "write a new REST endpoint for orders",
+]
+
+ANSWERED = {
+    "Which framework is this project using?": ("analytics", "framework_analysis"),
+    "Find API routes from this backend": ("analytics", "api_analysis"),
+    "What database ORM does this project use?": ("analytics", "database_analysis"),
+    "Create me a React project with TailwindCSS": ("generative", "project_creation"),
+    "Add a new login component in React": ("generative", "component_generation"),
+}
+
+
+def main():
+    detector = HierarchicalIntentDetector()
+    threshold = detector.fast_threshold
+
+    print("\n🧪 Generative requests with analytics nouns:")
+    for query in GENERATIVE:
+        label, confidence = detector.fast.classify(query)
+        deferred = label is None or label[0] == "generative" or confidence < threshold
+        print(f"{'✅' if deferred else '❌'} {query!r} → {label} {confidence:.2f}")
+
+    print("\n🧪 Queries the keyword tier should still answer:")
+    for query, expected in ANSWERED.items():
+        label, confidence = detector.fast.classify(query)
+        ok = label == expected and confidence >= threshold
+        print(f"{'✅' if ok else '❌'} {query!r} → {label} {confidence:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# test_model_registry.py
+import sys
+import time
+
+import model_registry
+from hierarchical_intent_detector import HierarchicalIntentDetector
+from intent_detector import IntentDetector
+
+
+def main():
+    print("\n🧪 Constructing both intent detectors (no model should load)...")
+    start = time.perf_counter()
+    flat, hierarchical = IntentDetector(), HierarchicalIntentDetector()
+    print(f"Constructed in {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"sentence_transformers imported: {'sentence_transformers' in sys.modules}")
+    print(f"{flat.model_name} loaded: {model_registry.is_loaded(flat.model_name)}")
+
+    print("\n🧪 Queries the keyword tier answers never touch the model...")
+    print(hierarchical.detect_intent("Which framework is this project using?"))
+    print(f"{hierarchical.model_name} loaded: {model_registry.is_loaded(hierarchical.model_name)}")
+
+    print("\n🧪 First use loads the model once; both detectors share it...")
+    try:
+        start = time.perf_counter()
+        model = hierarchical.model
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        shared = flat.model
+        second = time.perf_counter() - start
+    except ImportError as e:
+        print(f"⚠️ Skipped: {e}")
+        return
+    print(f"First access {first:.2f}s, second {second * 1000:.3f}ms, same object: {model is shared}")
+    print(f"Stats: {model_registry.model_stats()}")
+
+    model_registry.unload(hierarchical.model_name)
+    print(f"After unload, loaded: {model_registry.is_loaded(hierarchical.model_name)}")
+
+
+if __name__ == "__main__":
+    main()
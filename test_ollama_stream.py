@@ -0,0 +1,72 @@
+# test_ollama_stream.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ollama_client import OllamaClient
+from json_stream import IncrementalJSONParser
+
+FAKE_PLAN = """```json
+{
+  "base_directory": "flask-api",
+  "actions": [
+    {"action": "write_files", "command": "", "files": [{"path": "app.py", "language": "python", "content": "print('hi {}')"}], "message": "write app"},
+    {"action": "write_files", "command": "", "files": [{"path": "README.md", "language": "markdown", "content": ""}], "message": "docs"},
+    {"action": "run_command", "command": "pip install flask", "files": [], "message": "install"}
+  ]
+}
+```"""
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for Ollama's /api/generate (streams NDJSON in small chunks)."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for i in range(0, len(FAKE_PLAN), 7):
+                line = {"model": body["model"], "response": FAKE_PLAN[i:i + 7], "done": False}
+                self.wfile.write((json.dumps(line) + "\n").encode())
+                self.wfile.flush()
+            self.wfile.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+        else:
+            payload = json.dumps({"response": FAKE_PLAN, "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OllamaClient(host=f"http://127.0.0.1:{server.server_port}", cache=False)
+
+    print("\n🧪 Streaming tokens + incremental plan parsing...\n")
+    parser = IncrementalJSONParser(array_key="actions")
+    tokens = 0
+    for token in client.stream("make a flask api"):
+        tokens += 1
+        for action in parser.feed(token):
+            print(f" → action ready after {tokens} tokens: {action['action']} ({action['message']})")
+
+    plan = parser.result()
+    print(f"\nParsed plan base_directory: {plan['base_directory']} ({len(plan['actions'])} actions)")
+
+    print("\n🧪 Non-streaming generate() over the pooled session...\n")
+    for _ in range(3):
+        plan = client.generate("make a flask api")
+        print(f" → {plan['base_directory']} ({len(plan['actions'])} actions)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
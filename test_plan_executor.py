@@ -0,0 +1,69 @@
+# test_plan_executor.py
+import tempfile
+
+from plan_executor import PlanExecutor, SandboxError, describe_execution
+
+PLAN = {
+    "base_directory": "demo-app",
+    "actions": [
+        {"action": "explain", "command": "", "files": [], "message": "Scaffold a small app"},
+        {"action": "run_command", "command": "mkdir -p static", "files": [], "message": "scaffold"},
+        {"action": "write_files", "command": "", "files": [
+            {"path": f"src/module_{i}.py", "language": "python", "content": f"VALUE = {i}\n"} for i in range(20)
+        ], "message": "write modules"},
+        {"action": "write_files", "command": "", "files": [
+            {"path": "README.md", "language": "markdown", "content": "# demo\n"}
+        ], "message": "docs"},
+        # Independent slow steps: should overlap, not add up
+        {"action": "run_command", "command": "sleep 1 && echo lint done", "files": [], "message": "lint"},
+        {"action": "run_command", "command": "python3 -c \"import time; time.sleep(1); print('tests done')\"",
+         "files": [], "message": "tests"},
+        {"action": "run_command", "command": "ls src | wc -l", "files": [], "message": "count"},
+    ],
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        print("\n🧪 Dry run...\n")
+        report = PlanExecutor(root, dry_run=True).execute(PLAN)
+        print(describe_execution(report))
+
+        print("\n🧪 Real run (two 1s steps should finish in ~1s total)...\n")
+        report = PlanExecutor(root).execute(PLAN)
+        print(describe_execution(report))
+        print(f"\nok={report['ok']} total={report['seconds']}s")
+
+        print("\n🧪 Sandbox escape is refused...\n")
+        bad = {"base_directory": "demo-app", "actions": [
+            {"action": "write_files", "files": [{"path": "../../etc/evil", "content": "x"}], "message": "escape"}
+        ]}
+        report = PlanExecutor(root).execute(bad)
+        print(describe_execution(report))
+        try:
+            PlanExecutor(root).execute({"base_directory": "/tmp", "actions": []})
+        except SandboxError as e:
+            print("Refused base directory:", e)
+
+        print("\n🧪 A timed-out compound command is killed with its children (~2s, not 8s)...\n")
+        slow = {"base_directory": "demo-app", "actions": [
+            {"action": "run_command", "command": "cd . && sleep 8", "files": [], "message": "hangs"}
+        ]}
+        report = PlanExecutor(root, command_timeout=2).execute(slow)
+        print(describe_execution(report))
+        print(f"total={report['seconds']}s")
+
+        print("\n🧪 A run-phase server is started detached, not awaited until the timeout...\n")
+        serve = {"base_directory": "demo-app", "actions": [
+            {"action": "run_command", "command": "python3 -m http.server 0", "files": [], "message": "serve"},
+            {"action": "run_command", "command": "python3 app.py", "files": [], "message": "crashes at once"},
+        ]}
+        executor = PlanExecutor(root, startup_wait=1)
+        report = executor.execute(serve)
+        print(describe_execution(report))
+        print(f"total={report['seconds']}s, still running: {[p.poll() is None for p, _ in executor.background]}")
+        executor.stop_background()
+
+
+if __name__ == "__main__":
+    main()
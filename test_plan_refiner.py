@@ -0,0 +1,53 @@
+# test_plan_refiner.py
+import asyncio
+
+from plan_refiner import PlanRefiner
+
+# What a model sometimes returns: stray strings where actions and files should be objects
+PLAN = {
+    "base_directory": "todo-app",
+    "actions": [
+        "scaffold the app",
+        {"action": "write_files", "files": [
+            {"path": "app.py", "language": "python", "content": ""},
+            "requirements.txt",
+            {"path": "templates/index.html", "language": "html", "content": "<ul></ul>\n"},
+        ]},
+        {"action": "write_files", "files": "README.md"},
+    ],
+}
+
+
+class FakeClient:
+    """Answers every prompt with a one-line file; enough to exercise the refiner without Ollama."""
+    prompt_budget = 3072
+
+    def generate(self, prompt, json_response=True, **kwargs):
+        return "```python\nprint('hello')\n```"
+
+    async def agenerate(self, prompt, json_response=True, **kwargs):
+        return self.generate(prompt, json_response=json_response)
+
+
+def main():
+    refiner = PlanRefiner(FakeClient())
+
+    print("\n🧪 Malformed entries are reported, not crashed on...\n")
+    print(refiner.validate_plan(PLAN))
+
+    print("\n🧪 Refining from synchronous code...\n")
+    plan = refiner.refine_plan("a todo app", PLAN)
+    print(repr(plan["actions"][1]["files"][0]["content"]))
+    print(f"Left unfixed: {refiner.issues}")
+
+    print("\n🧪 Refining from inside a running event loop (falls back to the sync path)...\n")
+
+    async def from_coroutine():
+        return refiner.refine_plan("a todo app", PLAN)
+
+    plan = asyncio.run(from_coroutine())
+    print(repr(plan["actions"][1]["files"][0]["content"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# test_prompt_builder.py
+from prompt_builder import PromptBuilder, TokenCounter, approx_token_count, describe_report
+
+FILES = "\n".join(f"# file_{i}.py\ndef handler_{i}(request):\n    return respond({i})\n" for i in range(200))
+
+
+def build(budget, counter=None):
+    builder = PromptBuilder(budget, counter)
+    builder.add("instructions", "Analyze the project and list its API routes.", priority=100)
+    builder.add("dependencies", "flask, sqlalchemy, redis", priority=80)
+    builder.add("files", FILES, priority=50, truncatable=True)
+    builder.add("history", "Earlier answer: the project uses Flask.", priority=10)
+    builder.add("empty", "   ", priority=90)
+    return builder.build()
+
+
+def main():
+    print(f"\n🧪 The whole input is ~{approx_token_count(FILES)} tokens (estimated)")
+
+    for budget in (8192, 300, 40):
+        prompt, report = build(budget)
+        print(f"\n🧪 Budget {budget}:")
+        print(describe_report(report))
+        print(f"included={report['included']} truncated={report['truncated']} dropped={report['dropped']}")
+        print(f"within budget: {TokenCounter().count(prompt) <= budget}, "
+              f"starts with the instructions: {prompt.startswith('Analyze')}")
+
+    print("\n🧪 Pluggable tokenizer (one token per whitespace-separated word)...")
+    prompt, report = build(300, TokenCounter(lambda text: len(text.split())))
+    print(describe_report(report))
+
+    print("\n🧪 A single line longer than the budget is cut by characters...")
+    builder = PromptBuilder(20).add("blob", "x" * 1000, truncatable=True)
+    prompt, report = builder.build()
+    print(f"{len(prompt)} chars, {report['used']}/{report['budget']} tokens, truncated={report['truncated']}")
+
+
+if __name__ == "__main__":
+    main()
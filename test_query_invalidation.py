@@ -0,0 +1,74 @@
+# test_query_invalidation.py
+import os
+import tempfile
+
+import numpy as np
+
+from query_cache import QueryCache
+from smart_assistant import SmartAssistant
+
+FILES = {
+    "package.json": '{"dependencies": {"express": "^4.18.0"}}',
+    "src/routes.js": "const app = require('express')();\napp.get('/users', listUsers);\n",
+}
+
+QUERY = "Which framework is this project using?"
+
+
+def write(project, name, text):
+    os.makedirs(os.path.dirname(os.path.join(project, name)), exist_ok=True)
+    with open(os.path.join(project, name), "w") as f:
+        f.write(text)
+
+
+def check_intents():
+    print("\n🧪 Semantic matches stay within one intent")
+    cache = QueryCache()
+    security, performance = np.array([1.0, 0.1, 0.0]), np.array([1.0, 0.12, 0.0])   # ~0.99 cosine
+    cache.put("find security issues", 1, "security report", intent=("analytics", "security"), embedding=security)
+    same = cache.get("look for security problems", 1, intent=("analytics", "security"), embedding=performance)
+    other = cache.get("find performance issues", 1, intent=("analytics", "performance"), embedding=performance)
+    exact = cache.get("Find security issues?", 1)
+    print(f"{'✅' if same else '❌'} Similar query, same intent: {same!r}")
+    print(f"{'✅' if other is None else '❌'} Similar query, other intent: {other!r}")
+    print(f"{'✅' if exact else '❌'} Exact repeat before intent detection: {exact!r}")
+
+
+def main():
+    check_intents()
+
+    # Index caches are relative to the working directory: keep them in the temp dir
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            run(os.path.join(workdir, "project"))
+        finally:
+            os.chdir(previous)
+
+
+def run(project):
+    for name, text in FILES.items():
+        write(project, name, text)
+    assistant = SmartAssistant()
+    assistant.analyzer.open_project(project)
+    assistant.cache.put(QUERY, assistant._index_version(), "Express")
+
+    def check(label, expect_hit):
+        assistant.analyzer.open_project(project)
+        hit = assistant.cache.get(QUERY, assistant._index_version()) is not None
+        print(f"{'✅' if hit == expect_hit else '❌'} {label}: {'cached answer reused' if hit else 'cache missed'}")
+        if not hit:
+            assistant.cache.put(QUERY, assistant._index_version(), "re-answered")
+
+    print("\n🧪 Query cache invalidation")
+    check("Reopened unchanged project", True)
+    write(project, "package.json", '{"dependencies": {"express": "^4.18.0", "@prisma/client": "^5.6.0"}}')
+    check("Dependency added to package.json", False)
+    write(project, "src/routes.js", FILES["src/routes.js"] + "app.post('/users', createUser);\n")
+    check("Route added to src/routes.js", False)
+    check("Reopened again without changes", True)
+
+
+if __name__ == "__main__":
+    main()
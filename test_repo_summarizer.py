@@ -0,0 +1,106 @@
+# test_repo_summarizer.py
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from file_manifest import hash_file
+from ollama_client import OllamaClient
+from repo_summarizer import RepoSummarizer
+
+FILES = {
+    "app/main.py": "from app.routes import router\n\ndef main():\n    router.run()\n",
+    "app/routes.py": "import flask\nrouter = flask.Blueprint('api', __name__)\n\n@router.get('/users')\ndef users():\n    return []\n",
+    "app/models/user.py": "class User:\n    id: int\n    email: str\n",
+    "web/src/index.js": "import App from './App';\nrender(App);\n",
+    "web/src/App.js": "export default function App() { return null; }\n",
+    "scripts/big.py": "".join(f"def task_{i}(x):\n    return x + {i}\n\n" for i in range(400)),
+    "web/dist/bundle.min.js": ";".join(f"var v{i}=f({i})" for i in range(3000)),
+}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOllamaHandler.calls += 1
+        time.sleep(0.05)
+        first_line = body["prompt"].strip().split("\n", 1)[0]
+        payload = {"response": f"summary of: {first_line[:60]}", "done": True}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        data = json.dumps({"models": [{"name": "deepseek-coder:6.7b"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(summarizer, root, label):
+    files = {}
+    for name in FILES:
+        path = os.path.join(root, name)
+        files[path] = hash_file(path)
+    before = FakeOllamaHandler.calls
+    result = summarizer.summarize(root, files)
+    print(f"🧪 {label}: {FakeOllamaHandler.calls - before} model calls, {result['cached']} cached nodes, "
+          f"{result['seconds']}s")
+    return result
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OllamaClient(host=f"http://127.0.0.1:{server.server_port}", cache=False, context_window=2048)
+
+    with tempfile.TemporaryDirectory() as root:
+        for name, text in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+            with open(os.path.join(root, name), "w") as f:
+                f.write(text)
+        summarizer = RepoSummarizer(client, path=os.path.join(root, ".repo_summaries.json"))
+
+        print()
+        result = run(summarizer, root, "First run")
+        print(f"   repo: {result['summary']}")
+        print(f"   directories: {sorted(result['directories'])}")
+        run(RepoSummarizer(client, path=summarizer.path), root, "Unchanged rerun (reloaded cache)")
+
+        with open(os.path.join(root, "app/models/user.py"), "a") as f:
+            f.write("    name: str\n")
+        run(summarizer, root, "After editing app/models/user.py")
+
+        with open(os.path.join(root, "web/dist/bundle.min.js")) as f:
+            parts = summarizer._split("web/dist/bundle.min.js", f.read())
+        print(f"🧪 One-line minified bundle: {len(parts)} parts, largest "
+              f"{max(summarizer.counter.count(p) for p in parts)}/{summarizer.part_tokens} tokens")
+
+        # Two calls at once on one summarizer: each reports only its own nodes
+        files = {os.path.join(root, name): hash_file(os.path.join(root, name)) for name in FILES}
+        shared = RepoSummarizer(client, path=os.path.join(root, ".shared.json"))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(shared.summarize(root, files))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"🧪 Concurrent calls: calls + cached per call {[r['calls'] + r['cached'] for r in results]} "
+              f"(the tree has {result['calls']} nodes)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
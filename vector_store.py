@@ -0,0 +1,276 @@
+# vector_store.py
+import json
+import os
+
+import numpy as np
+
+from ann_index import IVFIndex
+
+
+class VectorStore:
+    """
+    Embedding store backed by one contiguous matrix file, opened memory-mapped.
+
+    - `<path>.vec`        raw float32/float16 rows, appended to on every update
+    - `<path>.index.json` sidecar index: file path → {hash, mtime, rows, spans}
+
+    Re-embedding a file appends new rows and marks the old ones dead; the file
+    is compacted once the dead fraction passes `compact_ratio`.
+    """
+
+    def __init__(self, path="embeddings", dtype="float32", compact_ratio=0.3, ann_threshold=50000):
+        self.matrix_file = f"{path}.vec"
+        self.index_file = f"{path}.index.json"
+        self.ann_file = f"{path}.ann.npz"
+        self.dtype = np.dtype(dtype)
+        self.compact_ratio = compact_ratio
+        self.ann_threshold = ann_threshold  # live rows above which search goes through the IVF index
+
+        self.dim = None
+        self.count = 0       # rows in the matrix file (live + dead)
+        self.dead = 0        # rows no longer referenced by any entry
+        self.entries = {}    # path -> {"hash": str, "mtime": float, "rows": [int], "spans": [[start, end]]}
+        self.version = 0     # bumped on every change, lets callers detect a stale view
+        self._matrix = None
+        self._live = None    # (version, {root prefix: (row index or None, owners)}) used for exact search
+        self._owners = {}    # row -> (path, start, end)
+        self.ann = None
+
+        self.load()
+
+    # --------------------------------
+    # 📂 Load / Save
+    # --------------------------------
+    def load(self):
+        """Read the sidecar index; the matrix itself is only memory-mapped on access."""
+        if not os.path.exists(self.index_file):
+            return
+
+        with open(self.index_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.dim = meta.get("dim")
+        self.dtype = np.dtype(meta.get("dtype", self.dtype.name))
+        self.count = meta.get("count", 0)
+        self.dead = meta.get("dead", 0)
+        self.entries = meta.get("entries", {})
+        self.version = meta.get("version", 0)
+        for path, entry in self.entries.items():
+            self._track(path, entry)
+
+        # Rows appended after the last save are not referenced by the index — drop them
+        expected = self.count * (self.dim or 0) * self.dtype.itemsize
+        if os.path.exists(self.matrix_file) and os.path.getsize(self.matrix_file) > expected:
+            with open(self.matrix_file, "r+b") as f:
+                f.truncate(expected)
+
+        # Load the persisted IVF index now, so put()/remove() keep it in step
+        # incrementally; loaded lazily it would be stale after any update and retrained
+        if self.count - self.dead >= self.ann_threshold:
+            ann = IVFIndex(lambda rows: self.matrix[rows])
+            if ann.load(self.ann_file, self.version):
+                self.ann = ann
+
+    def save(self):
+        """Persist the sidecar index (compacting first if too many rows are dead)."""
+        if self.count and self.dead / self.count > self.compact_ratio:
+            self.compact()
+
+        if self.ann is not None:
+            self.ann.save(self.ann_file, self.version)
+
+        meta = {
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "count": self.count,
+            "dead": self.dead,
+            "version": self.version,
+            "entries": self.entries,
+        }
+        tmp = f"{self.index_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.index_file)
+
+    # --------------------------------
+    # 🧩 Entries
+    # --------------------------------
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def hash_of(self, path):
+        entry = self.entries.get(path)
+        return entry["hash"] if entry else None
+
+    def put(self, path, file_hash, mtime, vectors, spans=None):
+        """
+        Append the vectors for `path` (one row per vector), replacing any previous ones.
+        `spans` holds the [start, end] line range each row was embedded from.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=self.dtype))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}")
+
+        self.remove(path)
+
+        with open(self.matrix_file, "ab") as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+
+        rows = list(range(self.count, self.count + len(vectors)))
+        self.count += len(vectors)
+        self.entries[path] = {"hash": file_hash, "mtime": mtime, "rows": rows}
+        if spans is not None:
+            self.entries[path]["spans"] = [list(span) for span in spans]
+        self._track(path, self.entries[path])
+        self._matrix = None
+        self.version += 1
+
+        if self.ann is not None:
+            self.ann.add(rows, vectors.astype(np.float32))
+        return rows
+
+    def remove(self, path):
+        """Forget `path`; its rows stay in the file as dead rows until compaction."""
+        entry = self.entries.pop(path, None)
+        if entry is None:
+            return []
+        self.dead += len(entry["rows"])
+        for row in entry["rows"]:
+            self._owners.pop(row, None)
+        self.version += 1
+
+        if self.ann is not None:
+            self.ann.remove(entry["rows"])
+        return entry["rows"]
+
+    def _track(self, path, entry):
+        spans = entry.get("spans") or [[0, 0]] * len(entry["rows"])
+        for row, (start, end) in zip(entry["rows"], spans):
+            self._owners[row] = (path, start, end)
+
+    def get(self, path):
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        return self.matrix[entry["rows"]]
+
+    # --------------------------------
+    # ⚡ Matrix access
+    # --------------------------------
+    @property
+    def matrix(self):
+        """All rows (live and dead) as a read-only memory-mapped (count, dim) array."""
+        if self._matrix is None:
+            if not self.count:
+                return np.empty((0, self.dim or 0), dtype=self.dtype)
+            self._matrix = np.memmap(self.matrix_file, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+        return self._matrix
+
+    def live_rows(self):
+        rows = [row for entry in self.entries.values() for row in entry["rows"]]
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def compact(self):
+        """Rewrite the matrix file with only live rows and renumber the index."""
+        old = self.matrix
+        tmp = f"{self.matrix_file}.tmp"
+        new_row = 0
+
+        with open(tmp, "wb") as f:
+            for entry in self.entries.values():
+                rows = entry["rows"]
+                f.write(np.ascontiguousarray(old[rows]).tobytes())
+                entry["rows"] = list(range(new_row, new_row + len(rows)))
+                new_row += len(rows)
+
+        self._matrix = None
+        del old
+        os.replace(tmp, self.matrix_file)
+        print(f"🧹 Compacted vector store: {self.count} → {new_row} rows")
+        self.count = new_row
+        self.dead = 0
+        self.version += 1
+
+        # Row ids changed: rebuild owners, and the ANN index on next search
+        self._owners = {}
+        for path, entry in self.entries.items():
+            self._track(path, entry)
+        self.ann = None
+        if os.path.exists(self.ann_file):
+            os.remove(self.ann_file)
+
+    def live_view(self, root=None):
+        """
+        Live rows for search: (rows, owners, matrix). `matrix` is the
+        memory-mapped store itself, never a copy; owners[i] = (path, start, end)
+        belongs to matrix row rows[i]. `rows` is None when every matrix row is
+        live (no dead rows, no `root` filter); dead rows are only dropped from
+        the file by compact(). With `root`, only rows of files under it are
+        included. Row indexes are rebuilt only when the store changes.
+        """
+        prefix = os.path.join(os.path.abspath(root), "") if root else None
+        if self._live is None or self._live[0] != self.version:
+            self._live = (self.version, {})
+        views = self._live[1]
+        if prefix not in views:
+            rows = self.live_rows()
+            owners = [self._owners[row] for row in rows.tolist()]
+            if prefix:
+                keep = [i for i, (path, _, _) in enumerate(owners) if os.path.abspath(path).startswith(prefix)]
+                rows, owners = rows[keep], [owners[i] for i in keep]
+            views[prefix] = (None if len(rows) == self.count else rows, owners)
+        return (*views[prefix], self.matrix)
+
+    def search(self, query_vector, top_k=10, exact=False, root=None):
+        """
+        Cosine top-k over live rows (vectors are stored normalized), restricted
+        to files under `root` when given. Exact brute force for small stores;
+        IVF approximate search once the store holds `ann_threshold` live rows
+        (unless `exact=True`).
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+
+        if not exact and self.count - self.dead >= self.ann_threshold:
+            return self._ann_search(query_vector, top_k, root)
+
+        rows, owners, matrix = self.live_view(root)
+        if not owners:
+            return []
+
+        scores = matrix @ query_vector
+        if rows is not None:
+            scores = scores[rows]   # keep only the viewed rows' scores rather than copying their vectors
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(owners[i][0], owners[i][1], owners[i][2], float(scores[i])) for i in top]
+
+    def _ann_search(self, query_vector, top_k, root):
+        """IVF top-k; with `root`, fetch more candidates until top_k of them fall under it."""
+        prefix = os.path.join(os.path.abspath(root), "") if root else None
+        k = top_k
+        while True:
+            rows, scores = self._ann_index().search(query_vector, top_k=k)
+            hits = [(*self._owners[row], float(score)) for row, score in zip(rows.tolist(), scores.tolist())
+                    if prefix is None or os.path.abspath(self._owners[row][0]).startswith(prefix)]
+            if len(hits) >= top_k or len(rows) < k:   # enough, or every probed candidate was ranked
+                return hits[:top_k]
+            k *= 4
+
+    def _ann_index(self):
+        """Load the persisted IVF index, or train a new one over all live rows."""
+        if self.ann is None:
+            ann = IVFIndex(lambda rows: self.matrix[rows])
+            if not ann.load(self.ann_file, self.version):
+                print(f"🏗️ Building ANN index over {self.count - self.dead} vectors...")
+                ann.train(self.live_rows())
+                ann.save(self.ann_file, self.version)
+            self.ann = ann
+        return self.ann